@@ -0,0 +1,299 @@
+import bisect
+import math
+import threading
+from collections import Counter, deque
+import pandas as pd
+from api.news_records import news_rows
+
+# Trading days in a year, to annualize the volatility of daily returns
+TRADING_DAYS = 252
+
+# Feeds the analytics are derived from
+ANALYTICS_FEEDS = ('currency', 'aspi', 'news')
+
+def _rounded(value, digits=6):
+    return None if value is None else round(value, digits)
+
+class RollingStats:
+    """
+    Rolling statistics of one daily series, each new day updating them in O(1):
+    the simple moving average over `window` days (a running sum), the
+    exponential moving average with the given `span`, the annualized volatility
+    of the last `window` daily log returns (running sums of the returns and
+    their squares) and the drawdown from the running peak.
+
+    The latest day can be revised, as the current day's bar moves intraday; its
+    update is undone and applied again with the new value. Each day's results
+    are appended to per-field lists, so charts read them without recomputing.
+    """
+    FIELDS = ('value', 'sma', 'ema', 'volatility', 'drawdown')
+
+    def __init__(self, window=20, span=20):
+        self.window = window
+        self.alpha = 2 / (span + 1)
+        self.dates = []
+        self.series = {field: [] for field in self.FIELDS}
+        self.max_drawdown = 0.0
+        self._values = deque()
+        self._returns = deque()
+        self._sum = 0.0
+        self._return_sum = 0.0
+        self._return_squares = 0.0
+        self._ema = None
+        self._peak = None
+        # What the latest update changed, so it can be revised
+        self._undo = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    def update(self, day, value):
+        """
+        Add the `value` of `day` ('YYYY-MM-DD'), or revise it when `day` is the
+        latest one. Days older than the latest are ignored. Returns True if
+        anything changed.
+        """
+        if value is None or not math.isfinite(value):
+            return False
+        if self.dates:
+            if day < self.dates[-1]:
+                return False
+            if day == self.dates[-1]:
+                if value == self.series['value'][-1]:
+                    return False
+                self._rollback()
+        self._push(day, value)
+        return True
+
+    def _push(self, day, value):
+        previous = self._values[-1] if self._values else None
+        undo = {
+            'ema': self._ema,
+            'peak': self._peak,
+            'max_drawdown': self.max_drawdown,
+            'evicted': None,
+            'returned': False,
+            'evicted_return': None
+        }
+
+        self._values.append(value)
+        self._sum += value
+        if len(self._values) > self.window:
+            undo['evicted'] = self._values.popleft()
+            self._sum -= undo['evicted']
+
+        if previous is not None and previous > 0 and value > 0:
+            ret = math.log(value / previous)
+            self._returns.append(ret)
+            self._return_sum += ret
+            self._return_squares += ret * ret
+            undo['returned'] = True
+            if len(self._returns) > self.window:
+                undo['evicted_return'] = old = self._returns.popleft()
+                self._return_sum -= old
+                self._return_squares -= old * old
+
+        self._ema = value if self._ema is None else self._ema + self.alpha * (value - self._ema)
+        self._peak = value if self._peak is None else max(self._peak, value)
+        drawdown = value / self._peak - 1 if self._peak > 0 else 0.0
+        self.max_drawdown = min(self.max_drawdown, drawdown)
+        self._undo = undo
+
+        self.dates.append(day)
+        self.series['value'].append(value)
+        self.series['sma'].append(self._sum / len(self._values) if len(self._values) == self.window else None)
+        self.series['ema'].append(self._ema)
+        self.series['volatility'].append(self._volatility())
+        self.series['drawdown'].append(drawdown)
+
+    def _volatility(self):
+        count = len(self._returns)
+        if count < 2:
+            return None
+        variance = (self._return_squares - self._return_sum * self._return_sum / count) / (count - 1)
+        return math.sqrt(max(variance, 0.0) * TRADING_DAYS)
+
+    def _rollback(self):
+        """Undo the latest update"""
+        undo = self._undo
+        value = self._values.pop()
+        self._sum -= value
+        if undo['evicted'] is not None:
+            self._values.appendleft(undo['evicted'])
+            self._sum += undo['evicted']
+
+        if undo['returned']:
+            ret = self._returns.pop()
+            self._return_sum -= ret
+            self._return_squares -= ret * ret
+            if undo['evicted_return'] is not None:
+                old = undo['evicted_return']
+                self._returns.appendleft(old)
+                self._return_sum += old
+                self._return_squares += old * old
+
+        self._ema = undo['ema']
+        self._peak = undo['peak']
+        self.max_drawdown = undo['max_drawdown']
+        self._undo = None
+        self.dates.pop()
+        for values in self.series.values():
+            values.pop()
+
+    def report(self, days):
+        """The statistics of the last `days` days, plus the latest ones"""
+        if not self.dates:
+            return None
+        latest = {field: _rounded(values[-1]) for field, values in self.series.items()}
+        return {
+            'latest': {'date': self.dates[-1], **latest, 'max_drawdown': _rounded(self.max_drawdown)},
+            'dates': self.dates[-days:],
+            **{field: [_rounded(value) for value in values[-days:]] for field, values in self.series.items()}
+        }
+
+class CategoryShare:
+    """Stories per PESTLE category per publication day, each story counted once as it arrives"""
+    def __init__(self):
+        self.dates = []
+        self.counts = {}
+        self._seen = set()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def knows(self, key):
+        return key in self._seen
+
+    def add(self, key, day, category):
+        """Count one story; returns False if it was counted before or can't be placed"""
+        if not day or not category or key in self._seen:
+            return False
+        self._seen.add(key)
+        if day not in self.counts:
+            # New stories are nearly always from the latest day, so this is an append
+            bisect.insort(self.dates, day)
+            self.counts[day] = Counter()
+        self.counts[day][category] += 1
+        return True
+
+    def report(self, days):
+        """Counts and shares of each category over the last `days` days"""
+        if not self.dates:
+            return None
+        dates = self.dates[-days:]
+        categories = sorted({category for day in dates for category in self.counts[day]})
+        totals = [sum(self.counts[day].values()) for day in dates]
+        counts = {category: [self.counts[day][category] for day in dates] for category in categories}
+        return {
+            'dates': dates,
+            'totals': totals,
+            'counts': counts,
+            'share': {
+                category: [round(count / total, 4) for count, total in zip(values, totals)]
+                for category, values in counts.items()
+            }
+        }
+
+def _story_key(story):
+    return story.get('url') or story.get('headline')
+
+def _story_day(story):
+    published_at = story.get('published_at')
+    return published_at[:10] if isinstance(published_at, str) and published_at else None
+
+class Analytics:
+    """
+    Derived analytics served by /api/analytics: RollingStats of the USD/LKR
+    rate and the ASPI close, and the daily category mix of the news. Each feed
+    snapshot only contributes what is new since the last one, so a published
+    version already folded in costs nothing and can be offered again freely
+    (from the scheduler's listeners and from requests alike).
+
+    `categorize(headlines, known)` fills in categories a news snapshot lacks.
+    """
+    def __init__(self, window=20, span=20, categorize=None):
+        self.window = window
+        self.span = span
+        self.categorize = categorize
+        self.series = {'currency': RollingStats(window, span), 'aspi': RollingStats(window, span)}
+        self.news = CategoryShare()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def seed(self, store):
+        """Start from the stored rate and ASPI bars and the classified stories of the persistent store"""
+        with self._lock:
+            for name, stats in self.series.items():
+                for row in store.ohlc(name):
+                    stats.update(row['date'], row['close'])
+            for row in store.news(limit=1_000_000):
+                self.news.add(_story_key(row), _story_day(row), row['category'])
+
+    def update(self, name, snapshot):
+        """Fold in a feed snapshot, unless this version has been seen already"""
+        if snapshot is None or name not in ANALYTICS_FEEDS:
+            return
+        with self._lock:
+            if self._versions.get(name) == snapshot.version:
+                return
+            if name == 'currency':
+                self._add_rates(snapshot.data)
+            elif name == 'aspi':
+                self._add_aspi(snapshot.data)
+            else:
+                self._add_news(snapshot.data)
+            self._versions[name] = snapshot.version
+
+    def _add_rates(self, hist):
+        """Closes of a Yahoo Finance history frame from the latest tracked day on"""
+        if hist is None or hist.empty:
+            return
+        stats = self.series['currency']
+        start = 0
+        if stats.dates:
+            since = pd.Timestamp(stats.dates[-1])
+            if hist.index.tz is not None:
+                since = since.tz_localize(hist.index.tz)
+            start = hist.index.searchsorted(since)
+        closes = hist['Close'].iloc[start:]
+        for day, close in zip(closes.index.strftime('%Y-%m-%d'), closes.tolist()):
+            stats.update(day, close)
+
+    def _add_aspi(self, rows):
+        """Closes of the published ASPI bars (in date order) from the latest tracked day on"""
+        rows = rows or []
+        stats = self.series['aspi']
+        start = 0
+        if stats.dates:
+            start = len(rows)
+            while start and rows[start - 1]['date'] >= stats.dates[-1]:
+                start -= 1
+        for row in rows[start:]:
+            stats.update(row['date'], row['index'])
+
+    def _add_news(self, frame):
+        stories = [story for story in news_rows(frame) if not self.news.knows(_story_key(story))]
+        if not stories:
+            return
+        known = [story.get('category') for story in stories]
+        if self.categorize is not None:
+            known = self.categorize([story['headline'] for story in stories], known)
+        for story, category in zip(stories, known):
+            # Unclassified stories are counted once a later snapshot has their category
+            if isinstance(category, str) and category:
+                self.news.add(_story_key(story), _story_day(story), category)
+
+    def report(self, days=90):
+        """The analytics of the last `days` days, or None before any data has arrived"""
+        with self._lock:
+            series = {name: stats.report(days) for name, stats in self.series.items()}
+            news = self.news.report(days)
+        if not any(series.values()) and news is None:
+            return None
+        return {
+            'window': self.window,
+            'ema_span': self.span,
+            'currency': series['currency'],
+            'aspi': series['aspi'],
+            'news': news
+        }
@@ -0,0 +1,263 @@
+import asyncio
+import traceback
+import aiohttp
+from api.http_client import CircuitOpenError, default_async_client
+from api.news_pipeline import NewsPipeline, merge_feeds
+from api.news_records import news_frame
+from api.web_scraper import NewScraper, CSEScraper, EconomicIndicatorsScraper, RefreshWalk
+
+# Transport failures of AsyncHttpClient, the asyncio counterpart of requests' RequestException
+FETCH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError)
+
+class AsyncEconomicIndicatorsScraper(EconomicIndicatorsScraper):
+    """EconomicIndicatorsScraper fetching through AsyncHttpClient"""
+    def __init__(self, client=None):
+        super().__init__(client or default_async_client)
+
+    async def fetch_economic_indicators(self):
+        """Scrapes Trading Economics for target indicators"""
+        try:
+            response = await self.client.get(self.url, headers=self.headers)
+
+            if response.status_code != 200:
+                print(f"Failed to fetch economic data: Status {response.status_code}")
+                return None
+
+            return await asyncio.to_thread(self.parse_indicators, response.text)
+
+        except FETCH_ERRORS as e:
+            print(f"Request error: {e}")
+            return None
+        except Exception as e:
+            print(f"Error fetching economic indicators: {e}")
+            traceback.print_exc()
+            return None
+
+class AsyncCSEScraper(CSEScraper):
+    """CSEScraper fetching through AsyncHttpClient"""
+    def __init__(self, client=None, series_path=None):
+        super().__init__(client or default_async_client, series_path)
+
+    async def get_aspi_data(self, period='1M'):
+        """Async get_aspi_data; see CSEScraper.get_aspi_data"""
+        try:
+            response = await self.client.get(self.base_url, headers=self.headers)
+
+            if response.status_code != 200:
+                print(f"Failed to fetch CSE page: Status {response.status_code}")
+                return None
+
+            aspi_value = await asyncio.to_thread(self.parse_aspi_value, response.text)
+            if not aspi_value:
+                print("ASPI value not found on the CSE page")
+                return None
+
+            # Recording writes the series file, so it also runs off the loop
+            await asyncio.to_thread(self.record, aspi_value)
+            return self.history(period)
+
+        except FETCH_ERRORS as e:
+            print(f"Request error: {e}")
+            return None
+        except Exception as e:
+            print(f"Error scraping ASPI data: {e}")
+            traceback.print_exc()
+            return None
+
+class AsyncNewScraper(NewScraper):
+    """
+    NewScraper fetching through AsyncHttpClient. Look-ahead pages are tasks on
+    the event loop rather than worker threads, so a window of slow pages costs
+    no threads at all.
+    """
+    def __init__(self, page_url=None, concurrency=4, client=None, history_size=1000, source=None, max_bytes=None):
+        super().__init__(page_url, concurrency, client or default_async_client, history_size, source, max_bytes)
+        # Serializes refreshes across awaits; _history_lock only guards the swap
+        self._refresh_lock = asyncio.Lock()
+
+    async def _load_page(self, page_no):
+        """Fetch and parse one listing page. Returns a list of stories, or None on failure"""
+        print(f"Scraping {self.source.name} page {page_no}...")
+        url = self.page_url.format(page_no)
+        try:
+            res = await self.client.get(url)
+        except FETCH_ERRORS as e:
+            print(f"Request error on page {page_no}: {e}")
+            self.last_error = str(e) or type(e).__name__
+            return None
+
+        if res.status_code != 200:
+            print("Error loading page!")
+            if res.status_code == 429 or res.status_code >= 500:
+                self.last_error = f"{self.source.name} page {page_no}: status {res.status_code}"
+            return None
+
+        # Parsing is CPU work; run it off the event loop (to_thread copies the
+        # context, so parse timings still reach Server-Timing)
+        return await asyncio.to_thread(self._parse_stories, res.text)
+
+    async def iter_pages(self, start_page=1, concurrency=None, limit=None):
+        """
+        Async generator yielding the parsed stories of each page in page order.
+        Up to `concurrency` pages are in flight at once, but no more than a known
+        `limit` of stories needs; iteration stops at the first page that fails
+        or has no stories.
+        """
+        workers = self.concurrency if concurrency is None else max(1, concurrency)
+        pending = {}
+        next_page = queued = start_page
+        collected = 0
+
+        def fill(want):
+            nonlocal queued
+            while len(pending) < want:
+                pending[queued] = asyncio.ensure_future(self._load_page(queued))
+                queued += 1
+
+        def window():
+            return workers if limit is None else min(workers, self._pages_for(limit - collected))
+
+        try:
+            fill(window())
+            while True:
+                fill(1)
+                stories = await pending.pop(next_page)
+                if not stories:
+                    print("No more stories found, stopping.")
+                    return
+                next_page += 1
+                collected += len(stories)
+
+                # Keep the window full before handing the page to the caller
+                fill(window())
+                yield stories
+        finally:
+            # Drop pages that were requested but are no longer needed
+            for task in pending.values():
+                task.cancel()
+
+    async def refresh(self, depth=None):
+        """Async refresh; see NewScraper.refresh"""
+        async with self._refresh_lock:
+            walk = RefreshWalk(self, depth)
+            self.last_error = None
+
+            if self.history:
+                # Catch up with the top of the feed one page at a time
+                pages = self.iter_pages(concurrency=1)
+                try:
+                    async for stories in pages:
+                        if walk.catch_up(stories):
+                            break
+                finally:
+                    await pages.aclose()
+
+            if walk.needs_backfill():
+                pages = self.iter_pages(start_page=walk.backfill_start(), limit=walk.depth - walk.known)
+                try:
+                    async for stories in pages:
+                        if walk.backfill(stories):
+                            break
+                    else:
+                        walk.exhausted()
+                finally:
+                    await pages.aclose()
+
+            with self._history_lock:
+                return walk.commit()
+
+    async def scrape_page(self, limit, concurrency=None, incremental=True):
+        """Async scrape_page; see NewScraper.scrape_page"""
+        limit = min(1000, limit)
+        print(f"Scraping up to {limit} news items...")
+
+        if incremental:
+            await self.refresh(limit)
+            latest = self.latest(limit)
+            return news_frame(latest)
+
+        all_news = []
+        pages = self.iter_pages(concurrency=concurrency, limit=limit)
+        try:
+            async for stories in pages:
+                all_news.extend(stories[:limit - len(all_news)])
+                if len(all_news) >= limit:
+                    break
+        finally:
+            await pages.aclose()
+
+        return news_frame(all_news)
+
+async def _next_page(pages):
+    """Next item of an async generator, or None once it is exhausted"""
+    try:
+        return await pages.__anext__()
+    except StopAsyncIteration:
+        return None
+
+class AsyncNewsPipeline(NewsPipeline):
+    """NewsPipeline whose sources are AsyncNewScrapers refreshed as concurrent tasks"""
+    scraper_class = AsyncNewScraper
+
+    async def refresh(self, depth=None):
+        """Async refresh; see NewsPipeline.refresh"""
+        results = await asyncio.gather(
+            *(scraper.refresh(depth) for scraper in self.scrapers.values()),
+            return_exceptions=True
+        )
+        added = 0
+        errors = {}
+        for name, result in zip(self.scrapers, results):
+            if isinstance(result, Exception):
+                errors[name] = str(result)
+            else:
+                added += result
+        await asyncio.to_thread(self._merge)
+        self._check_sources(errors)
+        return added
+
+    async def iter_pages(self, start_page=1, concurrency=None, limit=None):
+        """Async generator version of NewsPipeline.iter_pages"""
+        pages = {name: scraper.iter_pages(start_page, concurrency, limit) for name, scraper in self.scrapers.items()}
+        yielded = []
+        try:
+            while pages:
+                results = await asyncio.gather(*(_next_page(generator) for generator in pages.values()))
+                batch = []
+                for name, stories in zip(list(pages), results):
+                    if stories is None:
+                        await pages.pop(name).aclose()
+                    else:
+                        batch.append(stories)
+                if not batch:
+                    return
+
+                fresh = merge_feeds(batch, self.threshold, known=yielded)
+                yielded.extend(fresh)
+                if fresh:
+                    yield fresh
+        finally:
+            for generator in pages.values():
+                await generator.aclose()
+
+    async def scrape_page(self, limit, concurrency=None, incremental=True):
+        """Async scrape_page; see NewsPipeline.scrape_page"""
+        limit = min(1000, limit)
+        print(f"Scraping up to {limit} news items from {len(self.scrapers)} sources...")
+
+        if incremental:
+            await self.refresh(limit)
+            latest = self.latest(limit)
+            return news_frame(latest)
+
+        all_news = []
+        pages = self.iter_pages(concurrency=concurrency, limit=limit)
+        try:
+            async for stories in pages:
+                all_news.extend(stories[:limit - len(all_news)])
+                if len(all_news) >= limit:
+                    break
+        finally:
+            await pages.aclose()
+
+        return news_frame(all_news)
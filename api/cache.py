@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+class _Flight:
+    """A single in-progress upstream fetch that concurrent callers can wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class ResponseCache:
+    """
+    LRU cache of endpoint payloads with per-endpoint TTLs and stale-while-revalidate.
+    Entries younger than their TTL are served as-is; entries older than the TTL but
+    within `max_stale` are served immediately while one background refresh runs.
+    Concurrent misses for the same key share a single call to the loader.
+    With `enabled` off every lookup calls the loader directly and is only
+    counted as a bypass, e.g. to measure the handlers without the cache.
+    """
+    def __init__(self, ttls=None, default_ttl=60, max_stale=3600, max_entries=256, should_cache=None, enabled=True):
+        self.enabled = enabled
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        # Predicate deciding whether a loaded value is worth keeping (e.g. skip errors)
+        self.should_cache = should_cache or (lambda value: True)
+
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'evictions': 0,
+            'bypasses': 0
+        }
+
+    @staticmethod
+    def make_key(endpoint, **params):
+        """Build a cache key from the endpoint name and its normalized params"""
+        return (endpoint, tuple(sorted(params.items())))
+
+    def get(self, endpoint, params, loader):
+        """Return the cached value for `endpoint`/`params`, calling `loader()` when needed"""
+        if not self.enabled:
+            with self._lock:
+                self._counters['bypasses'] += 1
+            return loader()
+        key = self.make_key(endpoint, **params)
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                age = now - stored_at
+                if age <= ttl:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return value
+                if age <= ttl + self.max_stale:
+                    self._entries.move_to_end(key)
+                    self._counters['stale_hits'] += 1
+                    if key not in self._flights:
+                        flight = self._flights[key] = _Flight()
+                        self._counters['refreshes'] += 1
+                        threading.Thread(
+                            target=self._run_flight,
+                            args=(key, flight, loader),
+                            daemon=True
+                        ).start()
+                    return value
+
+            self._counters['misses'] += 1
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+
+        if owner:
+            self._run_flight(key, flight, loader)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _run_flight(self, key, flight, loader):
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+
+        with self._lock:
+            if flight.error is None and self.should_cache(flight.value):
+                self._entries[key] = (time.monotonic(), flight.value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters['evictions'] += 1
+            self._flights.pop(key, None)
+
+        flight.done.set()
+
+    def invalidate(self, endpoint=None):
+        """Drop all entries, or only those belonging to `endpoint`"""
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == endpoint]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+            stats['in_flight'] = len(self._flights)
+        return stats
+
+class AsyncResponseCache(ResponseCache):
+    """
+    ResponseCache for the asyncio server, where `loader` is a coroutine function.
+    Concurrent misses await one shared task and stale entries are refreshed by a
+    background task instead of a thread.
+    """
+    async def get(self, endpoint, params, loader):
+        """Return the cached value for `endpoint`/`params`, awaiting `loader()` when needed"""
+        if not self.enabled:
+            with self._lock:
+                self._counters['bypasses'] += 1
+            return await loader()
+        key = self.make_key(endpoint, **params)
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                age = now - stored_at
+                if age <= ttl:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return value
+                if age <= ttl + self.max_stale:
+                    self._entries.move_to_end(key)
+                    self._counters['stale_hits'] += 1
+                    if key not in self._flights:
+                        self._counters['refreshes'] += 1
+                        flight = self._flights[key] = asyncio.ensure_future(self._load(key, loader))
+                        # Nobody awaits a background refresh; collect its error here
+                        flight.add_done_callback(lambda task: task.cancelled() or task.exception())
+                    return value
+
+            self._counters['misses'] += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = asyncio.ensure_future(self._load(key, loader))
+
+        # A caller that disconnects must not cancel the load other callers wait on
+        return await asyncio.shield(flight)
+
+    async def _load(self, key, loader):
+        try:
+            value = await loader()
+            with self._lock:
+                if self.should_cache(value):
+                    self._entries[key] = (time.monotonic(), value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self._counters['evictions'] += 1
+            return value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
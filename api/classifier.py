@@ -0,0 +1,137 @@
+import hashlib
+import json
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+import numpy as np
+from api.startup import LazyModule
+from api.metrics import timed
+
+# TensorFlow takes seconds to import, so it is only pulled in when the model is built
+hub = LazyModule('tensorflow_hub')
+keras = LazyModule('tf_keras')
+
+CLASS_NAMES = ['Economic', 'Environmental', 'Legal', 'Political', 'Social', 'Technological']
+
+class HeadlineClassifier:
+    """
+    PESTLE classifier for news headlines. The model is loaded once, predictions
+    are memoized by headline hash, and only unseen headlines are sent through
+    the model in fixed-size batches.
+    """
+    def __init__(self, model_path, batch_size=64, cache_size=20000):
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._counters = {
+            'hits': 0,
+            'misses': 0,
+            'batches': 0,
+            'inference_seconds': 0.0
+        }
+        # Recent (batch size, seconds) pairs for per-batch timing
+        self._batch_times = deque(maxlen=50)
+
+    def _load_model(self):
+        began = time.perf_counter()
+        with zipfile.ZipFile(self.model_path, 'r') as z:
+            config = json.loads(z.read('config.json'))
+        model = keras.Sequential.from_config(config['config'], custom_objects={'KerasLayer': hub.KerasLayer})
+        print(f"Model loaded successfully in {time.perf_counter() - began:.2f}s (without weights - using for demo)")
+        return model
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def warmup(self):
+        """Load the model in a background thread so the first request doesn't pay for it"""
+        def load():
+            try:
+                self.model
+            except Exception as e:
+                print(f"Model warmup failed: {e}")
+        thread = threading.Thread(target=load, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _key(headline):
+        return hashlib.sha1(headline.encode('utf-8')).hexdigest()
+
+    def prime(self, headline, category):
+        """Record a known category, e.g. one restored from the persistent store"""
+        if category not in CLASS_NAMES:
+            return
+        with self._cache_lock:
+            self._remember(self._key(headline), category)
+
+    def _remember(self, key, category):
+        self._cache[key] = category
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @timed('classify')
+    def classify(self, headlines):
+        """Return the predicted category of each headline, in order"""
+        keys = [self._key(headline) for headline in headlines]
+        categories = [None] * len(headlines)
+        missing = {}
+
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                category = self._cache.get(key)
+                if category is not None:
+                    self._cache.move_to_end(key)
+                    categories[i] = category
+                else:
+                    # Duplicate headlines in one call are only predicted once
+                    missing.setdefault(key, []).append(i)
+            self._counters['hits'] += len(keys) - sum(len(v) for v in missing.values())
+            self._counters['misses'] += len(missing)
+
+        pending = list(missing.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            texts = np.array([headlines[positions[0]] for _, positions in batch], dtype=object)
+
+            began = time.perf_counter()
+            preds = self.model.predict(texts, batch_size=self.batch_size, verbose=0)
+            elapsed = time.perf_counter() - began
+
+            pred_classes = np.argmax(preds, axis=1)
+            with self._cache_lock:
+                self._counters['batches'] += 1
+                self._counters['inference_seconds'] += elapsed
+                self._batch_times.append((len(batch), elapsed))
+                for (key, positions), class_index in zip(batch, pred_classes):
+                    category = CLASS_NAMES[class_index]
+                    self._remember(key, category)
+                    for i in positions:
+                        categories[i] = category
+
+        return categories
+
+    def stats(self):
+        with self._cache_lock:
+            stats = dict(self._counters)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+            stats['cached'] = len(self._cache)
+            stats['recent_batches'] = [
+                {'size': size, 'seconds': round(seconds, 4)} for size, seconds in self._batch_times
+            ]
+        stats['inference_seconds'] = round(stats['inference_seconds'], 4)
+        stats['model_loaded'] = self._model is not None
+        return stats
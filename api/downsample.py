@@ -0,0 +1,88 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+METHODS = ('lttb', 'ohlc')
+
+# Bar sizes tried, finest first, when resampling to at most N OHLC bars
+OHLC_RULES = ('W', 'M', 'Q', 'Y')
+
+def lttb_indices(x, y, threshold):
+    """
+    Indices of the `threshold` points kept by Largest-Triangle-Three-Buckets.
+    The first and last points are always kept; from each bucket in between, the
+    point forming the largest triangle with the previous pick and the mean of the
+    next bucket is chosen, which preserves peaks and troughs of a line chart.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # threshold - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        # Twice the triangle area for every candidate in the bucket at once
+        areas = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+def resample_ohlc(frame, points, close):
+    """
+    Merge daily rows into weekly, monthly, quarterly or yearly bars, whichever is
+    the finest that fits in `points`. Each bar is labelled with its last trading day.
+    """
+    indexed = frame.set_index(pd.to_datetime(frame['date']))
+    aggregations = {'date': 'last', 'open': 'first', 'high': 'max', 'low': 'min', close: 'last', 'volume': 'sum'}
+    bars = None
+    for rule in OHLC_RULES:
+        bars = indexed.resample(rule).agg(aggregations).dropna(subset=[close])
+        if len(bars) <= points:
+            break
+    bars['volume'] = bars['volume'].astype(np.int64)
+    return bars[list(frame.columns)].reset_index(drop=True)
+
+def downsample(frame, points, method='lttb', value='close'):
+    """Reduce a daily frame with a 'date' column to about `points` rows"""
+    if len(frame) <= points:
+        return frame
+    if method == 'ohlc':
+        return resample_ohlc(frame, points, value)
+    # Day numbers as x, so gaps (weekends, holidays) keep their real width
+    days = pd.to_datetime(frame['date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+    return frame.iloc[lttb_indices(days, frame[value].to_numpy(), points)].reset_index(drop=True)
+
+class AggregateCache:
+    """LRU of downsampled series, keyed by feed, snapshot version, period and target size"""
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+aggregates = AggregateCache()
@@ -0,0 +1,158 @@
+import os
+import pandas as pd
+from api.news_records import news_frame, news_rows
+from api.payloads import (
+    DEFAULT_CHART_POINTS, clean_history, slice_history, chart_frame, history_to_rows, rows_to_history
+)
+
+# API endpoint whose cached payloads each feed invalidates when it publishes
+FEED_ENDPOINTS = {
+    'news': 'news',
+    'aspi': 'stock',
+    'economic': 'economic',
+    'currency': 'currency'
+}
+# Feed whose snapshot version each API endpoint's payload follows
+ENDPOINT_FEEDS = {endpoint: feed for feed, endpoint in FEED_ENDPOINTS.items()}
+
+def default_db_path():
+    """SQLite path from CEYLONPULSE_DB; Vercel only allows writes under /tmp"""
+    return os.environ.get(
+        'CEYLONPULSE_DB',
+        '/tmp/ceylonpulse.db' if os.environ.get('VERCEL')
+        else os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ceylonpulse.db')
+    )
+
+def default_shared_dir(db_path):
+    """
+    Directory the ingestion process publishes snapshots to in multi-process mode:
+    CEYLONPULSE_SHARED_DIR, else tmpfs (/dev/shm) so they live in shared memory
+    """
+    if os.environ.get('CEYLONPULSE_SHARED_DIR'):
+        return os.environ['CEYLONPULSE_SHARED_DIR']
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm/ceylonpulse'
+    return os.path.join(os.path.dirname(db_path), 'snapshots')
+
+def news_memory_cap():
+    """Bytes the in-memory news history may take (CEYLONPULSE_NEWS_MEMORY_MB), or None for no cap"""
+    megabytes = float(os.environ.get('CEYLONPULSE_NEWS_MEMORY_MB', '0') or 0)
+    return int(megabytes * 2 ** 20) if megabytes > 0 else None
+
+def series_path(db_path, name):
+    """Path of the array file of series `name`, kept next to the database"""
+    return os.path.join(os.path.dirname(db_path), f'{name}.npz')
+
+def persist_snapshot(store, name, snapshot):
+    """Write a published snapshot through to the persistent store"""
+    if name == 'news':
+        store.save_news(news_rows(snapshot.data))
+    elif name == 'economic':
+        store.save_indicators(snapshot.data)
+    elif name == 'currency':
+        store.save_ohlc('currency', history_to_rows(snapshot.data))
+    elif name == 'aspi':
+        store.save_ohlc('aspi', [{**row, 'close': row['index']} for row in snapshot.data])
+
+def categorize(headlines, known, classifier, infer=True):
+    """
+    Category of each headline, reusing the `known` ones (None where unknown) and
+    only classifying the rest. With `infer` off (serving workers, which don't
+    load the model) unknown categories stay None.
+    """
+    categories = [category if isinstance(category, str) and category else None for category in known]
+    missing = [i for i, category in enumerate(categories) if category is None]
+    if missing and infer:
+        for i, category in zip(missing, classifier.classify([headlines[i] for i in missing])):
+            categories[i] = category
+    return categories
+
+def classify_news(frame, classifier):
+    """Add the category column to a scraped news frame, so it is published already classified"""
+    if frame is None or frame.empty:
+        return frame
+    frame = frame.copy()
+    frame['category'] = pd.Categorical(classifier.classify(frame['headline'].tolist()))
+    return frame
+
+# Long periods whose downsampled chart series are built as soon as a feed publishes
+PRECOMPUTED_PERIODS = {
+    'currency': ('1y', '2y', '5y', 'max')
+}
+
+def precompute_aggregates(name, snapshot):
+    """Fill the aggregate cache with the default-size chart series of the long periods"""
+    for period in PRECOMPUTED_PERIODS.get(name, ()):
+        frame = clean_history(slice_history(snapshot.data, period))
+        chart_frame(frame, 'rate', DEFAULT_CHART_POINTS, 'lttb', key=(name, snapshot.version, period))
+
+def warm_start(store, scraper, classifier, snapshots, cse_scraper=None):
+    """Seed the scraper history, classifier memo and feed snapshots from the persistent store"""
+    rows = store.news(limit=scraper.history_size)
+    stories = [
+        {'date_time': row['date_time'], 'headline': row['headline'], 'url': row['url'], 'published_at': row['published_at']}
+        for row in rows
+    ]
+    for row in rows:
+        if row['category']:
+            classifier.prime(row['headline'], row['category'])
+    if stories:
+        scraper.seed_history(stories)
+        snapshots.put('news', news_frame(scraper.latest(scraper.history_size)))
+
+    indicators = store.latest_indicators()
+    if indicators:
+        snapshots.put('economic', indicators)
+
+    hist = rows_to_history(store.ohlc('currency'))
+    if not hist.empty:
+        snapshots.put('currency', hist)
+
+    # The ASPI series is loaded from its own file by the scraper
+    aspi = cse_scraper.history('1Y') if cse_scraper is not None else []
+    if aspi:
+        snapshots.put('aspi', aspi)
+
+    print(
+        f"Warm start from {store.path}: {len(stories)} stories, {len(indicators)} indicators, "
+        f"{len(hist)} currency rows, {len(aspi)} ASPI days"
+    )
+
+def follow_snapshot(name, snapshot, scraper, cse_scraper):
+    """Bring a serving worker's news history and ASPI series up to a snapshot published by the ingestion process"""
+    if name == 'news':
+        scraper.seed_history(news_rows(snapshot.data))
+    elif name == 'aspi':
+        # The ingestion process saves the series file before publishing
+        cse_scraper.reload()
+
+def runtime_metrics(response_cache, classifier, client, scheduler):
+    """Metric families for counters kept by the cache, classifier, transport and scheduler"""
+    cache = response_cache.stats()
+    model = classifier.stats()
+    transport = client.stats()
+    feeds = scheduler.status()
+    return [
+        ('ceylonpulse_cache_events_total', 'counter', 'Response and classifier cache lookups by outcome', [
+            ({'cache': 'response', 'event': 'hit'}, cache['hits']),
+            ({'cache': 'response', 'event': 'stale_hit'}, cache['stale_hits']),
+            ({'cache': 'response', 'event': 'miss'}, cache['misses']),
+            ({'cache': 'response', 'event': 'eviction'}, cache['evictions']),
+            ({'cache': 'classifier', 'event': 'hit'}, model['hits']),
+            ({'cache': 'classifier', 'event': 'miss'}, model['misses'])
+        ]),
+        ('ceylonpulse_cache_entries', 'gauge', 'Entries currently held per cache', [
+            ({'cache': 'response'}, cache['entries']),
+            ({'cache': 'classifier'}, model['cached'])
+        ]),
+        ('ceylonpulse_upstream_events_total', 'counter', 'Shared HTTP client counters', [
+            ({'event': key}, transport[key])
+            for key in ('requests', 'reuses', 'retries', 'errors', 'bytes', 'throttled', 'rejected')
+        ]),
+        ('ceylonpulse_upstream_circuit_open', 'gauge', 'Whether the circuit breaker of each upstream host is open', [
+            ({'host': host}, 0 if state == 'closed' else 1) for host, state in transport['circuits'].items()
+        ]),
+        ('ceylonpulse_feed_staleness_seconds', 'gauge', 'Age of the latest snapshot of each feed', [
+            ({'feed': name}, feed['staleness']) for name, feed in feeds.items() if feed['staleness'] is not None
+        ])
+    ]
@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from api.metrics import stage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# Cache-Control per route. Browsers reuse a response for max-age seconds, then
+# revalidate it with If-None-Match and usually get an empty 304 back
+CACHE_POLICIES = {
+    'page': 'public, max-age=300',
+    'news': 'public, max-age=60',
+    'stock': 'public, max-age=60',
+    'currency': 'public, max-age=300',
+    'economic': 'public, max-age=300',
+    'analytics': 'public, max-age=60',
+    # Last good data served while an upstream is down; revalidated on every use
+    'stale': 'no-cache',
+    'error': 'no-store'
+}
+
+# Token mixed into version ETags, since snapshot versions restart at 1. Worker
+# processes serving the same snapshots share it through CEYLONPULSE_BOOT_ID
+BOOT_ID = os.environ.get('CEYLONPULSE_BOOT_ID') or f'{os.getpid()}-{time.time()}'
+
+def make_etag(*parts):
+    """Strong ETag derived from `parts` (e.g. endpoint, params, snapshot version)"""
+    return '"' + hashlib.sha1(repr((BOOT_ID,) + parts).encode()).hexdigest()[:32] + '"'
+
+def variant_etag(etag, encoding):
+    """ETag of one content-coding of a representation; each coding needs its own strong ETag"""
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header matches `etag` in any of its encodings"""
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    base = etag.strip('"')
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for suffix in ('-br', '-gzip'):
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)]
+        if candidate == base:
+            return True
+    return False
+
+def choose_encoding(accept_encoding):
+    """Preferred content-coding the client accepts: 'br', 'gzip' or None"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+def compress(raw, encoding, level=None):
+    """Return (body, applied content-coding); small bodies are left as they are"""
+    if encoding is None or len(raw) < MIN_COMPRESS_SIZE:
+        return raw, None
+    with stage('compress'):
+        if encoding == 'br':
+            return brotli.compress(raw, quality=5 if level is None else level), 'br'
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(raw, compresslevel=6 if level is None else level, mtime=0), 'gzip'
+
+def representation_headers(etag=None, encoding=None, cache_control=None):
+    """Validator, coding and caching headers shared by full and 304 responses"""
+    headers = {'Vary': 'Accept-Encoding'}
+    if etag is not None:
+        headers['ETag'] = variant_etag(etag, encoding)
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    if cache_control is not None:
+        headers['Cache-Control'] = cache_control
+    return headers
+
+class BodyCache:
+    """
+    LRU of serialized, encoded response bodies keyed by (ETag, content-coding),
+    so an unchanged payload is serialized and compressed once per version.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag, encoding, build):
+        """Return (body, applied content-coding), calling `build()` for the raw bytes on a miss"""
+        key = (etag, encoding)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = compress(build(), encoding)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+class StaticFile:
+    """One page held in memory in every content-coding"""
+    __slots__ = ('path', 'mtime', 'mimetype', 'etag', 'bodies')
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.etag = '"' + hashlib.sha1(raw).hexdigest()[:32] + '"'
+        # Compressed once at the highest levels, since it is reused for every request
+        self.bodies = {None: (raw, None)}
+        self.bodies['gzip'] = compress(raw, 'gzip', level=9)
+        if brotli is not None:
+            self.bodies['br'] = compress(raw, 'br', level=11)
+
+    def body(self, encoding):
+        """Return (body, applied content-coding) for the client's preferred coding"""
+        return self.bodies.get(encoding, self.bodies[None])
+
+class StaticPages:
+    """
+    Files of a directory served from memory, precompressed when loaded. A file is
+    reloaded when its modification time changes, so edits show up without a restart.
+    """
+    def __init__(self, directory):
+        self.directory = os.path.realpath(directory)
+        self._files = {}
+        self._lock = threading.Lock()
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                self.get(os.path.relpath(os.path.join(root, name), self.directory))
+
+    def get(self, name):
+        """The StaticFile for `name` relative to the directory, or None if there is none"""
+        path = os.path.realpath(os.path.join(self.directory, name))
+        # Only files inside the directory are served
+        if not path.startswith(self.directory + os.sep):
+            return None
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        with self._lock:
+            cached = self._files.get(path)
+        if cached is not None and cached.mtime == mtime:
+            return cached
+
+        try:
+            page = StaticFile(path)
+        except OSError:
+            return None
+        with self._lock:
+            self._files[path] = page
+        return page
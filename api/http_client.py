@@ -0,0 +1,416 @@
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from api.metrics import UPSTREAM_SECONDS, record_stage
+from api.startup import LazyModule
+
+# Only the asyncio server needs aiohttp, so it is imported on first use
+aiohttp = LazyModule('aiohttp')
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Requests per second, and burst, allowed to each upstream host. The burst
+# covers a full window of look-ahead page fetches (up to max_per_host), so the
+# scrapers' concurrency isn't serialized by the bucket; the rate still caps a
+# long backfill. CEYLONPULSE_HOST_RATE=0 turns rate limiting off.
+DEFAULT_RATE = float(os.environ.get('CEYLONPULSE_HOST_RATE', '8') or 0)
+DEFAULT_BURST = int(os.environ.get('CEYLONPULSE_HOST_BURST', '8') or 1)
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of a request while the circuit of its host is open"""
+
+class TokenBucket:
+    """Allows `rate` requests per second on average and bursts of up to `burst`"""
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Take a token and return the seconds to wait before it is actually available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        # A negative balance is a queue of callers each waiting for their own token
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+class CircuitBreaker:
+    """
+    Stops requests to a failing host. After `failure_threshold` consecutive
+    failures, or one forced failure (a 429), the circuit opens and requests
+    fail immediately for `reset_timeout` seconds, or the server's Retry-After
+    if that is longer; then a single probe is let through, whose outcome
+    closes or reopens the circuit. A probe that never reports back (e.g. its
+    task was cancelled) is given up on after `probe_timeout` seconds, and the
+    next request probes instead.
+    """
+    def __init__(self, failure_threshold=5, reset_timeout=60, probe_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.open_until = 0.0
+        self.probe_until = 0.0
+        self.opened = 0
+
+    def allow(self):
+        if self.state == 'closed':
+            return True
+        now = time.monotonic()
+        if (self.state == 'open' and now >= self.open_until) or (self.state == 'half_open' and now >= self.probe_until):
+            self.state = 'half_open'
+            self.probe_until = now + self.probe_timeout
+            return True
+        # Open, or half-open with the probe still in flight
+        return False
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+
+    def record_failure(self, retry_after=None, force=False):
+        self.failures += 1
+        if force or self.state == 'half_open' or self.failures >= self.failure_threshold:
+            self.state = 'open'
+            self.open_until = time.monotonic() + max(self.reset_timeout, retry_after or 0)
+            self.opened += 1
+
+    def record_cancelled(self):
+        """A request was abandoned before it finished; only a probe counts, as a failed one"""
+        if self.state == 'half_open':
+            self.record_failure()
+
+class HostGuard:
+    """
+    Token bucket and circuit breaker of every upstream host, created on first
+    use. `rate` None turns rate limiting off (e.g. for local replay servers).
+    """
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, failure_threshold=5, reset_timeout=60):
+        self.rate = rate
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            'throttled': 0,
+            'rejected': 0
+        }
+
+    def _host(self, host):
+        entry = self._hosts.get(host)
+        if entry is None:
+            entry = self._hosts[host] = (
+                TokenBucket(self.rate, self.burst) if self.rate else None,
+                CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            )
+        return entry
+
+    def acquire(self, host):
+        """
+        Return the seconds to wait before requesting from `host`, or raise
+        CircuitOpenError if its circuit is open. Rejected requests take no token.
+        """
+        with self._lock:
+            bucket, breaker = self._host(host)
+            if not breaker.allow():
+                self._counters['rejected'] += 1
+                raise CircuitOpenError(f'Circuit open for {host}; skipping request')
+            delay = bucket.reserve() if bucket is not None else 0.0
+            if delay > 0:
+                self._counters['throttled'] += 1
+        return delay
+
+    def record(self, host, status=None, retry_after=None):
+        """Record the outcome of a request: `status` None means a transport error"""
+        with self._lock:
+            _, breaker = self._host(host)
+            if status == 429:
+                # Told to back off: open right away, with or without a usable Retry-After
+                breaker.record_failure(retry_after, force=True)
+            elif status is None or status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+    def cancelled(self, host):
+        """Record a request abandoned before it finished (e.g. a cancelled task)"""
+        with self._lock:
+            _, breaker = self._host(host)
+            breaker.record_cancelled()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['circuits'] = {host: breaker.state for host, (_, breaker) in self._hosts.items()}
+        return stats
+
+def retry_after(headers):
+    """Seconds from a Retry-After header (in seconds or as an HTTP date), or None"""
+    value = (headers or {}).get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class HttpClient:
+    """
+    Shared keep-alive HTTP transport used by all scrapers. Every host gets a
+    token bucket (`rate` requests/s, bursts of `burst`) and a circuit breaker,
+    so a slow or blocking upstream is backed off from instead of hammered.
+    """
+    def __init__(self, max_per_host=8, retries=2, backoff=0.5, timeout=(5, 15), rate=DEFAULT_RATE, burst=DEFAULT_BURST, failure_threshold=5, reset_timeout=60):
+        # Default (connect, read) timeout applied to every request
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.guard = HostGuard(rate, burst, failure_threshold, reset_timeout)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        # One pool per host, each holding at most `max_per_host` connections
+        self.adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=max_per_host,
+            pool_block=True,
+            max_retries=retry
+        )
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self._lock = threading.Lock()
+        self._counters = {
+            'requests': 0,
+            'retries': 0,
+            'errors': 0,
+            'bytes': 0
+        }
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        """
+        GET `url` over the pooled session, updating the transport counters.
+        Raises CircuitOpenError without sending anything while the host's circuit is open.
+        """
+        host = urlsplit(url).netloc
+        delay = self.guard.acquire(host)
+        if delay > 0:
+            time.sleep(delay)
+        began = time.perf_counter()
+        try:
+            response = self.session.get(
+                url,
+                headers=headers,
+                timeout=timeout if timeout is not None else self.timeout,
+                **kwargs
+            )
+        except requests.exceptions.RequestException:
+            elapsed = time.perf_counter() - began
+            UPSTREAM_SECONDS.observe(elapsed, host=host, outcome='error')
+            record_stage('fetch', elapsed)
+            self.guard.record(host)
+            with self._lock:
+                self._counters['requests'] += 1
+                self._counters['errors'] += 1
+            raise
+
+        elapsed = time.perf_counter() - began
+        UPSTREAM_SECONDS.observe(elapsed, host=host, outcome=str(response.status_code))
+        record_stage('fetch', elapsed)
+        self.guard.record(host, response.status_code, retry_after(response.headers))
+
+        retry_state = getattr(response.raw, 'retries', None)
+        retried = len(retry_state.history) if retry_state is not None else 0
+
+        with self._lock:
+            self._counters['requests'] += 1
+            self._counters['retries'] += retried
+            self._counters['bytes'] += len(response.content)
+
+        return response
+
+    def stats(self):
+        """Return request counters plus connection reuse figures from the pools"""
+        connections = 0
+        pooled_requests = 0
+        hosts = {}
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            pooled_requests += pool.num_requests
+            hosts[pool.host] = {
+                'connections': pool.num_connections,
+                'requests': pool.num_requests
+            }
+
+        with self._lock:
+            stats = dict(self._counters)
+
+        stats['connections'] = connections
+        # Every pooled request beyond the first on a connection skipped a TCP+TLS handshake
+        stats['reuses'] = max(0, pooled_requests - connections)
+        stats['hosts'] = hosts
+        stats.update(self.guard.stats())
+        return stats
+
+    def close(self):
+        self.session.close()
+
+class AsyncResponse:
+    """Fully read response of AsyncHttpClient, shaped like the parts of requests.Response the scrapers use"""
+    __slots__ = ('url', 'status_code', 'content', 'encoding')
+
+    def __init__(self, url, status_code, content, encoding):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+class AsyncHttpClient:
+    """
+    Non-blocking counterpart of HttpClient for the asyncio server. One aiohttp
+    session keeps up to `max_per_host` connections alive per host; waiting on a
+    slow upstream costs a suspended coroutine instead of a blocked thread.
+    Hosts are rate limited and circuit broken as in HttpClient.
+    """
+    def __init__(self, max_per_host=8, retries=2, backoff=0.5, timeout=(5, 15), rate=DEFAULT_RATE, burst=DEFAULT_BURST, failure_threshold=5, reset_timeout=60):
+        self.max_per_host = max_per_host
+        self.guard = HostGuard(rate, burst, failure_threshold, reset_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        # Default (connect, read) timeout applied to every request
+        self.timeout = timeout
+        self._session = None
+
+        self._counters = {
+            'requests': 0,
+            'retries': 0,
+            'errors': 0,
+            'bytes': 0,
+            'connections': 0,
+            'reuses': 0
+        }
+        self._hosts = {}
+
+    def _client_timeout(self, timeout):
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+    def _get_session(self):
+        # Created lazily so the session binds to the running event loop
+        if self._session is None or self._session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection_created)
+            trace.on_connection_reuseconn.append(self._on_connection_reused)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=self.max_per_host, ttl_dns_cache=300),
+                timeout=self._client_timeout(self.timeout),
+                trace_configs=[trace]
+            )
+        return self._session
+
+    async def _on_connection_created(self, session, context, params):
+        self._counters['connections'] += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self._counters['reuses'] += 1
+
+    async def get(self, url, headers=None, timeout=None, **kwargs):
+        """GET `url`, retrying connection errors and 5xx responses with exponential backoff"""
+        session = self._get_session()
+        host = urlsplit(url).netloc
+        delay = self.guard.acquire(host)
+        # A task cancelled mid-request (a scheduler timeout, a dropped look-ahead
+        # page) never records an outcome; a probe must not leave the circuit hanging
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            host_stats = self._hosts.setdefault(host, {'requests': 0, 'errors': 0})
+            if timeout is not None:
+                kwargs['timeout'] = self._client_timeout(timeout)
+
+            attempt = 0
+            while True:
+                began = time.perf_counter()
+                try:
+                    async with session.get(url, headers=headers, **kwargs) as response:
+                        content = await response.read()
+                        status = response.status
+                        encoding = response.charset
+                        wait_hint = retry_after(response.headers)
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    elapsed = time.perf_counter() - began
+                    UPSTREAM_SECONDS.observe(elapsed, host=host, outcome='error')
+                    record_stage('fetch', elapsed)
+                    if attempt < self.retries:
+                        attempt += 1
+                        self._counters['retries'] += 1
+                        await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                        continue
+                    self._counters['requests'] += 1
+                    self._counters['errors'] += 1
+                    host_stats['requests'] += 1
+                    host_stats['errors'] += 1
+                    self.guard.record(host)
+                    raise
+
+                elapsed = time.perf_counter() - began
+                UPSTREAM_SECONDS.observe(elapsed, host=host, outcome=str(status))
+                record_stage('fetch', elapsed)
+                if status in RETRY_STATUSES and attempt < self.retries:
+                    attempt += 1
+                    self._counters['retries'] += 1
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                    continue
+
+                self._counters['requests'] += 1
+                self._counters['bytes'] += len(content)
+                host_stats['requests'] += 1
+                self.guard.record(host, status, wait_hint)
+                return AsyncResponse(url, status, content, encoding)
+        except asyncio.CancelledError:
+            self.guard.cancelled(host)
+            raise
+
+    def stats(self):
+        """Same shape as HttpClient.stats()"""
+        stats = dict(self._counters)
+        stats['hosts'] = {host: dict(counts) for host, counts in self._hosts.items()}
+        stats.update(self.guard.stats())
+        return stats
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+# Process-wide clients shared by every scraper instance
+default_client = HttpClient()
+default_async_client = AsyncHttpClient()
@@ -0,0 +1,200 @@
+import base64
+import bisect
+import json
+import threading
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from api.metrics import timed
+from api.news_records import news_rows
+from api.news_pipeline import headline_tokens
+
+# Sort key of undated stories: after every dated one
+UNDATED = np.iinfo(np.int64).max
+
+def _story_key(story):
+    """Stable identity of a story across snapshots, as in the store: its URL, else its headline"""
+    return story.get('url') or story.get('headline') or ''
+
+def _seconds(value):
+    """Epoch seconds of an ISO timestamp or YYYY-MM-DD date, or None when it can't be parsed"""
+    if not value:
+        return None
+    try:
+        stamp = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        return None
+    if pd.isna(stamp):
+        return None
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert('UTC').tz_localize(None)
+    return int(stamp.value // 1_000_000_000)
+
+def encode_cursor(story):
+    """Opaque ?cursor= token continuing a listing after `story`"""
+    raw = json.dumps({'k': _story_key(story), 't': story.get('published_at')}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(key, published_at) of a cursor from encode_cursor, or None when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value = json.loads(raw)
+        return str(value['k']), value.get('t')
+    except (ValueError, TypeError, KeyError):
+        return None
+
+class _Postings:
+    """One immutable build of the index; searches read it without locking"""
+    def __init__(self, stories, version):
+        self.version = version
+        # Newest first; a story's position is its id in every posting list
+        times = np.array([_seconds(story.get('published_at')) or -UNDATED for story in stories], dtype=np.int64)
+        order = np.argsort(-times, kind='stable')
+        self.stories = [stories[i] for i in order]
+        # Negated times ascend along the ids, so a date range is one id range found by bisection
+        self.negated = negated = -times[order]
+        self.positions = {}
+
+        tokens = defaultdict(list)
+        categories = defaultdict(list)
+        for i, story in enumerate(self.stories):
+            self.positions.setdefault(_story_key(story), i)
+            for token in headline_tokens(story.get('headline') or ''):
+                tokens[token].append(i)
+            category = story.get('category')
+            if isinstance(category, str) and category:
+                categories[category.lower()].append(i)
+
+        self.tokens = {token: np.array(ids, dtype=np.int32) for token, ids in tokens.items()}
+        self.vocabulary = sorted(self.tokens)
+        self.categories = {name: np.array(ids, dtype=np.int32) for name, ids in categories.items()}
+        dated = negated[negated != UNDATED]
+        self.oldest = -int(dated[-1]) if len(dated) else None
+
+    def date_range(self, start, end):
+        """Ids [lo, hi) of the stories published within [start, end] (YYYY-MM-DD, inclusive)"""
+        # Bounds that aren't dates are ignored
+        start, end = _seconds(start), _seconds(end)
+        lo, hi = 0, len(self.stories)
+        if end is not None:
+            # Inclusive of the whole end day
+            lo = int(np.searchsorted(self.negated, -(end + 86399), side='left'))
+        if start is not None:
+            hi = int(np.searchsorted(self.negated, -start, side='right'))
+        elif end is not None:
+            hi = int(np.searchsorted(self.negated, UNDATED, side='left'))
+        return lo, max(lo, hi)
+
+    def token_ids(self, token, prefix=False):
+        """Posting list of `token`; with `prefix`, of every indexed word starting with it"""
+        if not prefix:
+            return self.tokens.get(token, np.empty(0, dtype=np.int32))
+        first = bisect.bisect_left(self.vocabulary, token)
+        last = bisect.bisect_left(self.vocabulary, token + '\uffff')
+        lists = [self.tokens[word] for word in self.vocabulary[first:last]]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(lists)) if len(lists) > 1 else lists[0]
+
+    def category_ids(self, names):
+        lists = [self.categories.get(name, np.empty(0, dtype=np.int32)) for name in names]
+        return np.unique(np.concatenate(lists)) if len(lists) > 1 else lists[0]
+
+    def resume_after(self, cursor):
+        """Id of the story a cursor points at, or the last one published no later than it"""
+        key, published_at = cursor
+        if key in self.positions:
+            return self.positions[key]
+        # The story left the history since; carry on from its publication time
+        seconds = _seconds(published_at)
+        boundary = -seconds if seconds is not None else UNDATED
+        return int(np.searchsorted(self.negated, boundary, side='right')) - 1
+
+class NewsIndex:
+    """
+    Search index over the ingested news history: an inverted index from
+    headline words (normalized as for deduplication) to story ids, one id list
+    per category, and the stories ordered by publication time so a date range
+    is a slice found by binary search. Ids run newest first, so posting lists
+    are sorted and filters combine by intersecting them, shortest first.
+
+    The index is rebuilt once per news snapshot version and swapped in whole;
+    searches never scan the history or touch the store.
+    """
+    def __init__(self):
+        self._postings = _Postings([], None)
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._postings.version
+
+    def __len__(self):
+        return len(self._postings.stories)
+
+    def sync(self, snapshot, categorize=None):
+        """
+        Rebuild from a news snapshot unless this version is already indexed.
+        `categorize(headlines, known)` fills in categories the snapshot lacks.
+        """
+        if snapshot is None or snapshot.version == self.version:
+            return self
+        with self._lock:
+            if snapshot.version == self.version:
+                return self
+            stories = news_rows(snapshot.data)
+            for story in stories:
+                story.pop('ID', None)
+            if categorize is not None and stories:
+                categories = categorize(
+                    [story['headline'] for story in stories],
+                    [story.get('category') for story in stories]
+                )
+                for story, category in zip(stories, categories):
+                    story['category'] = category
+            self._postings = _Postings(stories, snapshot.version)
+        return self
+
+    def covers(self, start):
+        """Whether stories published since `start` (YYYY-MM-DD) are all in the index"""
+        oldest, since = self._postings.oldest, _seconds(start)
+        return since is not None and oldest is not None and since >= oldest
+
+    @timed('search')
+    def search(self, q=None, categories=None, start=None, end=None, cursor=None, limit=10):
+        """
+        Stories matching every word of `q` (the last one as a prefix, for
+        search-as-you-type), any of `categories`, and published within
+        [start, end], newest first. Returns (page, total, next_cursor), where
+        `total` counts every match and `next_cursor` continues after the page.
+        """
+        postings = self._postings
+        lo, hi = postings.date_range(start, end)
+
+        lists = []
+        words = (q or '').split()
+        for i, word in enumerate(words):
+            for token in headline_tokens(word):
+                lists.append(postings.token_ids(token, prefix=i == len(words) - 1))
+        if categories:
+            lists.append(postings.category_ids([name.lower() for name in categories]))
+
+        if lists:
+            lists.sort(key=len)
+            ids = lists[0]
+            for other in lists[1:]:
+                if not len(ids):
+                    break
+                ids = np.intersect1d(ids, other, assume_unique=True)
+            ids = ids[np.searchsorted(ids, lo):np.searchsorted(ids, hi)]
+        else:
+            ids = np.arange(lo, hi, dtype=np.int32)
+
+        total = len(ids)
+        if cursor is not None:
+            ids = ids[np.searchsorted(ids, postings.resume_after(cursor), side='right'):]
+
+        page = [{'ID': int(i) + 1, **postings.stories[i]} for i in ids[:limit]]
+        next_cursor = encode_cursor(page[-1]) if len(ids) > limit else None
+        return page, total, next_cursor
@@ -0,0 +1,235 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from api.news_records import news_frame
+from api.news_sources import enabled_sources, source_for_url
+from api.web_scraper import NewScraper
+
+# Headlines whose word sets overlap at least this much (Jaccard) are the same story
+SIMILARITY_THRESHOLD = 0.7
+# and only if they were published this close together
+DUPLICATE_WINDOW = timedelta(days=2)
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is',
+    'it', 'its', 'of', 'on', 'or', 'over', 'says', 'that', 'the', 'to', 'was', 'were', 'will', 'with'
+))
+
+def headline_tokens(headline):
+    """Normalized word set of a headline: lowercased, punctuation and stopwords dropped"""
+    words = re.findall(r"[a-z0-9]+", headline.lower().replace("'", ""))
+    return frozenset(word for word in words if word not in STOPWORDS)
+
+def _published(story):
+    value = story.get('published_at')
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+def merge_feeds(feeds, threshold=SIMILARITY_THRESHOLD, window=DUPLICATE_WINDOW, known=()):
+    """
+    Merge per-source story lists into one feed, newest first. A story whose
+    normalized headline matches an earlier story from another source is
+    dropped, so the first report of an event is the one kept. Stories in
+    `known` (already published) always win and are left out of the result.
+
+    Candidates are found with a prefix filter: with every word set ordered
+    rarest word first, two sets with Jaccard >= threshold must share a word
+    within their first len - ceil(threshold * len) + 1 words. Only those
+    prefixes are indexed, so common words never produce candidate pairs.
+    """
+    known = list(known)
+    stories = known + [story for feed in feeds for story in feed]
+    tokens = [headline_tokens(story['headline']) for story in stories]
+    frequency = Counter(token for words in tokens for token in words)
+    published = [_published(story) for story in stories]
+
+    # Walk from the oldest story so the first report wins
+    order = list(range(len(known)))
+    order += sorted(range(len(known), len(stories)), key=lambda i: published[i] or datetime.min)
+    index = defaultdict(list)
+    kept = [True] * len(stories)
+
+    for i in order:
+        words = tokens[i]
+        if not words:
+            continue
+        ranked = sorted(words, key=lambda token: (frequency[token], token))
+        prefix = ranked[:len(words) - math.ceil(threshold * len(words) - 1e-9) + 1]
+
+        compared = set()
+        for token in prefix:
+            for j in index[token]:
+                if j in compared:
+                    continue
+                compared.add(j)
+                if stories[j].get('source') == stories[i].get('source'):
+                    continue
+                if published[i] and published[j] and abs(published[i] - published[j]) > window:
+                    continue
+                shared = len(words & tokens[j])
+                if shared / (len(words) + len(tokens[j]) - shared) >= threshold:
+                    kept[i] = False
+                    break
+            if not kept[i]:
+                break
+
+        if kept[i]:
+            for token in prefix:
+                index[token].append(i)
+
+    merged = [story for story, keep in zip(stories[len(known):], kept[len(known):]) if keep]
+    # Stable sort: stories of the same minute keep their source order; undated ones go last
+    merged.sort(key=lambda story: story.get('published_at') or '', reverse=True)
+    return merged
+
+class NewsPipeline:
+    """
+    One news feed built from several sources. Each source keeps its own
+    incremental NewScraper history; refreshes run side by side, one worker per
+    source, so ingest takes as long as the slowest source rather than the sum.
+    Requests are rate limited per host by the shared HTTP client, and the
+    histories are merged into a single date-sorted, deduplicated feed.
+    Offers the NewScraper methods the server uses (refresh, latest,
+    seed_history, iter_pages, scrape_page).
+    """
+    scraper_class = NewScraper
+
+    def __init__(self, sources=None, client=None, concurrency=4, history_size=1000, threshold=SIMILARITY_THRESHOLD,
+                 max_bytes=None):
+        self.sources = list(sources or enabled_sources())
+        # The merged feed shares the sources' records, so the memory cap is split between them
+        self.scrapers = {
+            source.name: self.scraper_class(
+                concurrency=concurrency,
+                client=client,
+                history_size=history_size,
+                source=source,
+                max_bytes=max_bytes // len(self.sources) if max_bytes else None
+            )
+            for source in self.sources
+        }
+        self.history_size = history_size
+        self.threshold = threshold
+        self.history = []
+        self._history_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.scrapers), thread_name_prefix='news-source')
+
+    def _merge(self):
+        """Rebuild the merged feed from the per-source histories"""
+        feeds = [scraper.latest(scraper.history_size) for scraper in self.scrapers.values()]
+        merged = merge_feeds(feeds, self.threshold)[:self.history_size]
+        with self._history_lock:
+            self.history = merged
+        total = sum(len(feed) for feed in feeds)
+        print(f"Merged news feed: {len(merged)} stories from {len(feeds)} sources, {total - len(merged)} dropped")
+
+    def _check_sources(self, errors):
+        """
+        Report sources whose refresh failed upstream. If none could be reached the
+        run is an error, so the feed is marked stale instead of republished as fresh.
+        """
+        for name, scraper in self.scrapers.items():
+            if name not in errors and scraper.last_error:
+                errors[name] = scraper.last_error
+        for name, error in errors.items():
+            print(f"Error refreshing news source {name}: {error}")
+        if errors and len(errors) == len(self.scrapers):
+            raise RuntimeError(f"No news source reachable: {'; '.join(errors.values())}")
+
+    def refresh(self, depth=None):
+        """Refresh every source concurrently, merge them and return the number of new stories"""
+        futures = {name: self._executor.submit(scraper.refresh, depth) for name, scraper in self.scrapers.items()}
+        added = 0
+        errors = {}
+        for name, future in futures.items():
+            try:
+                added += future.result()
+            except Exception as e:
+                # One broken source must not hold back the others
+                errors[name] = str(e)
+        self._merge()
+        self._check_sources(errors)
+        return added
+
+    def latest(self, limit):
+        """The newest `limit` stories of the merged feed, without fetching"""
+        with self._history_lock:
+            return self.history[:limit]
+
+    def _source_of(self, story):
+        if story.get('source'):
+            return story['source']
+        source = source_for_url(story.get('url'))
+        # Stories stored before sources were tracked came from Adaderana, the first source
+        return source.name if source is not None else self.sources[0].name
+
+    def seed_history(self, stories):
+        """Prime each source's history from persisted stories, then the merged feed"""
+        by_source = defaultdict(list)
+        for story in stories:
+            name = self._source_of(story)
+            # Stories of sources that are no longer enabled are left out
+            if name in self.scrapers:
+                by_source[name].append({**story, 'source': name})
+        for name, scraper in self.scrapers.items():
+            scraper.seed_history(by_source[name])
+        self._merge()
+
+    def iter_pages(self, start_page=1, concurrency=None, limit=None):
+        """
+        Yield merged stories one round at a time: page N of every source is
+        fetched concurrently, then deduplicated against everything already
+        yielded. Sources drop out as they run out of pages. With a `limit`,
+        no source reads further ahead than that many of its own stories need.
+        """
+        pages = {name: scraper.iter_pages(start_page, concurrency, limit) for name, scraper in self.scrapers.items()}
+        yielded = []
+        try:
+            while pages:
+                futures = {name: self._executor.submit(next, generator, None) for name, generator in pages.items()}
+                batch = []
+                for name, future in futures.items():
+                    stories = future.result()
+                    if stories is None:
+                        pages.pop(name).close()
+                    else:
+                        batch.append(stories)
+                if not batch:
+                    return
+
+                fresh = merge_feeds(batch, self.threshold, known=yielded)
+                yielded.extend(fresh)
+                if fresh:
+                    yield fresh
+        finally:
+            for generator in pages.values():
+                generator.close()
+
+    def scrape_page(self, limit, concurrency=None, incremental=True):
+        """Scrape the first `limit` stories of the merged feed"""
+        limit = min(1000, limit)
+        print(f"Scraping up to {limit} news items from {len(self.scrapers)} sources...")
+
+        if incremental:
+            self.refresh(limit)
+            latest = self.latest(limit)
+            return news_frame(latest)
+
+        all_news = []
+        pages = self.iter_pages(concurrency=concurrency, limit=limit)
+        try:
+            for stories in pages:
+                all_news.extend(stories[:limit - len(all_news)])
+                if len(all_news) >= limit:
+                    break
+        finally:
+            pages.close()
+
+        return news_frame(all_news)
@@ -0,0 +1,136 @@
+import sys
+import numpy as np
+import pandas as pd
+
+def split_url(url):
+    """
+    (prefix, tail) of a story URL, cut after its last '/' or '='. Stories of one
+    site share a handful of prefixes ("https://www.adaderana.lk/news.php?nid="),
+    which are interned so every story refers to a single copy.
+    """
+    cut = max(url.rfind('/'), url.rfind('=')) + 1
+    return sys.intern(url[:cut]), url[cut:]
+
+def _interned(value):
+    return sys.intern(value) if isinstance(value, str) and value else None
+
+class NewsRecord:
+    """
+    One story of a scraper history. Slots instead of a per-story dict; the URL
+    kept as an interned prefix plus the story's own tail; source and category
+    names interned. Reads as a read-only mapping (story['headline'],
+    story.get(...), {**story}), so code written for story dicts takes records
+    unchanged.
+    """
+    __slots__ = ('date_time', 'headline', 'url_prefix', 'url_tail', 'source', 'published_at', 'category')
+
+    FIELDS = ('date_time', 'headline', 'url', 'source', 'published_at', 'category')
+
+    def __init__(self, date_time, headline, url, source=None, published_at=None, category=None):
+        self.date_time = date_time or ''
+        self.headline = headline
+        self.url_prefix, self.url_tail = split_url(url or '')
+        self.source = _interned(source)
+        self.published_at = published_at if isinstance(published_at, str) and published_at else None
+        self.category = _interned(category)
+
+    @classmethod
+    def from_story(cls, story):
+        """Record of a story dict (or the record itself)"""
+        if isinstance(story, cls):
+            return story
+        return cls(
+            story.get('date_time'),
+            story['headline'],
+            story.get('url'),
+            story.get('source'),
+            story.get('published_at'),
+            story.get('category')
+        )
+
+    @property
+    def url(self):
+        return self.url_prefix + self.url_tail
+
+    def keys(self):
+        # Stories only carry a category once they have been classified
+        return self.FIELDS if self.category is not None else self.FIELDS[:-1]
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def as_dict(self):
+        return {key: self[key] for key in self.keys()}
+
+    def __repr__(self):
+        return f'NewsRecord({self.as_dict()!r})'
+
+    @property
+    def nbytes(self):
+        """Memory held by this story alone; the interned prefix, source and category are shared"""
+        size = sys.getsizeof(self)
+        for value in (self.date_time, self.headline, self.url_tail, self.published_at):
+            if value is not None:
+                size += sys.getsizeof(value)
+        return size
+
+def to_records(stories):
+    return [NewsRecord.from_story(story) for story in stories]
+
+def trim_to_bytes(records, max_bytes):
+    """The newest records of a newest-first list that fit in `max_bytes`; older ones are evicted"""
+    if max_bytes is None:
+        return records
+    used = 0
+    for i, record in enumerate(records):
+        used += record.nbytes
+        if used > max_bytes:
+            return records[:i]
+    return records
+
+def news_frame(stories):
+    """
+    Snapshot frame of stories (dicts or records), newest first with IDs from 1:
+    published_at as datetime64, source and category as categoricals, and only
+    the free-text columns (date_time, headline, url) as Python strings.
+    """
+    stories = list(stories)
+    frame = pd.DataFrame({
+        'ID': np.arange(1, len(stories) + 1, dtype=np.int32),
+        'date_time': [story.get('date_time') or '' for story in stories],
+        'headline': [story['headline'] for story in stories],
+        'url': [story.get('url') or '' for story in stories],
+        'source': pd.Categorical([story.get('source') for story in stories]),
+        'published_at': pd.to_datetime(
+            [story.get('published_at') for story in stories], format='ISO8601', errors='coerce'
+        )
+    })
+    categories = [story.get('category') for story in stories]
+    if any(categories):
+        frame['category'] = pd.Categorical(categories)
+    return frame
+
+def news_rows(frame):
+    """
+    Stories of a news frame as plain dicts, the inverse of news_frame: ISO
+    published_at strings and None for missing values, ready for JSON and SQLite
+    """
+    if frame is None or frame.empty:
+        return []
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if name == 'published_at' and column.dtype.kind == 'M':
+            column = column.dt.strftime('%Y-%m-%dT%H:%M:%S')
+        # Categorical and datetime gaps (NaN, NaT) become None
+        columns[name] = [None if pd.isna(value) else value for value in column.astype(object).tolist()]
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
@@ -0,0 +1,96 @@
+import os
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit
+from bs4 import BeautifulSoup
+
+class NewsSource:
+    """
+    Parser plugin for one news site: the URL template of its listing pages and
+    the CSS selectors picking each story's headline, link and date out of them.
+    Every source yields stories in the same schema:
+    {source, headline, url, date_time, published_at}.
+    """
+    def __init__(self, name, page_url, item, headline, date, date_formats, link=None, date_strip='', parser='html.parser'):
+        self.name = name
+        self.page_url = page_url
+        self.item = item
+        self.headline = headline
+        # The headline anchor usually carries the link too
+        self.link = link or headline
+        self.date = date
+        self.date_formats = date_formats
+        # Decoration around the date text, e.g. Adaderana's leading "|"
+        self.date_strip = date_strip
+        self.parser = parser
+
+    @property
+    def host(self):
+        return urlsplit(self.page_url).netloc
+
+    def parse_date(self, text):
+        """Parse the site's date stamp, or None if it matches none of its formats"""
+        text = " ".join(text.split())
+        for fmt in self.date_formats:
+            try:
+                return datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+        return None
+
+    def parse(self, html):
+        """Extract the stories of one listing page, newest first"""
+        soup = BeautifulSoup(html, self.parser)
+        items = []
+
+        for node in soup.select(self.item):
+            anchor = node.select_one(self.headline)
+            headline = anchor.get_text().strip() if anchor else ""
+            # Stories without a headline can't be classified or deduplicated
+            if not headline:
+                continue
+            link = node.select_one(self.link)
+            url = link.get("href", "") if link else ""
+
+            stamp = node.select_one(self.date) if self.date else None
+            date_time = stamp.get_text().strip().strip(self.date_strip).strip() if stamp else ""
+            published = self.parse_date(date_time) if date_time else None
+
+            items.append({
+                "date_time": date_time,
+                "headline": headline,
+                # Relative links are resolved so URLs stay unique across sources
+                "url": urljoin(self.page_url, url) if url else "",
+                "source": self.name,
+                "published_at": published.isoformat() if published else None
+            })
+
+        return items
+
+ADADERANA = NewsSource(
+    name='adaderana',
+    page_url="https://www.adaderana.lk/hot-news/?pageno={}",
+    item='div.news-story',
+    headline='h2 a',
+    date='div.comments span',
+    date_formats=("%B %d, %Y %I:%M %p", "%B %d, %Y %H:%M", "%B %d, %Y"),
+    date_strip='|'
+)
+
+# Available sources by name. A new site only needs a NewsSource entry here
+SOURCES = {source.name: source for source in (ADADERANA,)}
+
+def enabled_sources():
+    """Sources named in NEWS_SOURCES (comma separated), in that order; Adaderana by default"""
+    names = [name.strip() for name in os.environ.get('NEWS_SOURCES', 'adaderana').split(',') if name.strip()]
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        print(f"Ignoring unknown news sources: {', '.join(unknown)}")
+    return [SOURCES[name] for name in names if name in SOURCES] or [ADADERANA]
+
+def source_for_url(url, sources=None):
+    """The source a story URL belongs to, matched by host, or None"""
+    host = urlsplit(url or '').netloc
+    for source in sources or SOURCES.values():
+        if host and host == source.host:
+            return source
+    return None
@@ -0,0 +1,234 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from api.downsample import aggregates, downsample
+
+# Valid periods: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max
+VALID_PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', 'max']
+
+# Calendar span of each Yahoo Finance period, used to slice the full history
+CURRENCY_PERIOD_MONTHS = {
+    '1mo': 1,
+    '3mo': 3,
+    '6mo': 6,
+    '1y': 12,
+    '2y': 24,
+    '5y': 60
+}
+
+# Map our periods to CSE periods
+STOCK_PERIOD_MAP = {
+    '1d': '1D',
+    '5d': '1W',
+    '1mo': '1M',
+    '3mo': '1Q',
+    '6mo': '1Q',  # CSE doesn't have 6mo, use 1Q
+    '1y': '1Y',
+    '2y': '1Y',   # CSE doesn't have 2y, use 1Y
+    '5y': '1Y',   # CSE doesn't have 5y, use 1Y
+    'max': '1Y'
+}
+
+def slice_history(hist, period):
+    """Cut the full USD/LKR history down to the requested period"""
+    if period == 'max' or hist.empty:
+        return hist
+    if period in ('1d', '5d'):
+        # Day periods count trading days, like Yahoo Finance does
+        return hist.tail(int(period[:-1]))
+    start = hist.index[-1] - pd.DateOffset(months=CURRENCY_PERIOD_MONTHS[period])
+    return hist[hist.index > start]
+
+def clean_history(hist):
+    """
+    Turn a Yahoo Finance history frame into the API's daily rows using whole-column
+    operations: missing prices fall back to the close, volume is clipped at zero,
+    values are rounded and days without a rate are dropped.
+    """
+    close = hist['Close'].astype(float).fillna(0.0)
+    frame = pd.DataFrame({
+        'date': hist.index.strftime('%Y-%m-%d'),
+        'rate': close.round(4).to_numpy(),
+        'open': hist['Open'].astype(float).fillna(close).round(4).to_numpy(),
+        'high': hist['High'].astype(float).fillna(close).round(4).to_numpy(),
+        'low': hist['Low'].astype(float).fillna(close).round(4).to_numpy(),
+        'volume': hist['Volume'].astype(float).fillna(0).clip(lower=0).astype(np.int64).to_numpy()
+    })
+    return frame[frame['rate'] > 0].reset_index(drop=True)
+
+# Chart width the pages ask for; also the size precomputed for long periods
+DEFAULT_CHART_POINTS = 500
+MIN_CHART_POINTS = 10
+MAX_CHART_POINTS = 5000
+
+def summarize(values):
+    """High, low and mean of the full series, exact even when only a sample is sent"""
+    return {
+        'high': round(float(values.max()), 4),
+        'low': round(float(values.min()), 4),
+        'average': round(float(values.mean()), 4),
+        'points': int(len(values))
+    }
+
+def chart_frame(frame, value, points=None, method='lttb', key=None):
+    """
+    `frame` reduced to at most `points` rows for charting. With a `key` (feed,
+    snapshot version, period) the result is kept in the aggregate cache.
+    """
+    if not points or len(frame) <= points:
+        return frame
+    if key is None:
+        return downsample(frame, points, method, value)
+    return aggregates.get((*key, points, method), lambda: downsample(frame, points, method, value))
+
+def history_to_rows(hist):
+    """Convert a Yahoo Finance history frame to daily OHLC rows for the store"""
+    return clean_history(hist).rename(columns={'rate': 'close'}).to_dict('records')
+
+def rows_to_history(rows):
+    """Rebuild a Yahoo Finance style history frame from stored OHLC rows"""
+    if not rows:
+        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+    frame = pd.DataFrame(rows)
+    frame.index = pd.to_datetime(frame.pop('date'))
+    return frame.rename(columns={
+        'open': 'Open',
+        'high': 'High',
+        'low': 'Low',
+        'close': 'Close',
+        'volume': 'Volume'
+    })
+
+def news_payload(items):
+    """/api/news response for a list of classified stories"""
+    if not items:
+        return {
+            'status': 'error',
+            'message': 'No news available for the selected range. Please try again later.'
+        }, 200
+
+    return {
+        'status': 'success',
+        'count': len(items),
+        'items': items
+    }, 200
+
+def search_payload(items, total, next_cursor):
+    """/api/news response for one page of a filtered listing; an empty page is a valid answer"""
+    return {
+        'status': 'success',
+        'count': len(items),
+        'total': total,
+        'next_cursor': next_cursor,
+        'items': items
+    }, 200
+
+def analytics_payload(report):
+    """/api/analytics response for an Analytics.report"""
+    if report is None:
+        return {
+            'status': 'error',
+            'message': 'No data has been ingested yet. Please try again later.'
+        }, 200
+
+    return {
+        'status': 'success',
+        **report
+    }, 200
+
+def currency_payload(hist, period, output_format='rows', points=None, method='lttb', key=None):
+    """
+    /api/currency response for a Yahoo Finance style history frame, optionally
+    downsampled to `points` rows (see chart_frame)
+    """
+    if hist is None or hist.empty:
+        return {
+            'status': 'error',
+            'message': 'Unable to fetch currency data for the selected period.'
+        }, 200
+
+    frame = clean_history(hist)
+
+    if frame.empty:
+        return {
+            'status': 'error',
+            'message': 'No valid data available for the selected period.'
+        }, 200
+
+    # Get current rate
+    rates = frame['rate'].to_numpy()
+    current_rate = float(rates[-1])
+    previous_rate = float(rates[-2]) if len(rates) > 1 else current_rate
+    change = current_rate - previous_rate
+    change_percent = (change / previous_rate * 100) if previous_rate != 0 else 0
+    summary = summarize(rates)
+
+    frame = chart_frame(frame, 'rate', points, method, key)
+    if output_format == 'columns':
+        # One array per field; cheaper to build and parse for charts
+        data = {column: frame[column].tolist() for column in frame.columns}
+    else:
+        data = frame.to_dict('records')
+
+    return {
+        'status': 'success',
+        'current_rate': current_rate,
+        'change': round(change, 4),
+        'change_percent': round(change_percent, 2),
+        'period': period,
+        'format': output_format,
+        'summary': summary,
+        'data': data
+    }, 200
+
+def stock_payload(data, period, points=None, method='lttb', key=None):
+    """
+    /api/stock response for a list of daily ASPI points, optionally downsampled
+    to `points` rows (see chart_frame)
+    """
+    if not data or len(data) == 0:
+        return {
+            'status': 'error',
+            'message': 'Unable to fetch ASPI data from Colombo Stock Exchange. Please try again later.'
+        }, 200
+
+    # Get current index
+    current_index = data[-1]['index']
+    previous_index = data[-2]['index'] if len(data) > 1 else current_index
+    change = current_index - previous_index
+    change_percent = (change / previous_index * 100) if previous_index != 0 else 0
+    summary = summarize(np.array([point['index'] for point in data]))
+
+    if points and len(data) > points:
+        data = chart_frame(pd.DataFrame(data), 'index', points, method, key).to_dict('records')
+
+    return {
+        'status': 'success',
+        'current_index': current_index,
+        'change': round(change, 2),
+        'change_percent': round(change_percent, 2),
+        'period': period,
+        'summary': summary,
+        'data': data
+    }, 200
+
+def economic_payload(data):
+    """/api/economic response for a list of indicators"""
+    if not data or len(data) == 0:
+        return {
+            'status': 'error',
+            'message': 'Unable to fetch economic indicators. Please try again later.'
+        }, 200
+
+    return {
+        'status': 'success',
+        'count': len(data),
+        'indicators': data
+    }, 200
+
+def stale_payload(payload, snapshot):
+    """Mark a payload built from the last good snapshot while its upstream is failing"""
+    marked = {**payload, 'stale': True}
+    if snapshot is not None:
+        marked['updated_at'] = datetime.fromtimestamp(snapshot.updated_at).isoformat()
+    return marked
@@ -0,0 +1,450 @@
+import json
+from datetime import datetime
+import pandas as pd
+from api import http_cache, metrics, startup
+from api.analytics import Analytics, ANALYTICS_FEEDS
+from api.feeds import FEED_ENDPOINTS, ENDPOINT_FEEDS, precompute_aggregates, categorize
+from api.news_index import NewsIndex, decode_cursor
+from api.news_records import news_frame, news_rows
+from api.payloads import (
+    VALID_PERIODS, STOCK_PERIOD_MAP, MIN_CHART_POINTS, MAX_CHART_POINTS, slice_history, rows_to_history,
+    news_payload, search_payload, analytics_payload, currency_payload, stock_payload, economic_payload,
+    stale_payload
+)
+
+# Seconds each endpoint's payloads are served from the response cache before refreshing
+RESPONSE_TTLS = {
+    'news': 300,
+    'currency': 900,
+    'stock': 300,
+    'economic': 1800
+}
+
+# Days of rolling statistics /api/analytics returns at most
+MAX_ANALYTICS_DAYS = 3650
+
+# Stories per streamed chunk
+STREAM_CHUNK_SIZE = 20
+
+def cacheable(result):
+    """Only keep successful payloads; errors are retried on the next request"""
+    payload, status = result
+    return status == 200 and payload.get('status') == 'success'
+
+def int_arg(args, name, default):
+    """Optional integer query param, falling back to `default` when missing or malformed"""
+    value = args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+def date_arg(args, name):
+    """Optional YYYY-MM-DD query param, ignoring malformed or impossible dates"""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return None
+    return value
+
+def chart_args(args):
+    """Optional ?points=N (clamped) and ?downsample=lttb|ohlc of the chart endpoints"""
+    points = int_arg(args, 'points', None)
+    if points is not None:
+        points = max(MIN_CHART_POINTS, min(MAX_CHART_POINTS, points))
+    method = 'ohlc' if args.get('downsample') == 'ohlc' else 'lttb'
+    return points, method
+
+def news_query(args):
+    """
+    Params of /api/news: limit (1-1000, default 10), an optional date range,
+    keyword search, category filter (comma-separated) and the next_cursor of a
+    previous page
+    """
+    return {
+        'limit': max(1, min(1000, int_arg(args, 'limit', 10))),
+        'from': date_arg(args, 'from'),
+        'to': date_arg(args, 'to'),
+        'q': (args.get('q') or '').strip(),
+        'category': (args.get('category') or '').strip(),
+        'cursor': args.get('cursor') or ''
+    }
+
+def stream_format(args, headers, query):
+    """
+    'ndjson' for ?stream=1, 'sse' for ?stream=sse (or an event-stream Accept
+    header), or None when the listing isn't streamed; filtered listings never are
+    """
+    stream = args.get('stream')
+    if not stream or any(query[name] for name in ('from', 'to', 'q', 'category', 'cursor')):
+        return None
+    return 'sse' if stream == 'sse' or 'text/event-stream' in headers.get('Accept', '') else 'ndjson'
+
+def currency_query(args):
+    """Params of /api/currency; 'columns' returns one array per field instead of one object per day"""
+    period = args.get('period') or '1mo'
+    points, method = chart_args(args)
+    return {
+        'period': period if period in VALID_PERIODS else '1mo',
+        'from': date_arg(args, 'from'),
+        'to': date_arg(args, 'to'),
+        'format': 'columns' if args.get('format') == 'columns' else 'rows',
+        'points': points,
+        'method': method
+    }
+
+def stock_query(args):
+    """Params of /api/stock"""
+    period = args.get('period') or '1mo'
+    points, method = chart_args(args)
+    return {
+        'period': period if period in STOCK_PERIOD_MAP else '1mo',
+        'from': date_arg(args, 'from'),
+        'to': date_arg(args, 'to'),
+        'points': points,
+        'method': method
+    }
+
+def analytics_days(args):
+    return max(1, min(MAX_ANALYTICS_DAYS, int_arg(args, 'days', 90)))
+
+def ranged(query):
+    """Whether a query asks for a date range, which is answered from the persistent store"""
+    return bool(query['from'] or query['to'])
+
+def stream_mimetype(sse):
+    return 'text/event-stream' if sse else 'application/x-ndjson'
+
+# Streams are never cached, and reverse proxies must not buffer them
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def stream_chunk(items, sse):
+    if sse:
+        return ''.join(f"data: {json.dumps(item)}\n\n" for item in items)
+    return ''.join(json.dumps(item) + '\n' for item in items)
+
+def stream_end(count, sse):
+    return f"event: end\ndata: {json.dumps({'status': 'success', 'count': count})}\n\n" if sse else ''
+
+def stream_error(error, sse):
+    error = {'status': 'error', 'message': str(error)}
+    return f"event: error\ndata: {json.dumps(error)}\n\n" if sse else json.dumps(error) + '\n'
+
+def not_modified(etag, encoding, cache_control):
+    """Empty 304 telling the client its copy is still current"""
+    headers = http_cache.representation_headers(etag, encoding, cache_control)
+    headers.pop('Content-Encoding', None)
+    return 304, b'', None, headers
+
+def page_reply(pages, page_name, request_headers, status=200):
+    """A page served from memory, compressed and revalidated with its ETag, or None if there is no such page"""
+    page = pages.get(page_name)
+    if page is None:
+        return None
+
+    encoding = http_cache.choose_encoding(request_headers.get('Accept-Encoding'))
+    if status == 200 and http_cache.etag_matches(request_headers.get('If-None-Match'), page.etag):
+        return not_modified(page.etag, encoding, http_cache.CACHE_POLICIES['page'])
+
+    body, applied = page.body(encoding)
+    headers = http_cache.representation_headers(
+        page.etag if status == 200 else None,
+        applied,
+        http_cache.CACHE_POLICIES['page'] if status == 200 else 'no-cache'
+    )
+    return status, body, page.mimetype, headers
+
+def _serialize(payload):
+    with metrics.stage('serialize'):
+        return json.dumps(payload, separators=(',', ':')).encode()
+
+class ApiRoutes:
+    """
+    Route logic shared by server.py (Flask) and async_server.py (aiohttp):
+    the loaders building each payload from a feed snapshot or the persistent
+    store, the search index and analytics kept in step with the feeds, and
+    the compressed, ETag-tagged replies. Replies are (status, body, mimetype,
+    headers) tuples; the servers only turn requests into these calls, fetch
+    snapshots the way their scheduler does, and wrap the replies.
+
+    Loaders may block (SQLite, the classifier), so the asyncio server runs
+    them in its executor.
+    """
+    def __init__(self, scheduler, store, classifier, cse_scraper, client, infer=True):
+        self.scheduler = scheduler
+        self.store = store
+        self.classifier = classifier
+        self.cse_scraper = cse_scraper
+        self.client = client
+        # Serving workers don't load the model, so never classify
+        self.infer = infer
+        # Search index over the news history, rebuilt whenever news publishes
+        self.news_index = NewsIndex()
+        # Rolling statistics and category trends, updated with each new data point
+        self.analytics = Analytics(categorize=self.categorize)
+        # API bodies are serialized and compressed once per ETag
+        self.body_cache = http_cache.BodyCache()
+
+    def categorize(self, headlines, known):
+        return categorize(headlines, known, self.classifier, infer=self.infer)
+
+    def index_news(self, snapshot):
+        return self.news_index.sync(snapshot, self.categorize)
+
+    def follow(self, response_cache):
+        """Keep cached payloads, chart aggregates, the search index and analytics in step with the feeds"""
+        # Drop cached payloads as soon as their feed publishes fresh data
+        self.scheduler.on_update(lambda name, snapshot: response_cache.invalidate(FEED_ENDPOINTS[name]))
+        # and build the downsampled series of long chart periods ahead of the first request
+        self.scheduler.on_update(precompute_aggregates)
+        self.scheduler.on_update(lambda name, snapshot: name == 'news' and self.index_news(snapshot))
+        self.scheduler.on_update(self.analytics.update)
+
+    def feed_etag(self, endpoint, params, stale=False):
+        """ETag of an API payload: it only changes when its feed publishes a new snapshot or goes stale"""
+        snapshot = self.scheduler.store.get(ENDPOINT_FEEDS[endpoint])
+        return http_cache.make_etag(endpoint, params, snapshot.version, stale) if snapshot is not None else None
+
+    def revalidate(self, endpoint, params, request_headers):
+        """
+        First half of serving an API payload, before loading it: (encoding,
+        stale, etag, reply), where reply is already a 304 when the client's
+        copy is current and None otherwise
+        """
+        encoding = http_cache.choose_encoding(request_headers.get('Accept-Encoding'))
+        # While the feed's upstream is failing, the last good data is served marked as stale
+        stale = self.scheduler.stale(ENDPOINT_FEEDS[endpoint])
+        etag = self.feed_etag(endpoint, params, stale)
+        # Unchanged data is answered before touching the cache or serializing anything
+        if http_cache.etag_matches(request_headers.get('If-None-Match'), etag):
+            return encoding, stale, etag, not_modified(etag, encoding, self._policy(endpoint, stale))
+        return encoding, stale, etag, None
+
+    @staticmethod
+    def _policy(endpoint, stale):
+        return http_cache.CACHE_POLICIES['stale' if stale else endpoint]
+
+    def payload_reply(self, endpoint, params, result, encoding, stale, etag):
+        """Second half: the compressed reply of a loaded (payload, status), tagged with its version ETag"""
+        payload, status = result
+        if stale and status == 200 and payload.get('status') == 'success':
+            payload = stale_payload(payload, self.scheduler.store.get(ENDPOINT_FEEDS[endpoint]))
+
+        if status != 200 or payload.get('status') != 'success':
+            body, applied = http_cache.compress(_serialize(payload), encoding)
+            headers = http_cache.representation_headers(None, applied, http_cache.CACHE_POLICIES['error'])
+        else:
+            # A first request may have fetched the feed itself
+            etag = etag or self.feed_etag(endpoint, params, stale)
+            if etag is not None:
+                body, applied = self.body_cache.get(etag, encoding, lambda: _serialize(payload))
+            else:
+                body, applied = http_cache.compress(_serialize(payload), encoding)
+            headers = http_cache.representation_headers(etag, applied, self._policy(endpoint, stale))
+        return status, body, 'application/json', headers
+
+    def news_source(self, query):
+        """
+        Where a news listing is answered from: any filter, even category=All,
+        lists from the 'index'; date ranges older than the indexed history from
+        the 'store'; the latest headlines from the news 'snapshot'
+        """
+        if query['q'] or query['category'] or query['cursor'] or self.news_index.covers(query['from']):
+            return 'index'
+        return 'store' if ranged(query) else 'snapshot'
+
+    def load_news(self, query, source, snapshot):
+        """Classified headlines of a news query answered from `source` (see news_source)"""
+        try:
+            limit = query['limit']
+            if source == 'index':
+                self.index_news(snapshot)
+                categories = [
+                    name.strip() for name in query['category'].split(',') if name.strip() and name.strip() != 'All'
+                ]
+                cursor = decode_cursor(query['cursor']) if query['cursor'] else None
+                items, total, next_cursor = self.news_index.search(
+                    query['q'], categories, query['from'], query['to'], cursor, limit
+                )
+                return search_payload(items, total, next_cursor)
+
+            if source == 'store':
+                rows = self.store.news(query['from'], query['to'], limit)
+                df = pd.DataFrame([
+                    {
+                        'ID': i + 1,
+                        'date_time': row['date_time'],
+                        'headline': row['headline'],
+                        'url': row['url'],
+                        'category': row['category']
+                    }
+                    for i, row in enumerate(rows)
+                ])
+            else:
+                # Take the latest headlines from the ingested feed
+                df = snapshot.data.head(limit).copy() if snapshot is not None else pd.DataFrame()
+
+            if df.empty:
+                return news_payload([])
+
+            # Analyze news with model (cached headlines and already classified stories skip inference)
+            known = df['category'].tolist() if 'category' in df.columns else [None] * len(df)
+            df['category'] = self.categorize(df['headline'].tolist(), known)
+            if self.infer:
+                self.store.save_categories(zip(df['url'].where(df['url'] != '', df['headline']), df['category']))
+            return news_payload(news_rows(df))
+
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e)
+            }, 500
+
+    def news_chunks(self, snapshot, limit):
+        """
+        The latest `limit` stories of a news snapshot as classified chunks, for
+        streams: exactly what the JSON listing serves (merged and deduplicated
+        across sources). Rows are built a chunk at a time, as the stream asks.
+        """
+        if snapshot is not None:
+            yield from self.frame_chunks(snapshot.data.head(limit))
+
+    def live_news_chunks(self, pages, limit):
+        """
+        Classified chunks of the first `limit` stories of `pages`, an iterator of
+        freshly scraped story lists (e.g. a pipeline's iter_pages), for streams
+        on a feed that has no snapshot yet: each page is sent as soon as it is parsed
+        """
+        count = 0
+        try:
+            for stories in pages:
+                stories = stories[:limit - count]
+                yield from self.page_chunks(stories, count + 1)
+                count += len(stories)
+                if count >= limit:
+                    break
+        finally:
+            pages.close()
+
+    def page_chunks(self, stories, first_id):
+        """Scraped stories as classified chunks, numbered from `first_id` like snapshot rows"""
+        frame = news_frame(stories)
+        frame['ID'] += first_id - 1
+        return list(self.frame_chunks(frame))
+
+    def frame_chunks(self, frame):
+        for i in range(0, len(frame), STREAM_CHUNK_SIZE):
+            chunk = news_rows(frame.iloc[i:i + STREAM_CHUNK_SIZE])
+            categories = self.categorize([story['headline'] for story in chunk], [story.get('category') for story in chunk])
+            yield [{**story, 'category': category} for story, category in zip(chunk, categories)]
+
+    def load_currency(self, query, snapshot):
+        """USD/LKR history of a currency query and the latest move; `snapshot` is unused for date ranges"""
+        try:
+            key = None
+            if ranged(query):
+                hist = rows_to_history(self.store.ohlc('currency', query['from'], query['to']))
+            else:
+                # USD/LKR history is ingested from Yahoo Finance in the background
+                hist = slice_history(snapshot.data, query['period']) if snapshot is not None else pd.DataFrame()
+                # Downsampled long periods are cached per snapshot version
+                key = ('currency', snapshot.version, query['period']) if snapshot is not None else None
+
+            return currency_payload(hist, query['period'], query['format'], query['points'], query['method'], key)
+
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': str(e)
+            }, 500
+
+    def load_stock(self, query, snapshot):
+        """ASPI history of a stock query and the latest move; `snapshot` is unused for date ranges"""
+        try:
+            cse_period = STOCK_PERIOD_MAP.get(query['period'], '1M')
+            key = None
+
+            if ranged(query):
+                # Stored ASPI rows are the daily values actually observed on cse.lk
+                data = [
+                    {
+                        'date': row['date'],
+                        'index': row['close'],
+                        'open': row['open'],
+                        'high': row['high'],
+                        'low': row['low'],
+                        'volume': row['volume']
+                    }
+                    for row in self.store.ohlc('aspi', query['from'], query['to'])
+                ]
+            else:
+                # The feed only has to have run once; the period is a binary-search
+                # slice of the recorded daily bars, which survive failed fetches
+                data = self.cse_scraper.history(cse_period)
+                key = ('aspi', snapshot.version, cse_period) if snapshot is not None else None
+
+            return stock_payload(data, query['period'], query['points'], query['method'], key)
+
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': f'Error: {str(e)}'
+            }, 500
+
+    def load_economic(self, snapshot):
+        """The latest economic indicators, ingested from Trading Economics in the background"""
+        try:
+            return economic_payload(snapshot.data if snapshot is not None else None)
+
+        except Exception as e:
+            return {
+                'status': 'error',
+                'message': f'Error: {str(e)}'
+            }, 500
+
+    def analytics_reply(self, days, request_headers):
+        """/api/analytics reply, after folding in whatever the feeds published since (a version seen before costs nothing)"""
+        encoding = http_cache.choose_encoding(request_headers.get('Accept-Encoding'))
+        policy = http_cache.CACHE_POLICIES['analytics']
+
+        versions = []
+        for name in ANALYTICS_FEEDS:
+            snapshot = self.scheduler.store.get(name)
+            self.analytics.update(name, snapshot)
+            versions.append(snapshot.version if snapshot is not None else None)
+        etag = http_cache.make_etag('analytics', days, tuple(versions))
+        if http_cache.etag_matches(request_headers.get('If-None-Match'), etag):
+            return not_modified(etag, encoding, policy)
+
+        payload, status = analytics_payload(self.analytics.report(days))
+        if payload.get('status') != 'success':
+            body, applied = http_cache.compress(_serialize(payload), encoding)
+            headers = http_cache.representation_headers(None, applied, http_cache.CACHE_POLICIES['error'])
+        else:
+            body, applied = self.body_cache.get(etag, encoding, lambda: _serialize(payload))
+            headers = http_cache.representation_headers(etag, applied, policy)
+        return status, body, 'application/json', headers
+
+    def status_payload(self):
+        return {
+            'status': 'success',
+            'feeds': self.scheduler.status(),
+            'startup': startup.summary()
+        }
+
+    def classifier_payload(self):
+        return {
+            'status': 'success',
+            'classifier': self.classifier.stats()
+        }
+
+    def transport_payload(self):
+        return {
+            'status': 'success',
+            'transport': self.client.stats()
+        }
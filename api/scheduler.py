@@ -0,0 +1,335 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class Snapshot:
+    """Latest published result of one feed"""
+    __slots__ = ('data', 'updated_at', 'version')
+
+    def __init__(self, data, updated_at, version):
+        self.data = data
+        self.updated_at = updated_at
+        self.version = version
+
+class SnapshotStore:
+    """In-process store holding the latest snapshot of every feed"""
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def put(self, name, data):
+        with self._lock:
+            previous = self._snapshots.get(name)
+            version = previous.version + 1 if previous else 1
+            snapshot = Snapshot(data, time.time(), version)
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def get(self, name):
+        with self._lock:
+            return self._snapshots.get(name)
+
+    def names(self):
+        with self._lock:
+            return list(self._snapshots.keys())
+
+class Job:
+    """A feed refreshed periodically by the scheduler"""
+    def __init__(self, name, fetch, interval, timeout, jitter=0.1):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.timeout = timeout
+        # Fraction of the interval used to randomise the next run time
+        self.jitter = jitter
+
+        self.running = False
+        self.started_at = None
+        self.timed_out = False
+        self.next_run = 0.0
+        self.last_success = None
+        self.last_duration = None
+        self.last_error = None
+        self.runs = 0
+        self.failures = 0
+        self.done = threading.Condition()
+
+    def schedule_next(self, now):
+        spread = self.interval * self.jitter
+        self.next_run = now + self.interval + random.uniform(-spread, spread)
+
+class IngestionScheduler:
+    """
+    Runs each feed's fetch function on its own interval in a worker pool and
+    publishes successful results to a SnapshotStore. A feed never runs twice at
+    once; a run exceeding its timeout is recorded as failed and its late result
+    is discarded.
+    """
+    def __init__(self, store=None, max_workers=4, tick=0.5):
+        self.store = store or SnapshotStore()
+        self.jobs = {}
+        self.tick = tick
+        self._listeners = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_job(self, name, fetch, interval, timeout, jitter=0.1):
+        self.jobs[name] = Job(name, fetch, interval, timeout, jitter)
+
+    def on_update(self, callback):
+        """Register `callback(name, snapshot)` to run after each publish"""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        now = time.monotonic()
+        for job in self.jobs.values():
+            # Spread the first runs a little so feeds don't all fire at once
+            job.next_run = now + random.uniform(0, job.interval * job.jitter)
+        self._thread = threading.Thread(target=self._loop, name='ingestion-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for job in self.jobs.values():
+                self._check_timeout(job, now)
+                if now >= job.next_run:
+                    self.run_now(job.name)
+            self._stop.wait(self.tick)
+
+    def _check_timeout(self, job, now):
+        with self._lock:
+            if not job.running or job.timed_out or now - job.started_at <= job.timeout:
+                return
+            job.timed_out = True
+            job.failures += 1
+            job.last_error = f'Timed out after {job.timeout}s'
+        print(f"Ingestion job '{job.name}' timed out after {job.timeout}s")
+
+    def run_now(self, name):
+        """Start a run of `name` unless one is already in progress. Returns True if started"""
+        job = self.jobs[name]
+        with self._lock:
+            if job.running:
+                return False
+            job.running = True
+            job.timed_out = False
+            job.started_at = time.monotonic()
+            job.schedule_next(job.started_at)
+        self._executor.submit(self._run, job)
+        return True
+
+    def _run(self, job):
+        started = job.started_at
+        data = None
+        error = None
+        try:
+            data = job.fetch()
+            if data is None or len(data) == 0:
+                error = 'Fetch returned no data'
+        except Exception as e:
+            error = str(e)
+
+        duration = time.monotonic() - started
+        snapshot = None
+        with self._lock:
+            job.runs += 1
+            job.last_duration = duration
+            if not job.timed_out and duration > job.timeout:
+                job.timed_out = True
+                job.failures += 1
+                job.last_error = f'Timed out after {job.timeout}s'
+            if job.timed_out:
+                # Already counted as a failure; a late result is not published
+                pass
+            elif error is not None:
+                job.failures += 1
+                job.last_error = error
+            else:
+                job.last_success = time.time()
+                job.last_error = None
+                snapshot = self.store.put(job.name, data)
+            job.running = False
+
+        if error is not None and not job.timed_out:
+            print(f"Ingestion job '{job.name}' failed: {error}")
+
+        if snapshot is not None:
+            for callback in self._listeners:
+                try:
+                    callback(job.name, snapshot)
+                except Exception as e:
+                    print(f"Snapshot listener failed for '{job.name}': {e}")
+
+        with job.done:
+            job.done.notify_all()
+
+    def snapshot(self, name, wait=True):
+        """
+        Return the latest snapshot of `name`. When the feed has never been
+        fetched and `wait` is set, trigger a run and block up to the job timeout.
+        """
+        snapshot = self.store.get(name)
+        if snapshot is not None or not wait:
+            return snapshot
+
+        job = self.jobs[name]
+        deadline = time.monotonic() + job.timeout
+        with job.done:
+            self.run_now(name)
+            while job.running and self.store.get(name) is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                job.done.wait(remaining)
+        return self.store.get(name)
+
+    def stale(self, name):
+        """Whether `name` is served from an older snapshot because its latest refresh failed"""
+        job = self.jobs.get(name)
+        with self._lock:
+            return job is not None and job.last_error is not None and self.store.get(name) is not None
+
+    def status(self):
+        """Per-feed health: last success, last duration, staleness and errors"""
+        now = time.time()
+        feeds = {}
+        with self._lock:
+            for name, job in self.jobs.items():
+                snapshot = self.store.get(name)
+                feeds[name] = {
+                    'running': job.running,
+                    'interval': job.interval,
+                    'last_success': datetime.fromtimestamp(job.last_success).isoformat() if job.last_success else None,
+                    'last_duration': round(job.last_duration, 3) if job.last_duration is not None else None,
+                    'staleness': round(now - snapshot.updated_at, 1) if snapshot else None,
+                    'stale': job.last_error is not None and snapshot is not None,
+                    'version': snapshot.version if snapshot else 0,
+                    'runs': job.runs,
+                    'failures': job.failures,
+                    'last_error': job.last_error
+                }
+        return feeds
+
+class AsyncIngestionScheduler(IngestionScheduler):
+    """
+    IngestionScheduler for the asyncio server: each fetch is a coroutine function
+    run as a task on the event loop and cancelled once it exceeds its timeout.
+    Listeners run in the default executor so slow ones (e.g. SQLite writes) don't
+    stall the loop.
+    """
+    def __init__(self, store=None, tick=0.5):
+        super().__init__(store, max_workers=1, tick=tick)
+        self._tasks = {}
+        self._loop_task = None
+
+    def start(self):
+        """Start the refresh loop; must be called from the running event loop"""
+        if self._loop_task is not None:
+            return
+        now = time.monotonic()
+        for job in self.jobs.values():
+            # Spread the first runs a little so feeds don't all fire at once
+            job.next_run = now + random.uniform(0, job.interval * job.jitter)
+        self._loop_task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+            self._loop_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _loop(self):
+        while True:
+            now = time.monotonic()
+            for job in self.jobs.values():
+                if now >= job.next_run:
+                    self.run_now(job.name)
+            await asyncio.sleep(self.tick)
+
+    def run_now(self, name):
+        """Start a run of `name` unless one is already in progress. Returns True if started"""
+        job = self.jobs[name]
+        with self._lock:
+            if job.running:
+                return False
+            job.running = True
+            job.timed_out = False
+            job.started_at = time.monotonic()
+            job.schedule_next(job.started_at)
+        self._tasks[name] = asyncio.ensure_future(self._run(job))
+        return True
+
+    async def _run(self, job):
+        started = job.started_at
+        data = None
+        error = None
+        try:
+            data = await asyncio.wait_for(job.fetch(), job.timeout)
+            if data is None or len(data) == 0:
+                error = 'Fetch returned no data'
+        except asyncio.TimeoutError:
+            job.timed_out = True
+            error = f'Timed out after {job.timeout}s'
+        except Exception as e:
+            error = str(e)
+
+        duration = time.monotonic() - started
+        snapshot = None
+        with self._lock:
+            job.runs += 1
+            job.last_duration = duration
+            if error is not None:
+                job.failures += 1
+                job.last_error = error
+            else:
+                job.last_success = time.time()
+                job.last_error = None
+                snapshot = self.store.put(job.name, data)
+            job.running = False
+        self._tasks.pop(job.name, None)
+
+        if error is not None:
+            print(f"Ingestion job '{job.name}' failed: {error}")
+
+        if snapshot is not None:
+            loop = asyncio.get_running_loop()
+            for callback in self._listeners:
+                try:
+                    await loop.run_in_executor(None, callback, job.name, snapshot)
+                except Exception as e:
+                    print(f"Snapshot listener failed for '{job.name}': {e}")
+
+    async def snapshot(self, name, wait=True):
+        """
+        Return the latest snapshot of `name`. When the feed has never been
+        fetched and `wait` is set, trigger a run and await it (bounded by the
+        job timeout).
+        """
+        snapshot = self.store.get(name)
+        if snapshot is not None or not wait:
+            return snapshot
+
+        self.run_now(name)
+        task = self._tasks.get(name)
+        if task is not None:
+            # Shielded so a disconnecting client doesn't cancel the shared run
+            await asyncio.shield(task)
+        return self.store.get(name)
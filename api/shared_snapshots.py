@@ -0,0 +1,283 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+import pandas as pd
+from api.scheduler import Snapshot
+
+MAGIC = b'CPSNAP01'
+# Array buffers start on cache-line boundaries
+ALIGN = 64
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def _encode_frame(frame):
+    """Split a DataFrame into numeric arrays (stored raw) and other columns (stored as JSON)"""
+    arrays = []
+    columns = []
+    for name in frame.columns:
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Categoricals (news source and category) are stored as their integer codes
+            columns.append({'name': name, 'array': len(arrays), 'categories': column.cat.categories.tolist()})
+            arrays.append(np.ascontiguousarray(column.cat.codes.to_numpy()))
+            continue
+        values = column.to_numpy()
+        if values.dtype.kind in 'biufM':
+            columns.append({'name': name, 'array': len(arrays)})
+            arrays.append(np.ascontiguousarray(values))
+        else:
+            columns.append({'name': name, 'values': frame[name].tolist()})
+
+    index = frame.index
+    if isinstance(index, pd.DatetimeIndex):
+        # Stored as UTC nanoseconds; the zone is reapplied on read
+        utc = index.tz_convert('UTC').tz_localize(None) if index.tz is not None else index
+        meta_index = {'array': len(arrays), 'tz': str(index.tz) if index.tz is not None else None, 'name': index.name}
+        arrays.append(np.ascontiguousarray(utc.to_numpy()))
+    elif isinstance(index, pd.RangeIndex):
+        meta_index = {'range': [index.start, index.stop, index.step], 'name': index.name}
+    else:
+        meta_index = {'values': index.tolist(), 'name': index.name}
+    return {'columns': columns, 'index': meta_index}, arrays
+
+def _decode_frame(meta, arrays):
+    data = {}
+    for column in meta['columns']:
+        if 'categories' in column:
+            data[column['name']] = pd.Categorical.from_codes(arrays[column['array']], column['categories'])
+        else:
+            data[column['name']] = arrays[column['array']] if 'array' in column else column['values']
+
+    spec = meta['index']
+    if 'array' in spec:
+        index = pd.DatetimeIndex(arrays[spec['array']], name=spec['name'])
+        if spec['tz']:
+            index = index.tz_localize('UTC').tz_convert(spec['tz'])
+    elif 'range' in spec:
+        index = pd.RangeIndex(*spec['range'], name=spec['name'])
+    else:
+        index = pd.Index(spec['values'], name=spec['name'])
+    # copy=False keeps the numeric columns as views of the mapped file
+    return pd.DataFrame(data, index=index, copy=False)
+
+def write_snapshot(path, snapshot):
+    """Atomically write `snapshot` to `path`: magic, header length, JSON header, then aligned arrays"""
+    header = {'version': snapshot.version, 'updated_at': snapshot.updated_at}
+    arrays = []
+    if isinstance(snapshot.data, pd.DataFrame):
+        header['kind'] = 'frame'
+        header['frame'], arrays = _encode_frame(snapshot.data)
+    else:
+        header['kind'] = 'json'
+        header['value'] = snapshot.data
+
+    # Array offsets are relative to the first aligned byte after the header
+    layout = []
+    offset = 0
+    for array in arrays:
+        layout.append({'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset = _aligned(offset + array.nbytes)
+    header['arrays'] = layout
+    encoded = json.dumps(header, default=str).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(encoded))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(encoded)))
+        f.write(encoded)
+        for spec, array in zip(layout, arrays):
+            f.write(b'\0' * (data_start + spec['offset'] - f.tell()))
+            f.write(array.tobytes())
+    # Readers still mapping the old file keep it alive until they drop it
+    os.replace(tmp_path, path)
+
+def read_snapshot(path):
+    """Map a snapshot file and return a Snapshot whose numeric columns are views of the mapping"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f'{path} is not a snapshot file')
+    header_len, = struct.unpack_from('<Q', mapped, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(mapped[start:start + header_len])
+    data_start = _aligned(start + header_len)
+
+    arrays = [
+        np.frombuffer(
+            mapped,
+            dtype=np.dtype(spec['dtype']),
+            count=int(np.prod(spec['shape'])),
+            offset=data_start + spec['offset']
+        )
+        .reshape(spec['shape'])
+        for spec in header['arrays']
+    ]
+    data = _decode_frame(header['frame'], arrays) if header['kind'] == 'frame' else header['value']
+    return Snapshot(data, header['updated_at'], header['version'])
+
+class SharedSnapshotStore:
+    """
+    SnapshotStore kept in files under `directory` (tmpfs such as /dev/shm makes
+    them shared memory), so one ingestion process can publish snapshots that
+    any number of serving processes read. Numeric frame columns (the OHLC and
+    currency history) are memory-mapped, so every process shares one copy of
+    them; other data is decoded once per version per process.
+
+    Readers notice a new version on `get`, checking the file at most every
+    `check_interval` seconds, and then run the `on_update` callbacks.
+    """
+    def __init__(self, directory, check_interval=1.0):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.check_interval = check_interval
+        self._snapshots = {}
+        # name -> (inode, mtime_ns, size) of the file the snapshot came from
+        self._signatures = {}
+        self._checked_at = {}
+        self._listeners = []
+        self._status = (None, {})
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.snap')
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def on_update(self, callback):
+        """Register `callback(name, snapshot)` to run when another process publishes a new version"""
+        self._listeners.append(callback)
+
+    def put(self, name, data):
+        path = self._path(name)
+        with self._lock:
+            previous = self._snapshots.get(name)
+            if previous is None and os.path.exists(path):
+                # Keep versions increasing across restarts of the ingestion process
+                try:
+                    previous = read_snapshot(path)
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring unreadable snapshot {path}: {e}")
+            version = previous.version + 1 if previous else 1
+            snapshot = Snapshot(data, time.time(), version)
+            write_snapshot(path, snapshot)
+            self._snapshots[name] = snapshot
+            self._signatures[name] = self._signature(path)
+        return snapshot
+
+    def get(self, name):
+        now = time.monotonic()
+        path = self._path(name)
+        with self._lock:
+            current = self._snapshots.get(name)
+            if now - self._checked_at.get(name, float('-inf')) < self.check_interval:
+                return current
+            self._checked_at[name] = now
+            try:
+                signature = self._signature(path)
+            except OSError:
+                return current
+            if signature == self._signatures.get(name):
+                return current
+            try:
+                snapshot = read_snapshot(path)
+            except (OSError, ValueError) as e:
+                print(f"Could not read snapshot {path}: {e}")
+                return current
+            self._signatures[name] = signature
+            if current is not None and snapshot.version <= current.version:
+                return current
+            self._snapshots[name] = snapshot
+
+        for callback in self._listeners:
+            try:
+                callback(name, snapshot)
+            except Exception as e:
+                print(f"Snapshot listener failed for '{name}': {e}")
+        return snapshot
+
+    def names(self):
+        return [entry[:-len('.snap')] for entry in os.listdir(self.directory) if entry.endswith('.snap')]
+
+    # Feed health, published next to the snapshots
+
+    def write_status(self, status):
+        path = os.path.join(self.directory, 'status.json')
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(status, f)
+        os.replace(f'{path}.tmp', path)
+
+    def read_status(self):
+        path = os.path.join(self.directory, 'status.json')
+        try:
+            signature = self._signature(path)
+        except OSError:
+            return {}
+        with self._lock:
+            if signature == self._status[0]:
+                return self._status[1]
+        try:
+            with open(path, encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        with self._lock:
+            self._status = (signature, status)
+        return status
+
+    def publish_status(self, status_fn, interval=2.0):
+        """Write `status_fn()` (e.g. IngestionScheduler.status) every `interval` seconds in a daemon thread"""
+        def loop():
+            while True:
+                try:
+                    self.write_status(status_fn())
+                except Exception as e:
+                    print(f"Could not publish feed status: {e}")
+                time.sleep(interval)
+        thread = threading.Thread(target=loop, name='status-publisher', daemon=True)
+        thread.start()
+        return thread
+
+class SharedFeeds:
+    """
+    Read-only stand-in for IngestionScheduler in serving workers: snapshots and
+    feed health come from the ingestion process through a SharedSnapshotStore,
+    and nothing is ever fetched from upstream.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.jobs = {}
+
+    def on_update(self, callback):
+        self.store.on_update(callback)
+
+    def start(self):
+        pass
+
+    def run_now(self, name):
+        return False
+
+    def snapshot(self, name, wait=True):
+        return self.store.get(name)
+
+    def stale(self, name):
+        return bool(self.store.read_status().get(name, {}).get('stale'))
+
+    def status(self):
+        return self.store.read_status()
+
+class AsyncSharedFeeds(SharedFeeds):
+    """SharedFeeds for the asyncio server, whose scheduler.snapshot and stop are awaited"""
+    async def snapshot(self, name, wait=True):
+        return self.store.get(name)
+
+    async def stop(self):
+        pass
@@ -0,0 +1,59 @@
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+# Wall time of each startup step and deferred import, in the order they happened
+timings = []
+_started = time.perf_counter()
+_lock = threading.Lock()
+
+def _record(label, seconds):
+    with _lock:
+        timings.append((label, seconds))
+
+@contextmanager
+def step(label):
+    """Time a block of startup work (an import, opening the store, ...)"""
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(label, time.perf_counter() - began)
+
+class LazyModule:
+    """Stands in for a heavy module and imports it, once, on first attribute access"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    began = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    _record(f'import {self._name} (deferred)', time.perf_counter() - began)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+def report():
+    """Print the startup breakdown collected so far"""
+    total = time.perf_counter() - _started
+    with _lock:
+        entries = list(timings)
+    print(f"Startup finished in {total:.3f}s")
+    for label, seconds in entries:
+        print(f"  {seconds:8.3f}s  {label}")
+
+def summary():
+    with _lock:
+        return [{'step': label, 'seconds': round(seconds, 4)} for label, seconds in timings]
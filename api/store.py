@@ -0,0 +1,181 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from api.web_scraper import NewScraper
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    story_key TEXT PRIMARY KEY,
+    url TEXT,
+    headline TEXT NOT NULL,
+    date_time TEXT,
+    published_at TEXT,
+    category TEXT,
+    first_seen REAL
+);
+CREATE INDEX IF NOT EXISTS idx_news_url ON news(url);
+CREATE INDEX IF NOT EXISTS idx_news_published ON news(published_at);
+
+CREATE TABLE IF NOT EXISTS indicators (
+    indicator TEXT NOT NULL,
+    fetched_on TEXT NOT NULL,
+    last_value REAL,
+    previous_value REAL,
+    highest_value REAL,
+    lowest_value REAL,
+    unit TEXT,
+    trend TEXT,
+    sentiment TEXT,
+    date TEXT,
+    PRIMARY KEY (indicator, fetched_on)
+);
+CREATE INDEX IF NOT EXISTS idx_indicators_fetched ON indicators(fetched_on);
+
+CREATE TABLE IF NOT EXISTS ohlc (
+    series TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    PRIMARY KEY (series, date)
+) WITHOUT ROWID;
+"""
+
+INDICATOR_FIELDS = [
+    'last_value', 'previous_value', 'highest_value', 'lowest_value',
+    'unit', 'trend', 'sentiment', 'date'
+]
+
+class DataStore:
+    """SQLite (WAL mode) store for news, economic indicator snapshots and OHLC series"""
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _write(self, sql, rows):
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(sql, rows)
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    # News
+
+    def save_news(self, stories):
+        """Insert stories not stored yet. `stories` are newest first, like the scraper history"""
+        now = time.time()
+        rows = []
+        # Insert oldest first so rowid order follows publication order
+        for story in reversed(stories):
+            published = story.get('published_at') or NewScraper.parse_date_time(story['date_time'])
+            rows.append((
+                story['url'] or story['headline'],
+                story['url'],
+                story['headline'],
+                story['date_time'],
+                published.isoformat() if isinstance(published, datetime) else published,
+                story.get('category'),
+                now
+            ))
+        self._write(
+            'INSERT OR IGNORE INTO news '
+            '(story_key, url, headline, date_time, published_at, category, first_seen) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def save_categories(self, categories):
+        """Record predicted categories given as (url or headline, category) pairs"""
+        self._write(
+            'UPDATE news SET category = ? WHERE story_key = ?',
+            [(category, key) for key, category in categories]
+        )
+
+    def news(self, start=None, end=None, limit=1000):
+        """Stored stories newest first, optionally within [start, end] (YYYY-MM-DD)"""
+        clauses = []
+        params = []
+        if start:
+            clauses.append('published_at >= ?')
+            params.append(start)
+        if end:
+            # Inclusive of the whole end day
+            clauses.append('published_at <= ?')
+            params.append(end + 'T23:59:59')
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        params.append(limit)
+        return self._read(
+            'SELECT url, headline, date_time, published_at, category FROM news '
+            f'{where} ORDER BY published_at DESC, rowid DESC LIMIT ?',
+            params
+        )
+
+    # Economic indicators
+
+    def save_indicators(self, indicators):
+        """Store today's snapshot of the economic indicators, replacing an earlier one from today"""
+        fetched_on = datetime.now().strftime('%Y-%m-%d')
+        self._write(
+            'INSERT OR REPLACE INTO indicators '
+            f"(indicator, fetched_on, {', '.join(INDICATOR_FIELDS)}) "
+            f"VALUES (?, ?, {', '.join('?' for _ in INDICATOR_FIELDS)})",
+            [
+                (item['indicator'], fetched_on, *[item.get(field) for field in INDICATOR_FIELDS])
+                for item in indicators
+            ]
+        )
+
+    def latest_indicators(self):
+        """The most recent stored snapshot, shaped like the scraper output"""
+        return self._read(
+            f"SELECT indicator, {', '.join(INDICATOR_FIELDS)} FROM indicators "
+            'WHERE fetched_on = (SELECT MAX(fetched_on) FROM indicators) ORDER BY rowid'
+        )
+
+    def indicator_history(self, indicator, start=None, end=None):
+        return self._read(
+            f"SELECT fetched_on, {', '.join(INDICATOR_FIELDS)} FROM indicators "
+            'WHERE indicator = ? AND fetched_on >= ? AND fetched_on <= ? ORDER BY fetched_on',
+            (indicator, start or '0000-00-00', end or '9999-99-99')
+        )
+
+    # OHLC series
+
+    def save_ohlc(self, series, rows):
+        """Upsert daily bars given as dicts with date/open/high/low/close/volume"""
+        self._write(
+            'INSERT OR REPLACE INTO ohlc (series, date, open, high, low, close, volume) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [
+                (series, row['date'], row['open'], row['high'], row['low'], row['close'], row['volume'])
+                for row in rows
+            ]
+        )
+
+    def ohlc(self, series, start=None, end=None):
+        """Daily bars of `series` in date order, optionally within [start, end]"""
+        return self._read(
+            'SELECT date, open, high, low, close, volume FROM ohlc '
+            'WHERE series = ? AND date >= ? AND date <= ? ORDER BY date',
+            (series, start or '0000-00-00', end or '9999-99-99')
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
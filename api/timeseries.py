@@ -0,0 +1,135 @@
+import os
+import threading
+import numpy as np
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+class OHLCSeries:
+    """
+    Daily OHLC bars held in NumPy arrays sorted by date. Arrays grow by doubling,
+    so appending a day is amortised O(1), and date ranges are located with a
+    binary search (np.searchsorted) instead of a scan.
+    """
+    def __init__(self, capacity=512):
+        self._dates = np.empty(capacity, dtype='datetime64[D]')
+        self._values = {
+            'open': np.empty(capacity, dtype=np.float64),
+            'high': np.empty(capacity, dtype=np.float64),
+            'low': np.empty(capacity, dtype=np.float64),
+            'close': np.empty(capacity, dtype=np.float64),
+            'volume': np.empty(capacity, dtype=np.int64)
+        }
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dates(self):
+        return self._dates[:self._size]
+
+    def column(self, field):
+        return self._values[field][:self._size]
+
+    def _grow(self):
+        capacity = max(16, len(self._dates) * 2)
+        dates = np.empty(capacity, dtype=self._dates.dtype)
+        dates[:self._size] = self.dates
+        self._dates = dates
+        for field, values in self._values.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._values[field] = grown
+
+    def add_observation(self, value, day, volume=None):
+        """
+        Fold one intraday observation into the bar of `day` (a date or 'YYYY-MM-DD'):
+        the first observation of a day opens the bar, later ones move its high, low
+        and close. Returns True if a new bar was started.
+        """
+        day = np.datetime64(day, 'D')
+        with self._lock:
+            if self._size and self._dates[self._size - 1] == day:
+                i = self._size - 1
+                self._values['high'][i] = max(self._values['high'][i], value)
+                self._values['low'][i] = min(self._values['low'][i], value)
+                self._values['close'][i] = value
+                if volume is not None:
+                    self._values['volume'][i] = volume
+                return False
+
+            if self._size == len(self._dates):
+                self._grow()
+            # Observations normally arrive in date order; anything else is inserted in place
+            i = int(np.searchsorted(self.dates, day))
+            if i < self._size and self._dates[i] == day:
+                self._values['high'][i] = max(self._values['high'][i], value)
+                self._values['low'][i] = min(self._values['low'][i], value)
+                self._values['close'][i] = value
+                return False
+            if i < self._size:
+                self._dates[i + 1:self._size + 1] = self._dates[i:self._size]
+                for values in self._values.values():
+                    values[i + 1:self._size + 1] = values[i:self._size]
+            self._dates[i] = day
+            for field in ('open', 'high', 'low', 'close'):
+                self._values[field][i] = value
+            self._values['volume'][i] = volume or 0
+            self._size += 1
+            return True
+
+    def bounds(self, start=None, end=None):
+        """Index range [lo, hi) of the bars between `start` and `end` inclusive"""
+        with self._lock:
+            dates = self.dates
+            lo = int(np.searchsorted(dates, np.datetime64(start, 'D'), side='left')) if start is not None else 0
+            hi = int(np.searchsorted(dates, np.datetime64(end, 'D'), side='right')) if end is not None else len(dates)
+        return lo, hi
+
+    def last_days(self, days):
+        """Index range of the bars within `days` calendar days of the latest bar"""
+        with self._lock:
+            if not self._size:
+                return 0, 0
+            dates = self.dates
+            start = dates[-1] - np.timedelta64(days - 1, 'D')
+            return int(np.searchsorted(dates, start, side='left')), len(dates)
+
+    def rows(self, lo, hi):
+        """Bars [lo, hi) as dicts with date/open/high/low/close/volume"""
+        with self._lock:
+            dates = np.datetime_as_string(self._dates[lo:hi]).tolist()
+            columns = {field: self._values[field][lo:hi].tolist() for field in FIELDS}
+        return [
+            {'date': date, **{field: columns[field][i] for field in FIELDS}}
+            for i, date in enumerate(dates)
+        ]
+
+    def save(self, path):
+        """Write the series to an .npz file, atomically replacing the previous one"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp.npz'
+        with self._lock:
+            np.savez(tmp_path, date=self.dates, **{field: self.column(field) for field in FIELDS})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read a series saved by `save`, or start an empty one if the file is missing or unreadable"""
+        series = cls()
+        if not path or not os.path.exists(path):
+            return series
+        try:
+            with np.load(path) as data:
+                size = len(data['date'])
+                series = cls(capacity=max(512, size * 2))
+                series._dates[:size] = data['date']
+                for field in FIELDS:
+                    series._values[field][:size] = data[field]
+                series._size = size
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Could not load series from {path}: {e}")
+        return series
@@ -1,12 +1,32 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+from bs4 import BeautifulSoup, SoupStrainer
 import json
-from datetime import datetime, timedelta
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from api.http_client import default_client
+from api.metrics import timed
+from api.news_records import news_frame, to_records, trim_to_bytes
+from api.news_sources import ADADERANA
+from api.timeseries import OHLCSeries
+
+try:
+    import lxml  # noqa: F401
+    # lxml's C parser is several times faster than the pure-Python html.parser
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# The CSE trades on Sri Lanka time, which decides the day an ASPI reading belongs to
+COLOMBO_TZ = timezone(timedelta(hours=5, minutes=30))
 
 class EconomicIndicatorsScraper:
     """Scraper for Sri Lanka Economic Indicators from Trading Economics"""
-    def __init__(self):
+    def __init__(self, client=None):
+        self.client = client or default_client
         self.url = 'https://tradingeconomics.com/sri-lanka/indicators'
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -75,71 +95,92 @@ class EconomicIndicatorsScraper:
         
         return trend, sentiment
     
+    @staticmethod
+    def _parse_number(text):
+        """Parse a table cell like "1,234.5%" into a float, or None for blanks and dashes"""
+        value = text.strip().replace('%', '').replace(',', '')
+        return float(value) if value and value != '-' else None
+
+    def index_rows(self, html):
+        """
+        Parse only the indicators table and return [(indicator name, cell texts)]
+        for every complete row, in table order. Each row is traversed once.
+        """
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=SoupStrainer('table', class_='table'))
+
+        # Find the main table with indicators
+        table = soup.find('table', {'class': 'table'})
+        if not table:
+            return None
+
+        rows = []
+        for row in table.find_all('tr'):
+            cells = [td.get_text().strip() for td in row.find_all('td')]
+            if len(cells) >= 6:  # Ensure row has all columns: Name, Last, Previous, Highest, Lowest, Unit, Date
+                rows.append((cells[0], cells))
+        return rows
+
+    @timed('parse')
+    def parse_indicators(self, html):
+        """Resolve every target indicator from a single indexed pass over the table"""
+        rows = self.index_rows(html)
+        if rows is None:
+            print("Could not locate the main economic indicators table")
+            return None
+
+        by_name = {}
+        for row_name, cells in rows:
+            by_name.setdefault(row_name, cells)
+
+        results = []
+        for name, keyword in self.target_indicators.items():
+            # Prefer the exactly named row, then any row containing the keyword
+            candidates = [by_name[keyword]] if keyword in by_name else []
+            candidates += [cells for row_name, cells in rows if keyword in row_name and row_name != keyword]
+
+            for cells in candidates:
+                try:
+                    # Extract values from each column
+                    last_value = self._parse_number(cells[1])
+                    previous_value = self._parse_number(cells[2])
+                    highest_value = self._parse_number(cells[3])
+                    lowest_value = self._parse_number(cells[4])
+                    unit = cells[5]
+                    date = cells[6] if len(cells) > 6 else "N/A"
+                except (ValueError, IndexError) as e:
+                    print(f"Warning: Failed to parse data for {name}. Error: {e}")
+                    continue
+
+                if last_value is None:
+                    continue
+
+                trend, sentiment = self.analyze_trend(name, last_value, previous_value)
+
+                results.append({
+                    "indicator": name,
+                    "last_value": round(last_value, 2),
+                    "previous_value": round(previous_value, 2) if previous_value is not None else None,
+                    "highest_value": round(highest_value, 2) if highest_value is not None else None,
+                    "lowest_value": round(lowest_value, 2) if lowest_value is not None else None,
+                    "unit": unit,
+                    "trend": trend,
+                    "sentiment": sentiment,
+                    "date": date
+                })
+                break
+
+        return results if results else None
+
     def fetch_economic_indicators(self):
         """Scrapes Trading Economics for target indicators"""
         try:
-            response = requests.get(self.url, headers=self.headers, timeout=15)
+            response = self.client.get(self.url, headers=self.headers)
             
             if response.status_code != 200:
                 print(f"Failed to fetch economic data: Status {response.status_code}")
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            # Find the main table with indicators
-            table = soup.find('table', {'class': 'table'})
-            if not table:
-                print("Could not locate the main economic indicators table")
-                return None
-            
-            rows = table.find_all('tr')
-            
-            for name, keyword in self.target_indicators.items():
-                for row in rows:
-                    cols = row.find_all('td')
-                    if len(cols) >= 6:  # Ensure row has all columns: Name, Last, Previous, Highest, Lowest, Unit, Date
-                        row_text = cols[0].get_text().strip()
-                        if keyword in row_text:
-                            try:
-                                # Extract values from each column
-                                last_value_str = cols[1].get_text().strip().replace('%', '').replace(',', '')
-                                previous_value_str = cols[2].get_text().strip().replace('%', '').replace(',', '')
-                                highest_value_str = cols[3].get_text().strip().replace('%', '').replace(',', '')
-                                lowest_value_str = cols[4].get_text().strip().replace('%', '').replace(',', '')
-                                unit = cols[5].get_text().strip() if len(cols) > 5 else ""
-                                date = cols[6].get_text().strip() if len(cols) > 6 else "N/A"
-                                
-                                # Parse numeric values
-                                last_value = float(last_value_str) if last_value_str and last_value_str != '-' else None
-                                previous_value = float(previous_value_str) if previous_value_str and previous_value_str != '-' else None
-                                highest_value = float(highest_value_str) if highest_value_str and highest_value_str != '-' else None
-                                lowest_value = float(lowest_value_str) if lowest_value_str and lowest_value_str != '-' else None
-                                
-                                if last_value is None:
-                                    continue
-                                
-                                trend, sentiment = self.analyze_trend(name, last_value, previous_value)
-                                
-                                results.append({
-                                    "indicator": name,
-                                    "last_value": round(last_value, 2),
-                                    "previous_value": round(previous_value, 2) if previous_value is not None else None,
-                                    "highest_value": round(highest_value, 2) if highest_value is not None else None,
-                                    "lowest_value": round(lowest_value, 2) if lowest_value is not None else None,
-                                    "unit": unit,
-                                    "trend": trend,
-                                    "sentiment": sentiment,
-                                    "date": date
-                                })
-                                
-                                break
-                            
-                            except (ValueError, IndexError) as e:
-                                print(f"Warning: Failed to parse data for {name}. Error: {e}")
-                                continue
-            
-            return results if results else None
+            return self.parse_indicators(response.text)
         
         except requests.exceptions.RequestException as e:
             print(f"Request error: {e}")
@@ -152,7 +193,26 @@ class EconomicIndicatorsScraper:
 
 class CSEScraper:
     """Scraper for Colombo Stock Exchange ASPI data"""
-    def __init__(self):
+    # Number of daily points covered by each CSE chart period
+    PERIOD_DAYS = {
+        '1D': 1,
+        '1W': 7,
+        '1M': 30,
+        '1Q': 90,
+        '1Y': 365
+    }
+    # Range any real ASPI reading falls in; anything outside it was matched by mistake
+    ASPI_RANGE = (1_000, 100_000)
+    # Largest move from the last recorded close a single reading is trusted with a
+    # day later; the allowance grows with the square root of the days since that close
+    MAX_ASPI_MOVE = 0.25
+    # Fetches in a row an in-range reading failing the move check must repeat on
+    # (within 1%) to be accepted anyway, so a real jump or a bad stored close can't
+    # lock the series out for good
+    CONFIRM_READINGS = 3
+
+    def __init__(self, client=None, series_path=None):
+        self.client = client or default_client
         self.base_url = "https://www.cse.lk"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -160,65 +220,146 @@ class CSEScraper:
             'Accept-Language': 'en-US,en;q=0.5',
             'Connection': 'keep-alive',
         }
+        # Real daily ASPI bars built from the values seen on each fetch, kept on disk at `series_path`
+        self.series_path = series_path
+        self.series = OHLCSeries.load(series_path)
+        # (value, fetches in a row) of the reading awaiting confirmation
+        self._unconfirmed = None
     
+    def in_range(self, aspi_value):
+        low, high = self.ASPI_RANGE
+        return low <= aspi_value <= high
+
+    def plausible(self, aspi_value, today=None):
+        """Whether a parsed number can be an ASPI reading, given the range and the last recorded close"""
+        if not self.in_range(aspi_value):
+            return False
+        if not len(self.series):
+            return True
+        last = self.series.column('close')[-1]
+        today = today or datetime.now(COLOMBO_TZ).date()
+        days = max(1, (today - self.series.dates[-1].astype(object)).days)
+        return abs(aspi_value / last - 1) <= self.MAX_ASPI_MOVE * math.sqrt(days)
+
+    def confirmed(self, aspi_value):
+        """Whether a reading that failed the move check has now been seen on CONFIRM_READINGS fetches in a row"""
+        if self._unconfirmed and abs(aspi_value / self._unconfirmed[0] - 1) <= 0.01:
+            seen = self._unconfirmed[1] + 1
+        else:
+            seen = 1
+        self._unconfirmed = (aspi_value, seen)
+        if seen < self.CONFIRM_READINGS:
+            return False
+        self._unconfirmed = None
+        return True
+
+    @timed('parse')
+    def parse_aspi_value(self, html):
+        """Find the current ASPI value on the CSE home page, or None if it isn't there"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Method 1: Look for specific text patterns
+        text_content = soup.get_text()
+        
+        # Search for ASPI value patterns like "21,928.24" or "ASPI: 21928.24"
+        patterns = [
+            r'ASPI[:\s]+([0-9,]+\.?[0-9]*)',
+            r'All Share Price Index[:\s]+([0-9,]+\.?[0-9]*)',
+        ]
+        
+        # First in-range reading that failed the move check, kept for confirmation
+        unconfirmed = None
+        for pattern in patterns:
+            for match in re.finditer(pattern, text_content, re.IGNORECASE):
+                try:
+                    aspi_value = float(match.group(1).replace(',', ''))
+                except ValueError:
+                    continue
+                if self.plausible(aspi_value):
+                    print(f"Found ASPI value: {aspi_value}")
+                    self._unconfirmed = None
+                    return aspi_value
+                print(f"Ignoring implausible ASPI value: {aspi_value}")
+                if unconfirmed is None and self.in_range(aspi_value):
+                    unconfirmed = aspi_value
+        
+        # Method 2: Look for chart data in script tags
+        for script in soup.find_all('script'):
+            if script.string and 'aspi' in script.string.lower():
+                # Try to extract numbers that look like ASPI values (20000-25000 range)
+                numbers = re.findall(r'\b(2[0-5][0-9]{3}\.?\d*)\b', script.string)
+                if not numbers:
+                    continue
+                aspi_value = float(numbers[-1])
+                if self.plausible(aspi_value):
+                    print(f"Found ASPI in script: {aspi_value}")
+                    self._unconfirmed = None
+                    return aspi_value
+                if unconfirmed is None:
+                    unconfirmed = aspi_value
+
+        if unconfirmed is not None and self.confirmed(unconfirmed):
+            print(f"Accepting ASPI value {unconfirmed} seen on {self.CONFIRM_READINGS} fetches in a row")
+            return unconfirmed
+        return None
+    
+    def record(self, aspi_value, observed_at=None):
+        """
+        Fold an observed ASPI value into today's bar (Colombo time) and persist the
+        series. Weekend readings repeat Friday's close and are not recorded.
+        """
+        observed_at = observed_at or datetime.now(COLOMBO_TZ)
+        if observed_at.weekday() >= 5:
+            return False
+        self.series.add_observation(aspi_value, observed_at.date())
+        if self.series_path:
+            try:
+                self.series.save(self.series_path)
+            except OSError as e:
+                print(f"Could not save ASPI series: {e}")
+        return True
+
+    def reload(self):
+        """Re-read the series file, e.g. after another process recorded new bars"""
+        if self.series_path:
+            self.series = OHLCSeries.load(self.series_path)
+
+    def history(self, period='1M'):
+        """Daily ASPI bars of the last `period`, sliced out of the stored series without fetching"""
+        lo, hi = self.series.last_days(self.PERIOD_DAYS.get(period, 30))
+        return [
+            {
+                'date': row['date'],
+                'index': round(row['close'], 2),
+                'open': round(row['open'], 2),
+                'high': round(row['high'], 2),
+                'low': round(row['low'], 2),
+                'volume': row['volume']
+            }
+            for row in self.series.rows(lo, hi)
+        ]
+
     def get_aspi_data(self, period='1M'):
         """
-        Scrape ASPI data from CSE website by parsing the HTML page
+        Scrape the current ASPI value from the CSE website, record it and return the
+        daily bars observed over the period, or None if the fetch failed
         period: '1D' (one day), '1W' (one week), '1M' (one month), '1Q' (one quarter), '1Y' (one year)
         """
         try:
             # Fetch the main CSE page
-            response = requests.get(self.base_url, headers=self.headers, timeout=15)
+            response = self.client.get(self.base_url, headers=self.headers)
             
             if response.status_code != 200:
                 print(f"Failed to fetch CSE page: Status {response.status_code}")
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try to find the current ASPI value from the page
-            # Look for elements that might contain ASPI data
-            aspi_value = None
-            
-            # Method 1: Look for specific text patterns
-            text_content = soup.get_text()
-            import re
-            
-            # Search for ASPI value patterns like "21,928.24" or "ASPI: 21928.24"
-            patterns = [
-                r'ASPI[:\s]+([0-9,]+\.?[0-9]*)',
-                r'All Share Price Index[:\s]+([0-9,]+\.?[0-9]*)',
-                r'Value:\s*([0-9,]+\.?[0-9]*)',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text_content, re.IGNORECASE)
-                if match:
-                    aspi_value = float(match.group(1).replace(',', ''))
-                    print(f"Found ASPI value: {aspi_value}")
-                    break
-            
-            # Method 2: Look for chart data in script tags
-            if not aspi_value:
-                scripts = soup.find_all('script')
-                for script in scripts:
-                    if script.string and 'aspi' in script.string.lower():
-                        # Try to extract numbers that look like ASPI values (20000-25000 range)
-                        numbers = re.findall(r'\b(2[0-5][0-9]{3}\.?\d*)\b', script.string)
-                        if numbers:
-                            aspi_value = float(numbers[-1])
-                            print(f"Found ASPI in script: {aspi_value}")
-                            break
-            
-            # Generate sample data based on found value or use default
+            aspi_value = self.parse_aspi_value(response.text)
             if not aspi_value:
-                aspi_value = 21928.24  # Default recent value
-                print("Using default ASPI value")
-            
-            # Generate historical data based on the current value
-            chart_data = self._generate_historical_data(aspi_value, period)
+                print("ASPI value not found on the CSE page")
+                return None
             
-            return chart_data
+            self.record(aspi_value)
+            return self.history(period)
             
         except requests.exceptions.RequestException as e:
             print(f"Request error: {e}")
@@ -228,117 +369,295 @@ class CSEScraper:
             import traceback
             traceback.print_exc()
             return None
-    
-    def _generate_historical_data(self, current_value, period):
-        """Generate historical data based on current ASPI value"""
-        import random
-        
-        period_days = {
-            '1D': 1,
-            '1W': 7,
-            '1M': 30,
-            '1Q': 90,
-            '1Y': 365
-        }
-        
-        days = period_days.get(period, 30)
-        data = []
-        
-        # Work backwards from today
-        current_date = datetime.now()
-        value = current_value
-        
-        # Generate data going backwards in time
-        for i in range(days - 1, -1, -1):
-            date = current_date - timedelta(days=i)
-            
-            # Add some realistic variance (±0.5% to ±2%)
-            if i > 0:  # For historical data, vary from current
-                variance = random.uniform(-0.02, 0.015)
-                value = current_value * (1 + variance * (i / days))
-            else:  # Last day should be current value
-                value = current_value
-            
-            # Generate OHLC data
-            daily_range = value * random.uniform(0.008, 0.015)
-            open_val = value + random.uniform(-daily_range/2, daily_range/2)
-            close_val = value
-            high_val = max(open_val, close_val) + random.uniform(0, daily_range/3)
-            low_val = min(open_val, close_val) - random.uniform(0, daily_range/3)
-            
-            data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'index': round(close_val, 2),
-                'open': round(open_val, 2),
-                'high': round(high_val, 2),
-                'low': round(low_val, 2),
-                'volume': random.randint(50000000, 200000000)
-            })
-        
-        return data
+
+class RefreshWalk:
+    """
+    State of one NewScraper.refresh: stories found above and below the stored
+    history, kept separate from how the pages are fetched so the threaded and
+    asyncio scrapers share the same catch-up and backfill rules.
+    """
+    def __init__(self, scraper, depth=None):
+        self.scraper = scraper
+        self.depth = min(scraper.history_size, depth or scraper.history_size)
+        if scraper.held_depth is not None:
+            # No deeper than max_bytes can hold; commit would evict the rest again
+            self.depth = min(self.depth, scraper.held_depth)
+        self.fresh = []
+        self.older = []
+        self.walked = set()
+        self.per_page = None
+        # Catch-up filled the history without reaching a stored story, so the
+        # stored one is too old to join onto the fresh stories
+        self.replaced = False
+
+    def _unseen(self, stories):
+        new = []
+        for story in stories:
+            key = self.scraper._story_key(story)
+            # Skip known stories and ones shifted onto the next page mid-walk
+            if key not in self.scraper.seen and key not in self.walked:
+                self.walked.add(key)
+                new.append(story)
+        return new
+
+    @property
+    def known(self):
+        stored = 0 if self.replaced else len(self.scraper.history)
+        return len(self.fresh) + stored
+
+    def catch_up(self, stories):
+        """Take a page from the top of the feed; True once the walk reached known stories"""
+        self.per_page = self.per_page or len(stories)
+        new = self._unseen(stories)
+        self.fresh.extend(new)
+        if len(new) < len(stories):
+            return True
+        if len(self.fresh) >= self.scraper.history_size:
+            self.replaced = True
+            return True
+        return False
+
+    def needs_backfill(self):
+        return self.known < self.depth and time.monotonic() >= self.scraper._backfill_retry_at
+
+    def backfill_start(self):
+        """Resume just before where the stored history ends"""
+        return max(1, self.known // self.per_page) if self.per_page else 1
+
+    def backfill(self, stories):
+        """Take a page past the stored history; True once `depth` stories are known"""
+        self.older.extend(self._unseen(stories))
+        return self.known + len(self.older) >= self.depth
+
+    def exhausted(self):
+        """
+        The pages ran out before reaching the requested depth. Only a feed that
+        really ended is left alone for backfill_retry_interval; a page that
+        failed upstream (transport error, 429, 5xx or an open circuit) is
+        retried on the next refresh.
+        """
+        if self.scraper.last_error is not None:
+            print(f"Backfill of {self.scraper.source.name} stopped early: {self.scraper.last_error}")
+            return
+        self.scraper._backfill_retry_at = time.monotonic() + self.scraper.backfill_retry_interval
+
+    def commit(self):
+        """Merge the walk into the scraper history and return the number of new stories"""
+        scraper = self.scraper
+        stored = [] if self.replaced else scraper.history
+        history = (self.fresh + stored + self.older)[:scraper.history_size]
+        scraper.history = scraper._trim(history)
+        scraper.seen = {scraper._story_key(story) for story in scraper.history}
+
+        added = len(self.fresh) + len(self.older)
+        print(f"Refreshed news history: {added} new, {len(scraper.history)} stored")
+        return added
 
 class NewScraper:
-    def __init__(self, page_url="https://www.adaderana.lk/hot-news/?pageno={}"):
-        self.page_url = page_url
+    """
+    Incremental scraper of one news source's listing pages (Adaderana by
+    default). `page_url` overrides the source's URL template, e.g. to replay
+    recorded pages.
+    """
+    def __init__(self, page_url=None, concurrency=4, client=None, history_size=1000, source=None, max_bytes=None):
+        self.source = source or ADADERANA
+        self.page_url = page_url or self.source.page_url
+        self.client = client or default_client
+        # Number of pages downloaded in parallel (1 = serial fetching)
+        self.concurrency = max(1, concurrency)
+        # Why the last page fetch failed upstream (transport error, 429 or 5xx), if it did
+        self.last_error = None
+        # Stories per listing page, learned from the pages fetched so far
+        self.page_size = None
 
-    def scrape_page(self, limit):
-        all_news = []
-        """Scrape the first `limit` news items across multiple pages."""
-        # Safeguard limit
-        limit = min(1000,limit)
-        print(f"Scraping up to {limit} news items...")
-        
-        page_no = 1  # Adaderana starts at page 1
+        # Rolling history of stories (NewsRecords), newest first, used by incremental scrapes.
+        # It holds at most `history_size` stories and, with `max_bytes`, drops the
+        # oldest ones once they take more memory than that
+        self.history_size = history_size
+        self.max_bytes = max_bytes
+        # How many stories the history held when max_bytes last evicted some;
+        # backfill doesn't aim deeper than that
+        self.held_depth = None
+        self.history = []
+        self.seen = set()
+        self._history_lock = threading.Lock()
+        # When a backfill ends short of its target, don't retry it on every refresh
+        self.backfill_retry_interval = 3600
+        self._backfill_retry_at = 0.0
+
+    def _load_page(self, page_no):
+        """Fetch and parse one listing page. Returns a list of stories, or None on failure"""
+        print(f"Scraping {self.source.name} page {page_no}...")
+        url = self.page_url.format(page_no)
+        try:
+            res = self.client.get(url)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error on page {page_no}: {e}")
+            self.last_error = str(e)
+            return None
+
+        if res.status_code != 200:
+            print("Error loading page!")
+            if res.status_code == 429 or res.status_code >= 500:
+                self.last_error = f"{self.source.name} page {page_no}: status {res.status_code}"
+            return None
+
+        return self._parse_stories(res.text)
+
+    @timed('parse')
+    def _parse_stories(self, html):
+        """Extract headline, link and date/time from each news story on a page"""
+        stories = to_records(self.source.parse(html))
+        if stories:
+            self.page_size = max(self.page_size or 0, len(stories))
+        return stories
+
+    def _pages_for(self, count):
+        """Pages holding `count` more stories; one at a time until the page size is known"""
+        if count <= 0:
+            return 0
+        return math.ceil(count / self.page_size) if self.page_size else 1
+
+    def iter_pages(self, start_page=1, concurrency=None, limit=None):
+        """
+        Yield the parsed stories of each page in page order, starting at `start_page`.
+        Up to `concurrency` pages are downloaded and parsed ahead in worker threads,
+        but no more than a caller's known `limit` of stories needs; further pages
+        are only fetched if it keeps iterating. Iteration stops at the first
+        page that fails or has no stories.
+        """
+        workers = self.concurrency if concurrency is None else max(1, concurrency)
+
+        if workers == 1:
+            page_no = start_page
+            while True:
+                stories = self._load_page(page_no)
+                if not stories:
+                    print("No more stories found, stopping.")
+                    return
+                yield stories
+                page_no += 1
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = {}
+        next_page = queued = start_page
         collected = 0
 
-        while collected < limit:
-            print(f"Scraping page {page_no}...")
-            url = self.page_url.format(page_no)
-            res = requests.get(url)
+        def fill(want):
+            nonlocal queued
+            while len(pending) < want:
+                pending[queued] = executor.submit(self._load_page, queued)
+                queued += 1
 
-            if res.status_code != 200:
-                print("Error loading page!")
-                break
+        def window():
+            # Pages to keep in flight: only as many as a known limit still needs
+            return workers if limit is None else min(workers, self._pages_for(limit - collected))
 
-            soup = BeautifulSoup(res.text, "html.parser")
-            stories = soup.find_all("div", class_="news-story")
+        try:
+            fill(window())
+            while True:
+                # Past the limit, pages are fetched one at a time as the caller asks
+                fill(1)
+                stories = pending.pop(next_page).result()
+                if not stories:
+                    print("No more stories found, stopping.")
+                    return
+                next_page += 1
+                collected += len(stories)
 
-            if not stories:
-                print("No more stories found, stopping.")
-                break
+                # Keep the window full before handing the page to the caller
+                fill(window())
+                yield stories
+        finally:
+            # Drop pages that were queued but are no longer needed
+            executor.shutdown(wait=False, cancel_futures=True)
 
-            for s in stories:
-                if collected >= limit:
-                    break
+    @staticmethod
+    def parse_date_time(text):
+        """Parse Adaderana's "October 17, 2025 02:10 pm" style stamp, or None if it doesn't match"""
+        return ADADERANA.parse_date(text)
 
-                # Get headline + link
-                h = s.find("h2")
-                a = h.find("a") if h else None
-                headline = a.text.strip() if a else ""
-                link = a["href"] if a else ""
-
-                # Get date + time
-                comments = s.find("div", class_="comments")
-                date_time_text = ""
-                if comments:
-                    span = comments.find("span")
-                    if span:
-                        date_time_text = span.text.strip().lstrip("|").strip()
-
-                # Save entry
-                all_news.append({
-                    "ID": collected + 1,
-                    "date_time": date_time_text,
-                    "headline": headline,
-                    "url": link
-                })
+    def seed_history(self, stories):
+        """Prime the rolling history, e.g. from persisted stories after a restart"""
+        with self._history_lock:
+            self.history = self._trim(to_records(list(stories)[:self.history_size]))
+            self.seen = {self._story_key(story) for story in self.history}
+
+    def _trim(self, history):
+        """`history` cut down to max_bytes, remembering how many stories fit when any had to go"""
+        trimmed = trim_to_bytes(history, self.max_bytes)
+        if len(trimmed) < len(history):
+            self.held_depth = len(trimmed)
+        return trimmed
+
+    def latest(self, limit):
+        """The newest `limit` stories of the rolling history, without fetching"""
+        with self._history_lock:
+            return self.history[:limit]
+
+    @staticmethod
+    def _story_key(story):
+        """Identity of a story for deduplication (its URL, or headline if it has none)"""
+        return story["url"] or story["headline"]
+
+    def refresh(self, depth=None):
+        """
+        Bring the rolling history up to date and return the number of new stories.
+        Pages are walked from the top until one contains an already seen story;
+        if the history is still shallower than `depth`, pages past the end of
+        the history are then walked to backfill it.
+        """
+        with self._history_lock:
+            walk = RefreshWalk(self, depth)
+            self.last_error = None
+
+            if self.history:
+                # Catch up with the top of the feed one page at a time
+                pages = self.iter_pages(concurrency=1)
+                try:
+                    for stories in pages:
+                        if walk.catch_up(stories):
+                            break
+                finally:
+                    pages.close()
 
-                collected += 1
+            if walk.needs_backfill():
+                pages = self.iter_pages(start_page=walk.backfill_start(), limit=walk.depth - walk.known)
+                try:
+                    for stories in pages:
+                        if walk.backfill(stories):
+                            break
+                    else:
+                        walk.exhausted()
+                finally:
+                    pages.close()
 
-            page_no += 1
+            return walk.commit()
 
-        return pd.DataFrame(all_news)
+    def scrape_page(self, limit, concurrency=None, incremental=True):
+        """Scrape the first `limit` news items across multiple pages."""
+        all_news = []
+        # Safeguard limit
+        limit = min(1000,limit)
+        print(f"Scraping up to {limit} news items...")
+
+        if incremental:
+            # Serve from the rolling history, fetching only what changed upstream
+            self.refresh(limit)
+            latest = self.latest(limit)
+            return news_frame(latest)
+
+        pages = self.iter_pages(concurrency=concurrency, limit=limit)
+        try:
+            for stories in pages:
+                # IDs follow page order, so they stay stable regardless of fetch order
+                all_news.extend(stories[:limit - len(all_news)])
+                if len(all_news) >= limit:
+                    break
+        finally:
+            pages.close()
 
+        return news_frame(all_news)
 
 if __name__ == "__main__":
     scraper = NewScraper()
@@ -0,0 +1,343 @@
+"""
+asyncio serving mode: the same pages and API routes as server.py, served by aiohttp.
+
+    python async_server.py
+
+Upstream fetches go through one non-blocking AsyncHttpClient, so a request or
+ingestion run waiting on a slow site is a suspended coroutine rather than a
+blocked worker thread, and idle connections cost next to nothing. CPU work
+(HTML parsing, classification, SQLite) runs in the default executor.
+"""
+from api import startup
+with startup.step('import aiohttp'):
+    from aiohttp import web
+with startup.step('import api modules'):
+    from api.async_scrapers import AsyncNewsPipeline, AsyncCSEScraper, AsyncEconomicIndicatorsScraper
+    from api.http_client import AsyncHttpClient
+    from api.cache import AsyncResponseCache
+    from api.scheduler import AsyncIngestionScheduler, Snapshot
+    from api.shared_snapshots import SharedSnapshotStore, AsyncSharedFeeds
+    from api.store import DataStore
+    from api.classifier import HeadlineClassifier
+    from api.feeds import (
+        FEED_ENDPOINTS, default_db_path, default_shared_dir, series_path, news_memory_cap,
+        persist_snapshot, warm_start, follow_snapshot, runtime_metrics
+    )
+    from api.routes import ApiRoutes, RESPONSE_TTLS, STREAM_HEADERS, cacheable
+    from api import routes as api_routes
+    from api import http_cache, metrics
+import asyncio
+import json
+import os
+import time
+
+# yfinance is only needed by the currency feed, so it is imported on first use
+yf = startup.LazyModule('yfinance')
+
+# SQLite store and array files live together (under /tmp on Vercel)
+DB_PATH = default_db_path()
+
+# 'all' runs everything in this process; 'worker' only serves the snapshots an
+# ingestion process (server.py with CEYLONPULSE_ROLE=ingest) publishes, see
+# multiprocess_server.py
+ROLE = os.environ.get('CEYLONPULSE_ROLE', 'all')
+if ROLE not in ('all', 'worker'):
+    # The ingestion process always runs server.py, which publishes to shared memory
+    raise SystemExit(
+        f"CEYLONPULSE_ROLE={ROLE} is not supported by async_server.py; use 'all' or 'worker' "
+        "and run the ingestion process with server.py"
+    )
+# Workers never fetch from upstream or load the model
+INGESTS = ROLE != 'worker'
+
+# One client, and so one connection pool, shared by all three scrapers
+client = AsyncHttpClient()
+scraper = AsyncNewsPipeline(client=client, max_bytes=news_memory_cap())
+cse_scraper = AsyncCSEScraper(client=client, series_path=series_path(DB_PATH, 'aspi'))
+econ_scraper = AsyncEconomicIndicatorsScraper(client=client)
+
+# Cache API payloads so repeated polling doesn't trigger a fresh scrape every time
+response_cache = AsyncResponseCache(ttls=RESPONSE_TTLS, max_stale=3600, max_entries=128, should_cache=cacheable)
+
+# PESTLE classifier; predictions are memoized so unchanged headlines cost no model calls
+model_path = os.path.join(os.path.dirname(__file__), 'api', 'news_pestle_model.keras')
+classifier = HeadlineClassifier(model_path)
+
+# Background ingestion as tasks on the event loop
+NEWS_SNAPSHOT_SIZE = 1000
+if ROLE == 'worker':
+    # Snapshots, and feed health, come from the ingestion process
+    scheduler = AsyncSharedFeeds(SharedSnapshotStore(default_shared_dir(DB_PATH)))
+else:
+    scheduler = AsyncIngestionScheduler()
+    scheduler.add_job('news', lambda: scraper.scrape_page(NEWS_SNAPSHOT_SIZE), interval=300, timeout=120)
+    scheduler.add_job('aspi', lambda: cse_scraper.get_aspi_data('1Y'), interval=300, timeout=30)
+    scheduler.add_job('economic', econ_scraper.fetch_economic_indicators, interval=1800, timeout=30)
+    # yfinance has no async API, so this one feed still waits in a worker thread
+    scheduler.add_job(
+        'currency',
+        lambda: asyncio.to_thread(lambda: yf.Ticker('LKR=X').history(period='max')),
+        interval=900,
+        timeout=60
+    )
+
+# Persistent store so restarts and cold starts don't begin from nothing
+with startup.step('open store'):
+    store = DataStore(DB_PATH)
+
+# Route logic shared with server.py; this module only adapts it to aiohttp
+routes = ApiRoutes(scheduler, store, classifier, cse_scraper, client, infer=INGESTS)
+news_index = routes.news_index
+analytics = routes.analytics
+
+# Keep cached payloads, chart aggregates, the index and analytics in step with the feeds
+routes.follow(response_cache)
+with startup.step('seed analytics'):
+    analytics.seed(store)
+
+if INGESTS:
+    scheduler.on_update(lambda name, snapshot: persist_snapshot(store, name, snapshot))
+
+    with startup.step('warm start'):
+        warm_start(store, scraper, classifier, scheduler.store, cse_scraper)
+else:
+    # Keep the news history and ASPI series in step with what the ingestion process publishes
+    scheduler.on_update(lambda name, snapshot: follow_snapshot(name, snapshot, scraper, cse_scraper))
+    with startup.step('attach snapshots'):
+        for name in FEED_ENDPOINTS:
+            scheduler.store.get(name)
+
+# Define the pages directory
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'pages')
+
+# Pages are served from memory, precompressed
+with startup.step('load pages'):
+    static_pages = http_cache.StaticPages(PAGES_DIR)
+
+# Add a Server-Timing header (fetch/parse/classify/serialize) for browser devtools
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') == '1'
+
+# Expose counters kept by the cache, classifier, transport and scheduler
+metrics.registry.collector(lambda: runtime_metrics(response_cache, classifier, client, scheduler))
+
+startup.report()
+
+def reply_response(reply):
+    """aiohttp response of a (status, body, mimetype, headers) reply from ApiRoutes"""
+    status, body, mimetype, headers = reply
+    return web.Response(body=body, status=status, content_type=mimetype, headers=headers)
+
+def page_response(request, page_name, status=200):
+    """Serve a page from memory, compressed and revalidated with its ETag"""
+    reply = api_routes.page_reply(static_pages, page_name, request.headers, status)
+    if reply is None:
+        raise web.HTTPNotFound()
+    return reply_response(reply)
+
+def page_not_found(request):
+    """Custom 404 response"""
+    return page_response(request, '404.html', 404)
+
+@web.middleware
+async def request_timing(request, handler):
+    """Record request latency per route and add the Server-Timing header"""
+    began = time.perf_counter()
+    metrics.begin_request()
+    try:
+        response = await handler(request)
+    except web.HTTPNotFound:
+        response = page_not_found(request)
+
+    elapsed = time.perf_counter() - began
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(elapsed, route=route, status=str(response.status))
+    timings = metrics.end_request()
+    # Streamed responses have already sent their headers
+    if SERVER_TIMING and not response.prepared:
+        response.headers['Server-Timing'] = metrics.server_timing(timings, total=elapsed)
+    return response
+
+async def index(request):
+    """Serve the main HTML page from pages folder"""
+    return page_response(request, 'index.html')
+
+async def serve_page(request):
+    """Serve requested pages from the pages folder"""
+    page_name = request.match_info['page_name']
+    # Skip API routes - they should be handled by API endpoints
+    if page_name.startswith('api/'):
+        raise web.HTTPNotFound()
+
+    # If no extension, assume .html
+    if '.' not in page_name:
+        page_name = f"{page_name}.html"
+
+    return page_response(request, page_name)
+
+def json_response(payload, status=200):
+    with metrics.stage('serialize'):
+        body = json.dumps(payload)
+    return web.Response(text=body, status=status, content_type='application/json')
+
+async def cached_response(request, endpoint, params, loader):
+    """Serve an API payload through the response cache, compressed and tagged with a version ETag"""
+    encoding, stale, etag, reply = routes.revalidate(endpoint, params, request.headers)
+    if reply is None:
+        result = await response_cache.get(endpoint, params, loader)
+        # Serializing and compressing a large payload is CPU work; keep it off the loop
+        reply = await asyncio.to_thread(routes.payload_reply, endpoint, params, result, encoding, stale, etag)
+    return reply_response(reply)
+
+async def get_news(request):
+    """API endpoint to fetch news with optional limit parameter"""
+    query = api_routes.news_query(request.query)
+    stream = api_routes.stream_format(request.query, request.headers, query)
+    if stream:
+        return await stream_news(request, query['limit'], stream == 'sse')
+    return await cached_response(request, 'news', query, lambda: load_news(query))
+
+async def load_news(query):
+    """Classified headlines of a news query, from the search index, the store or the news snapshot"""
+    source = routes.news_source(query)
+    if source == 'store':
+        snapshot = None
+    elif source == 'snapshot' and INGESTS and scheduler.store.get('news') is None:
+        snapshot = await first_use_news(query['limit'])
+    else:
+        snapshot = await scheduler.snapshot('news')
+    # Indexing, classification and SQLite all block; keep them off the loop
+    return await asyncio.to_thread(routes.load_news, query, source, snapshot)
+
+async def first_use_news(limit):
+    """
+    Stand-in snapshot of the latest `limit` stories for a request on a news feed
+    never fetched yet, so it doesn't wait for the full snapshot job started alongside
+    """
+    scheduler.run_now('news')
+    return Snapshot(await scraper.scrape_page(limit, incremental=False), time.time(), 0)
+
+async def stream_news(request, limit, sse=False):
+    """Stream the latest classified headlines chunk by chunk as NDJSON or Server-Sent Events"""
+    response = web.StreamResponse(headers={'Content-Type': api_routes.stream_mimetype(sse), **STREAM_HEADERS})
+    await response.prepare(request)
+
+    count = 0
+    try:
+        if INGESTS and scheduler.store.get('news') is None:
+            # Cold start: stream pages as they are scraped instead of waiting
+            # for the full snapshot, which is fetched alongside
+            scheduler.run_now('news')
+            pages = scraper.iter_pages(limit=limit)
+            try:
+                async for stories in pages:
+                    stories = stories[:limit - count]
+                    for items in await asyncio.to_thread(routes.page_chunks, stories, count + 1):
+                        await response.write(api_routes.stream_chunk(items, sse).encode())
+                    count += len(stories)
+                    if count >= limit:
+                        break
+            finally:
+                await pages.aclose()
+        else:
+            chunks = routes.news_chunks(await scheduler.snapshot('news'), limit)
+            while True:
+                # Each chunk may need classifying, so it is produced off the loop
+                items = await asyncio.to_thread(next, chunks, None)
+                if items is None:
+                    break
+                count += len(items)
+                await response.write(api_routes.stream_chunk(items, sse).encode())
+        await response.write(api_routes.stream_end(count, sse).encode())
+    except ConnectionResetError:
+        # Client went away
+        return response
+    except Exception as e:
+        await response.write(api_routes.stream_error(e, sse).encode())
+
+    await response.write_eof()
+    return response
+
+async def get_currency(request):
+    """API endpoint to fetch USD/LKR exchange rate data"""
+    query = api_routes.currency_query(request.query)
+    return await cached_response(request, 'currency', query, lambda: load_currency(query))
+
+async def load_currency(query):
+    """USD/LKR history of a currency query; date ranges are answered from the persistent store"""
+    snapshot = None if api_routes.ranged(query) else await scheduler.snapshot('currency')
+    return await asyncio.to_thread(routes.load_currency, query, snapshot)
+
+async def get_stock(request):
+    """API endpoint to fetch ASPI (Colombo Stock Exchange All Share Price Index) data"""
+    query = api_routes.stock_query(request.query)
+    return await cached_response(request, 'stock', query, lambda: load_stock(query))
+
+async def load_stock(query):
+    """ASPI history of a stock query; date ranges are answered from the persistent store"""
+    snapshot = None if api_routes.ranged(query) else await scheduler.snapshot('aspi')
+    return await asyncio.to_thread(routes.load_stock, query, snapshot)
+
+async def get_economic_indicators(request):
+    """API endpoint to fetch economic indicators (GDP, CCPI, NCPI)"""
+    return await cached_response(request, 'economic', {}, load_economic_indicators)
+
+async def load_economic_indicators():
+    return routes.load_economic(await scheduler.snapshot('economic'))
+
+async def get_analytics(request):
+    """API endpoint for SMA/EMA, volatility and drawdown of the rate and ASPI, and the daily PESTLE share"""
+    # New news may need classifying, so the update runs off the loop
+    reply = await asyncio.to_thread(routes.analytics_reply, api_routes.analytics_days(request.query), request.headers)
+    return reply_response(reply)
+
+async def get_ingestion_status(request):
+    """API endpoint reporting the health and staleness of each ingested feed"""
+    return json_response(routes.status_payload())
+
+async def get_classifier_stats(request):
+    """API endpoint reporting classifier cache hit rate and batch inference times"""
+    return json_response(routes.classifier_payload())
+
+async def get_metrics(request):
+    """API endpoint exposing timing histograms and counters in Prometheus text format"""
+    return web.Response(
+        body=metrics.registry.render().encode(),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
+
+async def get_transport_stats(request):
+    """API endpoint exposing the shared upstream HTTP client counters"""
+    return json_response(routes.transport_payload())
+
+async def on_startup(app):
+    # Same switches as server.py: the refresh loop and model warmup only run on long-lived servers
+    if INGESTS and os.environ.get('BACKGROUND_INGESTION', '0' if os.environ.get('VERCEL') else '1') == '1':
+        scheduler.start()
+    if INGESTS and os.environ.get('MODEL_WARMUP', '0' if os.environ.get('VERCEL') else '1') == '1':
+        classifier.warmup()
+
+async def on_cleanup(app):
+    await scheduler.stop()
+    await client.close()
+
+def create_app():
+    app = web.Application(middlewares=[request_timing])
+    app.router.add_get('/', index)
+    app.router.add_get('/api/news', get_news)
+    app.router.add_get('/api/currency', get_currency)
+    app.router.add_get('/api/stock', get_stock)
+    app.router.add_get('/api/economic', get_economic_indicators)
+    app.router.add_get('/api/analytics', get_analytics)
+    app.router.add_get('/api/status', get_ingestion_status)
+    app.router.add_get('/api/classifier', get_classifier_stats)
+    app.router.add_get('/api/metrics', get_metrics)
+    app.router.add_get('/api/transport', get_transport_stats)
+    # Registered last so the API routes above take precedence
+    app.router.add_get('/{page_name:.+}', serve_page)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+if __name__ == '__main__':
+    web.run_app(create_app(), host='0.0.0.0', port=5000)
@@ -0,0 +1,73 @@
+"""
+Parse-time benchmark for EconomicIndicatorsScraper on a saved copy of the
+Trading Economics indicators page.
+
+    python -m benchmarks.bench_economic_parse --record     # save the page once
+    python -m benchmarks.bench_economic_parse --repeat 50  # compare parsers
+
+The page is shared with the scraper suite's recorded fixtures.
+"""
+import argparse
+import statistics
+import time
+from bs4 import BeautifulSoup
+from api.web_scraper import EconomicIndicatorsScraper, HTML_PARSER
+from benchmarks import fixtures
+
+def legacy_parse(scraper, html):
+    """The previous implementation: full html.parser parse, then indicators x rows traversals"""
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', {'class': 'table'})
+    if not table:
+        return None
+    rows = table.find_all('tr')
+    results = []
+    for name, keyword in scraper.target_indicators.items():
+        for row in rows:
+            cols = row.find_all('td')
+            if len(cols) >= 6 and keyword in cols[0].get_text().strip():
+                last = cols[1].get_text().strip().replace('%', '').replace(',', '')
+                if not last or last == '-':
+                    continue
+                results.append((name, float(last)))
+                break
+    return results
+
+def time_parse(parse, html, repeat):
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        parse(html)
+        samples.append(time.perf_counter() - began)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('page', nargs='?', help='saved indicators page (defaults to the recorded fixture)')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--record', action='store_true', help='record the live page as a fixture first')
+    args = parser.parse_args()
+
+    scraper = EconomicIndicatorsScraper()
+    if args.record:
+        fixtures.record([scraper.url], scraper.client, scraper.headers)
+    args.page = args.page or fixtures.fixture_path(scraper.url)
+
+    with open(args.page, encoding='utf-8') as f:
+        html = f.read()
+
+    before = time_parse(lambda page: legacy_parse(scraper, page), html, args.repeat)
+    after = time_parse(scraper.parse_indicators, html, args.repeat)
+
+    legacy_names = [name for name, _ in legacy_parse(scraper, html) or []]
+    current_names = [item['indicator'] for item in scraper.parse_indicators(html) or []]
+
+    print(f"Page: {args.page} ({len(html)} bytes), {args.repeat} runs")
+    print(f"before (html.parser, nested loops): median {statistics.median(before) * 1000:.2f} ms")
+    print(f"after  ({HTML_PARSER}, strained, indexed): median {statistics.median(after) * 1000:.2f} ms")
+    print(f"speedup: {statistics.median(before) / statistics.median(after):.1f}x")
+    if legacy_names != current_names:
+        print(f"WARNING: indicator sets differ: {legacy_names} vs {current_names}")
+
+if __name__ == '__main__':
+    main()
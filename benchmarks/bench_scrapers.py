@@ -0,0 +1,213 @@
+"""
+Offline benchmark of the three scrapers against recorded fixtures.
+
+    python -m benchmarks.bench_scrapers --record                # record pages once (needs network)
+    python -m benchmarks.bench_scrapers --output results.json   # replay and measure
+    python -m benchmarks.bench_scrapers --compare results.json  # fail on regressions
+
+Every case reports wall time, time spent in HTTP fetches, time spent
+parsing, rows per second and peak traced memory.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from api.http_client import HttpClient
+from api.web_scraper import NewScraper, CSEScraper, EconomicIndicatorsScraper
+from benchmarks import fixtures
+
+NEWS_LIMITS = [10, 100, 1000]
+# Adaderana pages to record; the listing shows roughly 20 stories per page
+NEWS_PAGES = 60
+
+class TimedClient(HttpClient):
+    """HttpClient that accumulates the time spent inside GET requests"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fetch_seconds = 0.0
+        self._timer_lock = threading.Lock()
+
+    def get(self, *args, **kwargs):
+        began = time.perf_counter()
+        try:
+            return super().get(*args, **kwargs)
+        finally:
+            with self._timer_lock:
+                self.fetch_seconds += time.perf_counter() - began
+
+class ParseTimer:
+    """Wraps a parse method on an instance and accumulates its run time"""
+    def __init__(self, obj, method):
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        original = getattr(obj, method)
+
+        def timed(*args, **kwargs):
+            began = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.seconds += time.perf_counter() - began
+
+        setattr(obj, method, timed)
+
+def measure(name, scraper_factory, parse_method, run, setup=None):
+    """Run one case (after an untimed `setup`) and return its measurements"""
+    # The replayed upstream is local, so it isn't rate limited
+    client = TimedClient(rate=None)
+    scraper = scraper_factory(client)
+    parse = ParseTimer(scraper, parse_method)
+
+    if setup is not None:
+        setup(scraper)
+    client.fetch_seconds = 0.0
+    parse.seconds = 0.0
+    requests_before = client.stats()['requests']
+
+    tracemalloc.start()
+    began = time.perf_counter()
+    result = run(scraper)
+    wall = time.perf_counter() - began
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    client.close()
+
+    rows = len(result) if result is not None else 0
+    return {
+        'case': name,
+        'rows': rows,
+        'wall_seconds': round(wall, 4),
+        'fetch_seconds': round(client.fetch_seconds, 4),
+        'parse_seconds': round(parse.seconds, 4),
+        'rows_per_second': round(rows / wall, 1) if wall > 0 else None,
+        'peak_memory_bytes': peak,
+        'requests': client.stats()['requests'] - requests_before
+    }
+
+def run_cases(replay, concurrency=None):
+    news_url = replay.url_for(NewScraper().page_url)
+    cse_url = replay.url_for(CSEScraper().base_url)
+    econ_url = replay.url_for(EconomicIndicatorsScraper().url)
+
+    def news_scraper(client):
+        scraper = NewScraper(page_url=news_url, client=client)
+        if concurrency is not None:
+            scraper.concurrency = concurrency
+        return scraper
+
+    def cse_scraper(client):
+        scraper = CSEScraper(client=client)
+        scraper.base_url = cse_url
+        return scraper
+
+    def econ_scraper(client):
+        scraper = EconomicIndicatorsScraper(client=client)
+        scraper.url = econ_url
+        return scraper
+
+    results = []
+    for limit in NEWS_LIMITS:
+        results.append(measure(
+            f'news.scrape_page[{limit}]', news_scraper, '_parse_stories',
+            lambda scraper, limit=limit: scraper.scrape_page(limit)
+        ))
+
+    # Incremental refresh of an already warm history
+    results.append(measure(
+        'news.refresh[100]', news_scraper, '_parse_stories',
+        lambda scraper: scraper.scrape_page(100),
+        setup=lambda scraper: scraper.scrape_page(100)
+    ))
+
+    for period in CSEScraper.PERIOD_DAYS:
+        results.append(measure(
+            f'cse.get_aspi_data[{period}]', cse_scraper, 'parse_aspi_value',
+            lambda scraper, period=period: scraper.get_aspi_data(period)
+        ))
+
+    results.append(measure(
+        'economic.fetch_economic_indicators', econ_scraper, 'parse_indicators',
+        lambda scraper: scraper.fetch_economic_indicators()
+    ))
+    return results
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, tolerance):
+    """Print per-case changes against a baseline file and return the regressed cases"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {case['case']: case for case in json.load(f)['results']}
+
+    regressions = []
+    for case in results:
+        before = baseline.get(case['case'])
+        if before is None or not before['wall_seconds']:
+            continue
+        ratio = case['wall_seconds'] / before['wall_seconds']
+        memory_ratio = case['peak_memory_bytes'] / max(1, before['peak_memory_bytes'])
+        flag = ''
+        if ratio > 1 + tolerance or memory_ratio > 1 + tolerance:
+            flag = '  REGRESSION'
+            regressions.append(case['case'])
+        print(f"{case['case']:40s} time x{ratio:.2f}  memory x{memory_ratio:.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', action='store_true', help='record fixtures from the live sites')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before flagging (0.2 = 20%%)')
+    parser.add_argument('--concurrency', type=int, help='override NewScraper page concurrency')
+    args = parser.parse_args()
+
+    if args.record:
+        client = HttpClient()
+        news = NewScraper()
+        fixtures.record([news.page_url.format(page) for page in range(1, NEWS_PAGES + 1)], client)
+        cse = CSEScraper()
+        fixtures.record([cse.base_url], client, cse.headers)
+        econ = EconomicIndicatorsScraper()
+        fixtures.record([econ.url], client, econ.headers)
+
+    if not fixtures.load_manifest():
+        sys.exit('No fixtures recorded yet; run with --record first')
+
+    with fixtures.ReplayServer() as replay:
+        results = run_cases(replay, args.concurrency)
+
+    for case in results:
+        print(
+            f"{case['case']:40s} {case['rows']:5d} rows  wall {case['wall_seconds']:.3f}s  "
+            f"fetch {case['fetch_seconds']:.3f}s  parse {case['parse_seconds']:.3f}s  "
+            f"{case['rows_per_second'] or 0:.0f} rows/s  peak {case['peak_memory_bytes'] / 1024:.0f} KiB"
+        )
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            sys.exit(f"{len(regressions)} case(s) regressed")
+
+if __name__ == '__main__':
+    main()
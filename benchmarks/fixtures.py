@@ -0,0 +1,109 @@
+"""
+Recorded upstream pages and a local HTTP server that replays them.
+
+Pages are stored under benchmarks/fixtures/ as one file per URL, with
+manifest.json mapping each original URL to its file. The replay server
+serves them at http://127.0.0.1:<port>/<host><path>?<query>, so a scraper
+is pointed at the fixtures by swapping its upstream base URL for
+replay.url_for(original).
+"""
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+MANIFEST = os.path.join(FIXTURE_DIR, 'manifest.json')
+
+def fixture_name(url):
+    """File name of the recorded copy of `url`"""
+    parts = urlsplit(url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    return f"{parts.netloc}{re.sub(r'[^A-Za-z0-9.-]+', '_', path)}.html"
+
+def fixture_path(url):
+    return os.path.join(FIXTURE_DIR, fixture_name(url))
+
+def load_manifest():
+    if not os.path.exists(MANIFEST):
+        return {}
+    with open(MANIFEST, encoding='utf-8') as f:
+        return json.load(f)
+
+def record(urls, client, headers=None):
+    """Download each URL once and store it as a fixture. Returns the updated manifest"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    manifest = load_manifest()
+    for url in urls:
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            print(f"Skipping {url}: status {response.status_code}")
+            continue
+        with open(fixture_path(url), 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        manifest[url] = fixture_name(url)
+        print(f"Recorded {url} ({len(response.text)} bytes)")
+
+    with open(MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+class ReplayServer:
+    """Serves recorded fixtures on localhost; unknown URLs get a 404"""
+    def __init__(self, manifest=None, port=0):
+        manifest = manifest if manifest is not None else load_manifest()
+        # Keyed by "<host><path>?<query>", the same shape as request paths
+        self.pages = {}
+        for url, name in manifest.items():
+            parts = urlsplit(url)
+            key = f"/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+            self.pages[key] = os.path.join(FIXTURE_DIR, name)
+
+        pages = self.pages
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = pages.get(self.path)
+                if path is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                with open(path, 'rb') as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def url_for(self, url):
+        """Rewrite an upstream URL (or URL template) to its replayed location"""
+        parts = urlsplit(url)
+        rest = url.split(parts.netloc, 1)[1]
+        return f"http://127.0.0.1:{self.port}/{parts.netloc}{rest}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,221 @@
+"""
+Load generator for the Flask API with every upstream replaced by recorded fixtures.
+
+    python -m benchmarks.load_test --rps 50 --duration 30
+    python -m benchmarks.load_test --mix news=1,static=4 --save-baseline baseline.json
+    python -m benchmarks.load_test --compare baseline.json
+    python -m benchmarks.load_test --url http://localhost:5000    # an already running server
+
+Requests are fired open-loop at the target rate, so a slow route shows up
+as growing latency instead of silently lowering the offered load.
+Reports p50/p95/p99 latency, throughput and error rate per route.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from benchmarks import fixtures
+
+CURRENCY_FIXTURE = os.path.join(fixtures.FIXTURE_DIR, 'LKR=X.csv')
+
+PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', 'max']
+PAGES = ['/', '/news', '/currency', '/economic', '/stockMarket']
+
+# Each route picks a fresh request path per call
+ROUTES = {
+    'news': lambda: f"/api/news?limit={random.choice([10, 50, 100])}",
+    'currency': lambda: f"/api/currency?period={random.choice(PERIODS)}",
+    'stock': lambda: f"/api/stock?period={random.choice(PERIODS)}",
+    'economic': lambda: '/api/economic',
+    'static': lambda: random.choice(PAGES)
+}
+
+DEFAULT_MIX = 'news=1,currency=2,stock=2,economic=1,static=4'
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        route, _, weight = part.partition('=')
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route '{route}', expected one of {', '.join(ROUTES)}")
+        mix[route] = float(weight or 1)
+    return mix
+
+def record_currency():
+    """Save the LKR=X history so the currency feed can be replayed offline"""
+    import yfinance as yf
+    os.makedirs(fixtures.FIXTURE_DIR, exist_ok=True)
+    yf.Ticker('LKR=X').history(period='max').to_csv(CURRENCY_FIXTURE)
+    print(f"Recorded LKR=X history to {CURRENCY_FIXTURE}")
+
+def start_local_server(replay, use_cache=True):
+    """Import server.py against the replayed upstreams and serve it on a free port"""
+    # Isolated store and no background loop: feeds are fetched from the fixtures on first use
+    os.environ['CEYLONPULSE_DB'] = os.path.join(tempfile.mkdtemp(prefix='ceylonpulse-load-'), 'load.db')
+    os.environ['BACKGROUND_INGESTION'] = '0'
+
+    import pandas as pd
+    from werkzeug.serving import make_server
+    from api.http_client import HostGuard
+    import server
+
+    # Replayed upstreams are local, so they aren't rate limited
+    server.default_client.guard = HostGuard(rate=None)
+    for news_scraper in server.scraper.scrapers.values():
+        news_scraper.page_url = replay.url_for(news_scraper.page_url)
+    server.cse_scraper.base_url = replay.url_for(server.cse_scraper.base_url)
+    server.econ_scraper.url = replay.url_for(server.econ_scraper.url)
+    if os.path.exists(CURRENCY_FIXTURE):
+        server.scheduler.jobs['currency'].fetch = lambda: pd.read_csv(CURRENCY_FIXTURE, index_col=0, parse_dates=True)
+    else:
+        print(f"No {CURRENCY_FIXTURE}; /api/currency will report errors")
+
+    if not use_cache:
+        # Every request then goes through the full handler; the cache only counts bypasses
+        server.response_cache.enabled = False
+
+    httpd = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f"http://127.0.0.1:{httpd.server_port}"
+
+def fire(base_url, route, path, timeout):
+    began = time.perf_counter()
+    try:
+        with urllib.request.urlopen(base_url + path, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 500
+    except urllib.error.HTTPError as e:
+        # 404s for pages are still answers; only server errors count as failures
+        ok = e.code < 500
+    except Exception:
+        ok = False
+    return route, time.perf_counter() - began, ok
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run(base_url, mix, rps, duration, workers, timeout):
+    routes = list(mix.keys())
+    weights = list(mix.values())
+    interval = 1.0 / rps
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        began = time.perf_counter()
+        next_at = began
+        while next_at - began < duration:
+            now = time.perf_counter()
+            if now < next_at:
+                time.sleep(next_at - now)
+            route = random.choices(routes, weights)[0]
+            futures.append(executor.submit(fire, base_url, route, ROUTES[route](), timeout))
+            next_at += interval
+        samples = [future.result() for future in futures]
+        elapsed = time.perf_counter() - began
+
+    report = {}
+    for route in routes + ['all']:
+        latencies = sorted(s[1] for s in samples if route in ('all', s[0]))
+        errors = sum(1 for s in samples if route in ('all', s[0]) and not s[2])
+        count = len(latencies)
+        report[route] = {
+            'requests': count,
+            'throughput_rps': round(count / elapsed, 2),
+            'error_rate': round(errors / count, 4) if count else None,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if count else None,
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if count else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if count else None
+        }
+    return report
+
+def compare(report, baseline_path, tolerance):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['routes']
+
+    regressions = []
+    for route, stats in report.items():
+        before = baseline.get(route)
+        if not before or not before['p95_ms'] or not stats['p95_ms']:
+            continue
+        ratio = stats['p95_ms'] / before['p95_ms']
+        error_delta = (stats['error_rate'] or 0) - (before['error_rate'] or 0)
+        flag = ''
+        if ratio > 1 + tolerance or error_delta > 0.01:
+            flag = '  REGRESSION'
+            regressions.append(route)
+        print(f"{route:10s} p95 x{ratio:.2f}  error rate {error_delta:+.2%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='target an already running server instead of an in-process one')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f'route weights (default {DEFAULT_MIX})')
+    parser.add_argument('--rps', type=float, default=20, help='target requests per second')
+    parser.add_argument('--duration', type=float, default=20, help='seconds to generate load')
+    parser.add_argument('--workers', type=int, default=64, help='max requests in flight')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--no-cache', action='store_true', help='disable the response cache of the in-process server')
+    parser.add_argument('--record', action='store_true', help='record the LKR=X history fixture (needs network)')
+    parser.add_argument('--save-baseline', help='write the report to this file')
+    parser.add_argument('--compare', help='baseline report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.record:
+        record_currency()
+
+    replay = None
+    httpd = None
+    base_url = args.url
+    if base_url is None:
+        if not fixtures.load_manifest():
+            sys.exit('No fixtures recorded yet; run python -m benchmarks.bench_scrapers --record first')
+        replay = fixtures.ReplayServer().start()
+        httpd, base_url = start_local_server(replay, use_cache=not args.no_cache)
+
+    try:
+        print(f"Offering {args.rps} req/s for {args.duration}s to {base_url}")
+        report = run(base_url, args.mix, args.rps, args.duration, args.workers, args.timeout)
+    finally:
+        if httpd is not None:
+            httpd.shutdown()
+        if replay is not None:
+            replay.stop()
+
+    for route, stats in report.items():
+        print(
+            f"{route:10s} {stats['requests']:6d} req  {stats['throughput_rps']:7.2f} req/s  "
+            f"errors {stats['error_rate'] or 0:6.2%}  p50 {stats['p50_ms']} ms  "
+            f"p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms"
+        )
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'timestamp': datetime.now().isoformat(),
+                'rps': args.rps,
+                'duration': args.duration,
+                'mix': args.mix,
+                'cache': not args.no_cache,
+                'routes': report
+            }, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        if regressions:
+            sys.exit(f"{len(regressions)} route(s) regressed")
+
+if __name__ == '__main__':
+    main()
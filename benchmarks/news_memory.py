@@ -0,0 +1,130 @@
+"""
+Memory held per stored headline, before and after the compact news storage.
+
+    python -m benchmarks.news_memory [--stories 1000] [--output results.json]
+
+"Before" is how stories used to be kept: the parsed dicts in the scraper
+history and an object-dtype snapshot frame with ISO date strings. "After" is
+NewsRecords in the history and the news_frame snapshot (datetime64 dates,
+categorical source and category). Stories come from the recorded Adaderana
+fixtures when there are any (see bench_scrapers --record), otherwise they are
+generated in the same shape.
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+import pandas as pd
+from api.classifier import CLASS_NAMES
+from api.news_records import news_frame, to_records
+from api.news_sources import ADADERANA
+from benchmarks import fixtures
+
+WORDS = (
+    'president', 'minister', 'cabinet', 'parliament', 'court', 'police', 'rupee', 'budget', 'tax', 'imf',
+    'fuel', 'price', 'electricity', 'tariff', 'flood', 'rain', 'landslide', 'school', 'exam', 'hospital',
+    'colombo', 'kandy', 'galle', 'jaffna', 'election', 'opposition', 'bill', 'approved', 'arrested', 'warns'
+)
+
+def recorded_stories():
+    """Stories parsed from the recorded Adaderana listing pages, newest first"""
+    stories = []
+    for url, name in sorted(fixtures.load_manifest().items()):
+        if ADADERANA.host not in url:
+            continue
+        with open(fixtures.fixture_path(url), encoding='utf-8') as f:
+            stories.extend(ADADERANA.parse(f.read()))
+    return stories
+
+def generated_stories(count, seed=0):
+    """Adaderana-shaped stories; every field is a fresh string, as parsing would produce"""
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    stories = []
+    for i in range(count):
+        published = now - timedelta(minutes=37 * i)
+        stories.append({
+            'date_time': published.strftime('%B %d, %Y %I:%M %p'),
+            'headline': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize(),
+            'url': f'https://www.adaderana.lk/news.php?nid={120000 - i}',
+            'source': ''.join(['ada', 'derana']),
+            'published_at': published.isoformat()
+        })
+    return stories
+
+def deep_size(root):
+    """Bytes reachable from `root`, counting every object once (shared strings only once)"""
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif hasattr(type(obj), '__slots__'):
+            stack.extend(getattr(obj, name) for name in type(obj).__slots__ if hasattr(obj, name))
+    return total
+
+def measure(stories, seed=0):
+    rng = random.Random(seed)
+    categories = [rng.choice(CLASS_NAMES) for _ in stories]
+
+    # Before: parsed dicts in the history, an object frame for the snapshot
+    history = [dict(story) for story in stories]
+    frame = pd.DataFrame([
+        {'ID': i + 1, **story, 'category': category}
+        for i, (story, category) in enumerate(zip(stories, categories))
+    ])
+    before = {
+        'history': deep_size(history),
+        'frame': int(frame.memory_usage(deep=True).sum())
+    }
+
+    # After: records in the history, the compact snapshot frame
+    records = to_records(dict(story) for story in stories)
+    compact = news_frame([{**story, 'category': category} for story, category in zip(stories, categories)])
+    after = {
+        'history': deep_size(records),
+        'frame': int(compact.memory_usage(deep=True).sum())
+    }
+
+    count = len(stories)
+    return {
+        'stories': count,
+        'before': {**before, 'bytes_per_headline': round((before['history'] + before['frame']) / count, 1)},
+        'after': {**after, 'bytes_per_headline': round((after['history'] + after['frame']) / count, 1)}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stories', type=int, default=1000, help='stories to generate when no fixtures are recorded')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    stories = recorded_stories() or generated_stories(args.stories)
+    result = measure(stories)
+
+    print(f"{result['stories']} stories")
+    for label in ('before', 'after'):
+        case = result[label]
+        print(
+            f"{label:7s} history {case['history'] / 1024:8.1f} KiB  frame {case['frame'] / 1024:8.1f} KiB  "
+            f"{case['bytes_per_headline']:7.1f} bytes/headline"
+        )
+    saved = 1 - result['after']['bytes_per_headline'] / result['before']['bytes_per_headline']
+    print(f"saved   {saved:.0%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Multi-process deployment: one ingestion process and N serving workers.
+
+    python multiprocess_server.py [--workers N] [--port 5000] [--async]
+
+The ingestion process (server.py with CEYLONPULSE_ROLE=ingest) runs the
+scrapers, the scheduler and the classifier, and publishes every snapshot to
+files in shared memory (/dev/shm, or CEYLONPULSE_SHARED_DIR). The workers
+(CEYLONPULSE_ROLE=worker) run the Flask app, or the aiohttp one with --async,
+but never fetch upstream or load the model: they map the published snapshots
+and serve them, all accepting connections on one listening socket opened here.
+Serving scales with cores while upstream load and model memory stay those of
+a single process.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import uuid
+
+def run_ingest():
+    os.environ['CEYLONPULSE_ROLE'] = 'ingest'
+    # Importing the app starts the scheduler, the status publisher and the model warmup
+    import server  # noqa: F401
+    threading.Event().wait()
+
+def run_worker(sock, use_async):
+    os.environ['CEYLONPULSE_ROLE'] = 'worker'
+    if use_async:
+        from aiohttp import web
+        import async_server
+        web.run_app(async_server.create_app(), sock=sock, print=None)
+    else:
+        from werkzeug.serving import make_server
+        import server
+        host, port = sock.getsockname()[:2]
+        make_server(host, port, server.app, threaded=True, fd=sock.fileno()).serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='number of serving processes')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--async', dest='use_async', action='store_true', help='serve with the aiohttp app')
+    args = parser.parse_args()
+
+    # Workers share ETags, so a revalidation can be answered by any of them
+    os.environ.setdefault('CEYLONPULSE_BOOT_ID', uuid.uuid4().hex)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    # Forked children inherit the listening socket; nothing heavy is imported before the fork
+    context = multiprocessing.get_context('fork')
+    specs = [('ingest', run_ingest, ())] + [
+        (f'worker-{i + 1}', run_worker, (sock, args.use_async)) for i in range(max(1, args.workers))
+    ]
+    processes = {}
+
+    def spawn(name, target, target_args):
+        process = context.Process(target=target, args=target_args, name=name, daemon=True)
+        process.start()
+        processes[name] = (process, target, target_args)
+        print(f"Started {name} (pid {process.pid})")
+
+    for spec in specs:
+        spawn(*spec)
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    # Replace any process that dies, so one crash doesn't take capacity down for good
+    while not stopping.wait(1.0):
+        for name, (process, target, target_args) in list(processes.items()):
+            if not process.is_alive():
+                print(f"{name} exited with code {process.exitcode}; restarting")
+                spawn(name, target, target_args)
+
+    for process, _, _ in processes.values():
+        process.terminate()
+    for process, _, _ in processes.values():
+        process.join(timeout=5)
+    sock.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,157 @@
-from flask import Flask, jsonify, request, send_from_directory, abort
-from api.web_scraper import NewScraper, CSEScraper, EconomicIndicatorsScraper
-import tensorflow_hub as hub
-import tf_keras as keras
-import numpy as np
-import zipfile
-import json
+from api import startup
+with startup.step('import flask'):
+    from flask import Flask, Response, g, jsonify, request, abort
+with startup.step('import api modules'):
+    from api.web_scraper import CSEScraper, EconomicIndicatorsScraper
+    from api.news_pipeline import NewsPipeline
+    from api.http_client import default_client
+    from api.cache import ResponseCache
+    from api.scheduler import IngestionScheduler, Snapshot
+    from api.shared_snapshots import SharedSnapshotStore, SharedFeeds
+    from api.store import DataStore
+    from api.classifier import HeadlineClassifier
+    from api.feeds import (
+        FEED_ENDPOINTS, default_db_path, default_shared_dir, series_path, news_memory_cap,
+        persist_snapshot, warm_start, follow_snapshot, classify_news, runtime_metrics
+    )
+    from api.routes import ApiRoutes, RESPONSE_TTLS, STREAM_HEADERS, cacheable
+    from api import routes as api_routes
+    from api import http_cache, metrics
 import os
-import yfinance as yf
+import time
 
-scraper = NewScraper()
-cse_scraper = CSEScraper()
+# yfinance is only needed by the currency feed, so it is imported on first use
+yf = startup.LazyModule('yfinance')
+
+# SQLite store and array files live together (under /tmp on Vercel)
+DB_PATH = default_db_path()
+
+# 'all' runs everything in this process. Multi-process mode (multiprocess_server.py)
+# runs one 'ingest' process, which fetches, classifies and publishes snapshots to
+# shared memory, and several 'worker' processes that only serve them
+ROLE = os.environ.get('CEYLONPULSE_ROLE', 'all')
+# Workers never fetch from upstream or load the model
+INGESTS = ROLE != 'worker'
+
+# News from every enabled source, merged into one deduplicated feed; with
+# CEYLONPULSE_NEWS_MEMORY_MB set, the oldest stories are evicted to stay under it
+scraper = NewsPipeline(max_bytes=news_memory_cap())
+cse_scraper = CSEScraper(series_path=series_path(DB_PATH, 'aspi'))
 econ_scraper = EconomicIndicatorsScraper()
 app = Flask(__name__, static_folder='.')
 
-# Load the model once at startup
+# Cache API payloads so repeated polling doesn't trigger a fresh scrape every time
+response_cache = ResponseCache(ttls=RESPONSE_TTLS, max_stale=3600, max_entries=128, should_cache=cacheable)
+
+# PESTLE classifier; predictions are memoized so unchanged headlines cost no model calls
 model_path = os.path.join(os.path.dirname(__file__), 'api', 'news_pestle_model.keras')
-with zipfile.ZipFile(model_path, 'r') as z:
-    config_data = z.read('config.json')
-    config = json.loads(config_data)
-# loaded_model = keras.Sequential.from_config(config['config'], custom_objects={'KerasLayer': hub.KerasLayer})
-print("Model loaded successfully (without weights - using for demo)")
+classifier = HeadlineClassifier(model_path)
+
+# Background ingestion: each feed is refreshed on its own interval and the
+# API routes only read the latest snapshot from memory
+NEWS_SNAPSHOT_SIZE = 1000
+if ROLE == 'worker':
+    # Snapshots, and feed health, come from the ingestion process
+    scheduler = SharedFeeds(SharedSnapshotStore(default_shared_dir(DB_PATH)))
+else:
+    scheduler = IngestionScheduler(SharedSnapshotStore(default_shared_dir(DB_PATH)) if ROLE == 'ingest' else None)
+    if ROLE == 'ingest':
+        # News is published already classified, so workers never need the model
+        fetch_news = lambda: classify_news(scraper.scrape_page(NEWS_SNAPSHOT_SIZE), classifier)
+    else:
+        fetch_news = lambda: scraper.scrape_page(NEWS_SNAPSHOT_SIZE)
+    scheduler.add_job('news', fetch_news, interval=300, timeout=120)
+    scheduler.add_job('aspi', lambda: cse_scraper.get_aspi_data('1Y'), interval=300, timeout=30)
+    scheduler.add_job('economic', econ_scraper.fetch_economic_indicators, interval=1800, timeout=30)
+    scheduler.add_job('currency', lambda: yf.Ticker('LKR=X').history(period='max'), interval=900, timeout=60)
+
+# Persistent store so restarts and cold starts don't begin from nothing
+with startup.step('open store'):
+    store = DataStore(DB_PATH)
+
+# Route logic shared with async_server.py; this module only adapts it to Flask
+routes = ApiRoutes(scheduler, store, classifier, cse_scraper, default_client, infer=INGESTS)
+news_index = routes.news_index
+analytics = routes.analytics
+
+if ROLE != 'ingest':
+    # Keep cached payloads, chart aggregates, the index and analytics in step with the feeds
+    routes.follow(response_cache)
+    with startup.step('seed analytics'):
+        analytics.seed(store)
+
+if INGESTS:
+    scheduler.on_update(lambda name, snapshot: persist_snapshot(store, name, snapshot))
+
+    with startup.step('warm start'):
+        warm_start(store, scraper, classifier, scheduler.store, cse_scraper)
+else:
+    # Keep the news history and ASPI series in step with what the ingestion process publishes
+    scheduler.on_update(lambda name, snapshot: follow_snapshot(name, snapshot, scraper, cse_scraper))
+    with startup.step('attach snapshots'):
+        for name in FEED_ENDPOINTS:
+            scheduler.snapshot(name)
+
+if ROLE == 'ingest':
+    # Feed health for the workers' /api/status and stale flags
+    scheduler.store.publish_status(scheduler.status)
+
+# Serverless instances are frozen between requests, so the refresh loop only
+# runs on long-lived servers; otherwise feeds are fetched on first use
+if INGESTS and os.environ.get('BACKGROUND_INGESTION', '0' if os.environ.get('VERCEL') else '1') == '1':
+    scheduler.start()
+
+# Long-lived servers load the model in the background right away; serverless
+# instances load it on the first /api/news request instead
+if INGESTS and os.environ.get('MODEL_WARMUP', '0' if os.environ.get('VERCEL') else '1') == '1':
+    classifier.warmup()
 
 # Define the pages directory
 PAGES_DIR = os.path.join(os.path.dirname(__file__), 'pages')
 
+# Pages are served from memory, precompressed
+with startup.step('load pages'):
+    static_pages = http_cache.StaticPages(PAGES_DIR)
+
+# Add a Server-Timing header (fetch/parse/classify/serialize) for browser devtools
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') == '1'
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    metrics.begin_request()
+
+@app.after_request
+def record_request_timing(response):
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.REQUEST_SECONDS.observe(elapsed, route=route, status=str(response.status_code))
+    timings = metrics.end_request()
+    if SERVER_TIMING:
+        response.headers['Server-Timing'] = metrics.server_timing(timings, total=elapsed)
+    return response
+
+# Expose counters kept by the cache, classifier, transport and scheduler
+metrics.registry.collector(lambda: runtime_metrics(response_cache, classifier, default_client, scheduler))
+
+startup.report()
+
+def reply_response(reply):
+    """Flask response of a (status, body, mimetype, headers) reply from ApiRoutes"""
+    status, body, mimetype, headers = reply
+    return Response(body, status=status, mimetype=mimetype, headers=headers)
+
+def page_response(page_name, status=200):
+    """Serve a page from memory, compressed and revalidated with its ETag"""
+    reply = api_routes.page_reply(static_pages, page_name, request.headers, status)
+    if reply is None:
+        abort(404)
+    return reply_response(reply)
+
 @app.route('/')
 def index():
     """Serve the main HTML page from pages folder"""
-    return send_from_directory(PAGES_DIR, 'index.html')
+    return page_response('index.html')
 
 @app.route('/<path:page_name>')
 def serve_page(page_name):
@@ -35,206 +159,126 @@ def serve_page(page_name):
     # Skip API routes - they should be handled by API endpoints
     if page_name.startswith('api/'):
         abort(404)
-    
-    try:
-        # If no extension, assume .html
-        if '.' not in page_name:
-            page_name = f"{page_name}.html"
-        
-        # Check if file exists in pages directory
-        file_path = os.path.join(PAGES_DIR, page_name)
-        if os.path.isfile(file_path):
-            return send_from_directory(PAGES_DIR, page_name)
-        else:
-            abort(404)
-    except Exception:
-        abort(404)
+
+    # If no extension, assume .html
+    if '.' not in page_name:
+        page_name = f"{page_name}.html"
+
+    return page_response(page_name)
 
 @app.errorhandler(404)
 def page_not_found(e):
     """Custom 404 error handler"""
-    return send_from_directory(PAGES_DIR, '404.html'), 404
+    return page_response('404.html', 404)
+
+def cached_response(endpoint, params, loader):
+    """Serve an API payload through the response cache, compressed and tagged with a version ETag"""
+    encoding, stale, etag, reply = routes.revalidate(endpoint, params, request.headers)
+    if reply is None:
+        result = response_cache.get(endpoint, params, loader)
+        reply = routes.payload_reply(endpoint, params, result, encoding, stale, etag)
+    return reply_response(reply)
 
 @app.route('/api/news', methods=['GET'])
 def get_news():
     """API endpoint to fetch news with optional limit parameter"""
-    try:
-        # Get limit from query params, default to 10, max 1000
-        limit = request.args.get('limit', default=10, type=int)
-        limit = max(1, min(1000, limit))  # Clamp between 1 and 1000
-        
-        # Scrape news
-        df = scraper.scrape_page(limit)
-        
-        # Analyze news with model
-        preds = loaded_model.predict(df['headline'], verbose=0)
-        pred_classes = np.argmax(preds, axis=1)
-        class_names = ['Economic', 'Environmental', 'Legal', 'Political', 'Social', 'Technological']
-        df['category'] = [class_names[i] for i in pred_classes]
-        # Convert to list of dicts for JSON response
-        news_items = df.to_dict('records')
-        
-        # Return JSON response
-        return jsonify({
-            'status': 'success',
-            'count': len(news_items),
-            'items': news_items
-        }), 200
-        
-    except Exception as e:
-        # Handle errors and return error response
-        return jsonify({
-            'status': 'error',
-            'message': str(e)
-        }), 500
+    query = api_routes.news_query(request.args)
+    stream = api_routes.stream_format(request.args, request.headers, query)
+    if stream:
+        return stream_news(query['limit'], stream == 'sse')
+    return cached_response('news', query, lambda: load_news(query))
+
+def load_news(query):
+    """Classified headlines of a news query, from the search index, the store or the news snapshot"""
+    source = routes.news_source(query)
+    if source == 'store':
+        snapshot = None
+    elif source == 'snapshot' and INGESTS and scheduler.store.get('news') is None:
+        snapshot = first_use_news(query['limit'])
+    else:
+        snapshot = scheduler.snapshot('news')
+    return routes.load_news(query, source, snapshot)
+
+def first_use_news(limit):
+    """
+    Stand-in snapshot of the latest `limit` stories for a request on a news feed
+    never fetched yet, so it doesn't wait for the full snapshot job started alongside
+    """
+    scheduler.run_now('news')
+    return Snapshot(scraper.scrape_page(limit, incremental=False), time.time(), 0)
+
+def stream_news(limit, sse=False):
+    """Stream the latest classified headlines chunk by chunk as NDJSON or Server-Sent Events"""
+    def generate():
+        count = 0
+        try:
+            if INGESTS and scheduler.store.get('news') is None:
+                # Cold start: stream pages as they are scraped instead of waiting
+                # for the full snapshot, which is fetched alongside
+                scheduler.run_now('news')
+                chunks = routes.live_news_chunks(scraper.iter_pages(limit=limit), limit)
+            else:
+                chunks = routes.news_chunks(scheduler.snapshot('news'), limit)
+            for items in chunks:
+                count += len(items)
+                yield api_routes.stream_chunk(items, sse)
+            yield api_routes.stream_end(count, sse)
+        except Exception as e:
+            yield api_routes.stream_error(e, sse)
+
+    return Response(generate(), mimetype=api_routes.stream_mimetype(sse), headers=STREAM_HEADERS)
 
 @app.route('/api/currency', methods=['GET'])
 def get_currency():
     """API endpoint to fetch USD/LKR exchange rate data"""
-    try:
-        # Get period from query params (default 1 month)
-        period = request.args.get('period', default='1mo', type=str)
-        
-        # Valid periods: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, max
-        valid_periods = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', 'max']
-        if period not in valid_periods:
-            period = '1mo'
-        
-        # Fetch USD/LKR data from Yahoo Finance
-        ticker = yf.Ticker('LKR=X')
-        hist = ticker.history(period=period)
-        
-        if hist.empty:
-            return jsonify({
-                'status': 'error',
-                'message': 'Unable to fetch currency data for the selected period.'
-            }), 200
-        
-        # Convert to list of dicts
-        data = []
-        for date, row in hist.iterrows():
-            # Handle NaN values
-            close_val = float(row['Close']) if not np.isnan(row['Close']) else 0
-            open_val = float(row['Open']) if not np.isnan(row['Open']) else close_val
-            high_val = float(row['High']) if not np.isnan(row['High']) else close_val
-            low_val = float(row['Low']) if not np.isnan(row['Low']) else close_val
-            volume_val = int(row['Volume']) if not np.isnan(row['Volume']) and row['Volume'] > 0 else 0
-            
-            data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'rate': round(close_val, 4),
-                'open': round(open_val, 4),
-                'high': round(high_val, 4),
-                'low': round(low_val, 4),
-                'volume': volume_val
-            })
-        
-        # Filter out entries with 0 values
-        data = [d for d in data if d['rate'] > 0]
-        
-        if not data:
-            return jsonify({
-                'status': 'error',
-                'message': 'No valid data available for the selected period.'
-            }), 200
-        
-        # Get current rate
-        current_rate = data[-1]['rate']
-        previous_rate = data[-2]['rate'] if len(data) > 1 else current_rate
-        change = current_rate - previous_rate
-        change_percent = (change / previous_rate * 100) if previous_rate != 0 else 0
-        
-        return jsonify({
-            'status': 'success',
-            'current_rate': current_rate,
-            'change': round(change, 4),
-            'change_percent': round(change_percent, 2),
-            'period': period,
-            'data': data
-        }), 200
-        
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'message': str(e)
-        }), 500
+    query = api_routes.currency_query(request.args)
+    return cached_response('currency', query, lambda: load_currency(query))
+
+def load_currency(query):
+    """USD/LKR history of a currency query; date ranges are answered from the persistent store"""
+    snapshot = None if api_routes.ranged(query) else scheduler.snapshot('currency')
+    return routes.load_currency(query, snapshot)
 
 @app.route('/api/stock', methods=['GET'])
 def get_stock():
     """API endpoint to fetch ASPI (Colombo Stock Exchange All Share Price Index) data"""
-    try:
-        # Get period from query params (default 1 month)
-        period = request.args.get('period', default='1mo', type=str)
-        
-        # Map our periods to CSE periods
-        period_map = {
-            '1d': '1D',
-            '5d': '1W',
-            '1mo': '1M',
-            '3mo': '1Q',
-            '6mo': '1Q',  # CSE doesn't have 6mo, use 1Q
-            '1y': '1Y',
-            '2y': '1Y',   # CSE doesn't have 2y, use 1Y
-            '5y': '1Y',   # CSE doesn't have 5y, use 1Y
-            'max': '1Y'
-        }
-        
-        cse_period = period_map.get(period, '1M')
-        
-        # Fetch data from CSE
-        data = cse_scraper.get_aspi_data(cse_period)
-        
-        if not data or len(data) == 0:
-            return jsonify({
-                'status': 'error',
-                'message': 'Unable to fetch ASPI data from Colombo Stock Exchange. Please try again later.'
-            }), 200
-        
-        # Get current index
-        current_index = data[-1]['index']
-        previous_index = data[-2]['index'] if len(data) > 1 else current_index
-        change = current_index - previous_index
-        change_percent = (change / previous_index * 100) if previous_index != 0 else 0
-        
-        return jsonify({
-            'status': 'success',
-            'current_index': current_index,
-            'change': round(change, 2),
-            'change_percent': round(change_percent, 2),
-            'period': period,
-            'data': data
-        }), 200
-        
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'message': f'Error: {str(e)}'
-        }), 500
+    query = api_routes.stock_query(request.args)
+    return cached_response('stock', query, lambda: load_stock(query))
+
+def load_stock(query):
+    """ASPI history of a stock query; date ranges are answered from the persistent store"""
+    snapshot = None if api_routes.ranged(query) else scheduler.snapshot('aspi')
+    return routes.load_stock(query, snapshot)
 
 @app.route('/api/economic', methods=['GET'])
 def get_economic_indicators():
     """API endpoint to fetch economic indicators (GDP, CCPI, NCPI)"""
-    try:
-        # Fetch data from Trading Economics
-        data = econ_scraper.fetch_economic_indicators()
-        
-        if not data or len(data) == 0:
-            return jsonify({
-                'status': 'error',
-                'message': 'Unable to fetch economic indicators. Please try again later.'
-            }), 200
-        
-        return jsonify({
-            'status': 'success',
-            'count': len(data),
-            'indicators': data
-        }), 200
-        
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'message': f'Error: {str(e)}'
-        }), 500
+    return cached_response('economic', {}, lambda: routes.load_economic(scheduler.snapshot('economic')))
+
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    """API endpoint for SMA/EMA, volatility and drawdown of the rate and ASPI, and the daily PESTLE share"""
+    return reply_response(routes.analytics_reply(api_routes.analytics_days(request.args), request.headers))
+
+@app.route('/api/status', methods=['GET'])
+def get_ingestion_status():
+    """API endpoint reporting the health and staleness of each ingested feed"""
+    return jsonify(routes.status_payload()), 200
+
+@app.route('/api/classifier', methods=['GET'])
+def get_classifier_stats():
+    """API endpoint reporting classifier cache hit rate and batch inference times"""
+    return jsonify(routes.classifier_payload()), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """API endpoint exposing timing histograms and counters in Prometheus text format"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/transport', methods=['GET'])
+def get_transport_stats():
+    """API endpoint exposing the shared upstream HTTP client counters"""
+    return jsonify(routes.transport_payload()), 200
 
 if __name__ == '__main__':
     # Run the Flask development server
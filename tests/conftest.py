@@ -0,0 +1,57 @@
+import re
+import threading
+import pytest
+
+STORY_HTML = '<div class="news-story"><h2><a href="https://feed.test/news.php?nid={0}">Story number {0}</a></h2></div>'
+
+class FakeResponse:
+    def __init__(self, text='', status_code=200, headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class FakeFeed:
+    """
+    HTTP client serving an Adaderana-style listing of `size` stories, newest
+    first, `page_size` per page. Stories can be published on top, pages made
+    to fail, and every requested page is recorded.
+    """
+    page_url = 'https://feed.test/news?page={}'
+
+    def __init__(self, size, page_size=20):
+        self.ids = list(range(size, 0, -1))
+        self.page_size = page_size
+        self.failing = {}
+        self.requested = []
+        self._lock = threading.Lock()
+
+    def publish(self, count):
+        top = self.ids[0] if self.ids else 0
+        self.ids[:0] = range(top + count, top, -1)
+
+    def page(self, page_no):
+        start = (page_no - 1) * self.page_size
+        return self.ids[start:start + self.page_size]
+
+    def get(self, url, headers=None, **kwargs):
+        page_no = int(re.search(r'page=(\d+)', url).group(1))
+        with self._lock:
+            self.requested.append(page_no)
+        if page_no in self.failing:
+            return FakeResponse(status_code=self.failing[page_no])
+        return FakeResponse(''.join(STORY_HTML.format(i) for i in self.page(page_no)))
+
+    def reset(self):
+        with self._lock:
+            self.requested = []
+
+class AsyncFakeFeed(FakeFeed):
+    async def get(self, url, headers=None, **kwargs):
+        return FakeFeed.get(self, url, headers, **kwargs)
+
+def story_ids(stories):
+    return [int(story['url'].rsplit('=', 1)[1]) for story in stories]
+
+@pytest.fixture
+def feed():
+    return FakeFeed(300)
@@ -0,0 +1,38 @@
+from datetime import date
+from api.web_scraper import CSEScraper
+
+def scraper_with_close(close, day='2025-03-03'):
+    scraper = CSEScraper()
+    scraper.series.add_observation(close, day)
+    return scraper
+
+def page(value):
+    return f'<html><body><div>ASPI: {value}</div></body></html>'
+
+def test_rejects_numbers_outside_the_aspi_range():
+    scraper = CSEScraper()
+    assert not scraper.plausible(2)
+    assert not scraper.plausible(250_000)
+    assert scraper.plausible(20_000)
+
+def test_allowed_move_grows_with_the_days_since_the_last_close():
+    scraper = scraper_with_close(20_000)
+    assert scraper.plausible(24_000, today=date(2025, 3, 4))
+    assert not scraper.plausible(26_000, today=date(2025, 3, 4))
+    # A month later the same move is within reach
+    assert scraper.plausible(26_000, today=date(2025, 4, 3))
+
+def test_consistent_reading_recovers_from_a_bad_stored_close():
+    scraper = scraper_with_close(2025)
+    html = page('21,928.24')
+    assert scraper.parse_aspi_value(html) is None
+    assert scraper.parse_aspi_value(html) is None
+    assert scraper.parse_aspi_value(html) == 21928.24
+
+def test_confirmation_needs_readings_in_a_row_to_agree():
+    scraper = scraper_with_close(2025)
+    assert scraper.parse_aspi_value(page('21,928.24')) is None
+    assert scraper.parse_aspi_value(page('30,500.00')) is None
+    assert scraper.parse_aspi_value(page('21,930.00')) is None
+    assert scraper.parse_aspi_value(page('21,935.00')) is None
+    assert scraper.parse_aspi_value(page('21,940.00')) == 21940.0
@@ -0,0 +1,64 @@
+import asyncio
+import time
+import pytest
+from api.http_client import AsyncHttpClient, CircuitBreaker
+
+def open_breaker(**kwargs):
+    breaker = CircuitBreaker(failure_threshold=1, **kwargs)
+    breaker.record_failure()
+    breaker.open_until = time.monotonic()
+    return breaker
+
+def test_open_circuit_lets_one_probe_through():
+    breaker = open_breaker()
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+def test_half_open_probe_that_never_reports_is_given_up_on():
+    breaker = open_breaker(probe_timeout=30)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.probe_until = time.monotonic()
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+
+def test_cancelled_probe_reopens_the_circuit():
+    breaker = open_breaker()
+    breaker.allow()
+    breaker.record_cancelled()
+    assert breaker.state == 'open'
+    assert breaker.open_until > time.monotonic()
+
+def test_cancelled_request_on_a_closed_circuit_is_not_a_failure():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_cancelled()
+    assert breaker.state == 'closed'
+    assert breaker.failures == 0
+
+class HangingSession:
+    closed = False
+
+    def get(self, url, **kwargs):
+        return self
+
+    async def __aenter__(self):
+        await asyncio.sleep(3600)
+
+    async def __aexit__(self, *exc):
+        return False
+
+def test_async_probe_cancelled_by_a_timeout_reopens_the_circuit():
+    client = AsyncHttpClient(failure_threshold=1, rate=None)
+    client._session = HangingSession()
+    breaker = client.guard._host('feed.test')[1]
+    breaker.record_failure()
+    breaker.open_until = time.monotonic()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(client.get('https://feed.test/news'), 0.05))
+    assert breaker.state == 'open'
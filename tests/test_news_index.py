@@ -0,0 +1,38 @@
+import pandas as pd
+from api.news_index import NewsIndex
+from api.routes import date_arg
+from api.scheduler import Snapshot
+
+def make_index():
+    frame = pd.DataFrame([
+        {'headline': f'Story number {day}', 'url': f'https://feed.test/news.php?nid={day}', 'published_at': f'2025-03-{day:02d}T08:00:00', 'category': 'Economy'}
+        for day in range(20, 0, -1)
+    ])
+    return NewsIndex().sync(Snapshot(frame, 0, 1))
+
+def test_date_arg_drops_impossible_dates():
+    assert date_arg({'from': '2025-02-28'}, 'from') == '2025-02-28'
+    assert date_arg({'from': '2025-02-30'}, 'from') is None
+    assert date_arg({'from': '2025-13-01'}, 'from') is None
+    assert date_arg({'from': 'yesterday'}, 'from') is None
+    assert date_arg({}, 'from') is None
+
+def test_search_within_a_date_range():
+    index = make_index()
+    page, total, _ = index.search(start='2025-03-05', end='2025-03-07', limit=10)
+    assert total == 3
+    assert [story['headline'] for story in page] == ['Story number 7', 'Story number 6', 'Story number 5']
+
+def test_unparseable_date_bounds_are_ignored():
+    index = make_index()
+    _, total, _ = index.search(q='story', end='2025-02-30')
+    assert total == 20
+    _, total, _ = index.search(start='2025-02-30', end='2025-03-02')
+    assert total == 2
+
+def test_covers_only_dates_within_the_index():
+    index = make_index()
+    assert index.covers('2025-03-10')
+    assert not index.covers('2025-02-01')
+    assert not index.covers('2025-02-30')
+    assert not index.covers(None)
@@ -0,0 +1,30 @@
+from api.news_records import news_frame
+from api.routes import ApiRoutes
+from api.scheduler import Snapshot
+from api.web_scraper import NewScraper
+
+class FakeClassifier:
+    def classify(self, headlines):
+        return ['Economic'] * len(headlines)
+
+def make_routes():
+    return ApiRoutes(None, None, FakeClassifier(), None, None)
+
+def test_live_stream_sends_each_page_as_it_is_scraped(feed):
+    scraper = NewScraper(page_url=feed.page_url, client=feed, concurrency=1)
+    chunks = make_routes().live_news_chunks(scraper.iter_pages(limit=50), 50)
+
+    first = next(chunks)
+    assert feed.requested == [1]
+    assert first[0]['ID'] == 1
+    assert first[0]['category'] == 'Economic'
+
+    rest = [story for chunk in chunks for story in chunk]
+    assert [story['ID'] for story in first + rest] == list(range(1, 51))
+    assert sorted(feed.requested) == [1, 2, 3]
+
+def test_snapshot_stream_builds_rows_a_chunk_at_a_time():
+    frame = news_frame([{'headline': f'Story number {i}', 'url': f'https://feed.test/news.php?nid={i}'} for i in range(100)])
+    chunks = make_routes().news_chunks(Snapshot(frame, 0, 1), 45)
+    assert [len(chunk) for chunk in chunks] == [20, 20, 5]
+    assert list(make_routes().news_chunks(None, 45)) == []
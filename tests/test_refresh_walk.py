@@ -0,0 +1,112 @@
+import asyncio
+import time
+from api.async_scrapers import AsyncNewScraper
+from api.web_scraper import NewScraper
+from conftest import AsyncFakeFeed, FakeFeed, story_ids
+
+def make_scraper(feed, **kwargs):
+    return NewScraper(page_url=feed.page_url, client=feed, **kwargs)
+
+def test_first_refresh_backfills_to_the_history_size(feed):
+    scraper = make_scraper(feed, history_size=100)
+    assert scraper.refresh() == 100
+    assert story_ids(scraper.history) == list(range(300, 200, -1))
+
+def test_catch_up_fetches_only_the_top_page(feed):
+    scraper = make_scraper(feed, history_size=100)
+    scraper.refresh()
+    feed.publish(3)
+    feed.reset()
+
+    assert scraper.refresh() == 3
+    assert feed.requested == [1]
+    assert story_ids(scraper.history)[:4] == [303, 302, 301, 300]
+    assert len(scraper.history) == 100
+
+def test_catch_up_walks_pages_until_a_known_story(feed):
+    scraper = make_scraper(feed, history_size=100)
+    scraper.refresh()
+    feed.publish(45)
+    feed.reset()
+
+    assert scraper.refresh() == 45
+    assert feed.requested == [1, 2, 3]
+    ids = story_ids(scraper.history)
+    assert ids[:46] == list(range(345, 299, -1))
+    assert len(ids) == len(set(ids))
+
+def test_catch_up_past_the_history_replaces_it(feed):
+    scraper = make_scraper(feed, history_size=40)
+    scraper.refresh()
+    feed.publish(100)
+
+    scraper.refresh()
+    # No stale stories are joined on behind the new ones
+    assert story_ids(scraper.history) == list(range(400, 360, -1))
+
+def test_backfill_resumes_below_the_stored_history(feed):
+    scraper = make_scraper(feed, history_size=100)
+    scraper.seed_history([{'headline': f'Story number {i}', 'url': f'https://feed.test/news.php?nid={i}'} for i in range(300, 260, -1)])
+
+    assert scraper.refresh() == 60
+    ids = story_ids(scraper.history)
+    assert ids == list(range(300, 200, -1))
+    # One catch-up page, then backfill from the page holding the end of the history
+    assert feed.requested[0] == 1
+    assert sorted(feed.requested[1:]) == [2, 3, 4, 5]
+
+def test_backfill_backs_off_once_the_feed_ends():
+    feed = FakeFeed(50)
+    scraper = make_scraper(feed, history_size=100)
+    scraper.refresh()
+    assert len(scraper.history) == 50
+    assert scraper._backfill_retry_at > time.monotonic()
+
+    feed.reset()
+    scraper.refresh()
+    assert feed.requested == [1]
+
+def test_failed_page_does_not_back_off(feed):
+    feed.failing[3] = 503
+    scraper = make_scraper(feed, history_size=100)
+    scraper.refresh()
+    assert len(scraper.history) == 40
+    assert scraper._backfill_retry_at <= time.monotonic()
+
+    del feed.failing[3]
+    scraper.refresh()
+    assert story_ids(scraper.history) == list(range(300, 200, -1))
+
+def test_limited_scrape_fetches_only_the_pages_it_needs(feed):
+    scraper = make_scraper(feed, concurrency=4)
+    scraper.scrape_page(10, incremental=False)
+    assert feed.requested == [1]
+
+    feed.reset()
+    frame = scraper.scrape_page(50, incremental=False)
+    assert len(frame) == 50
+    assert sorted(feed.requested) == [1, 2, 3]
+
+def test_async_scraper_walks_the_same_way():
+    feed = AsyncFakeFeed(300)
+    scraper = AsyncNewScraper(page_url=feed.page_url, client=feed, history_size=100)
+    assert asyncio.run(scraper.refresh()) == 100
+    feed.publish(3)
+    feed.reset()
+
+    assert asyncio.run(scraper.refresh()) == 3
+    assert feed.requested == [1]
+    assert story_ids(scraper.history)[:4] == [303, 302, 301, 300]
+
+def test_memory_cap_stops_backfill_from_refetching_evicted_pages():
+    feed = FakeFeed(3000)
+    scraper = make_scraper(feed, history_size=1000, max_bytes=100_000)
+    scraper.refresh()
+    held = len(scraper.history)
+    assert 0 < held < 1000
+
+    feed.reset()
+    scraper.refresh()
+    # Only the catch-up page; backfilling past what fits would be evicted again
+    assert feed.requested == [1]
+    assert len(scraper.history) == held